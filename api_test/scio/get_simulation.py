@@ -16,22 +16,16 @@ django.setup()
 
 import argparse
 
-import pandas as pd
 import requests
 
 from django.utils import timezone
 
-from lumenix.models import SimulationKey, SimulationRun, SimulationResult
+from lumenix.models import SimulationKey, SimulationRun
+from lumenix.services.simulations import replace_results, run_frame
 
 
 BASE = "https://dev.api.ambrosia.scio.services"
 
-HEADER_MAP = {
-    "disease-risk": ("time_index", "risk_score"),
-}
-def get_headers(sim_type: str):
-    return HEADER_MAP.get(sim_type, ("x", "y"))
-
 def build_original_request_from_db(job_id: str) -> dict:
     """
     Get SimulationRun + SimulationKey from DB and reconstruct the request payload fields.
@@ -108,21 +102,11 @@ def upsert_from_api_payload(normalised: dict):
         },
     )
 
-    # Replace results
-    SimulationResult.objects.filter(job=run).delete()
-    bulk = []
-    for i, row in enumerate(normalised.get("results") or []):
-        x = row[0] if len(row) > 0 else None
-        y = row[1] if len(row) > 1 else None
-        bulk.append(SimulationResult(job=run, idx=i, x=x, y=y))
-    if bulk:
-        SimulationResult.objects.bulk_create(bulk, batch_size=1000)
+    # Replace results (one array row per run)
+    replace_results(run, normalised.get("results") or [])
 
     # Build DF for output
-    h0, h1 = get_headers(req["simulation_type"])
-    rows = SimulationResult.objects.filter(job=run).order_by("idx").values_list("x", "y")
-    df = pd.DataFrame(list(rows), columns=[h0, h1])
-    return run, df
+    return run, run_frame(run)
 
 def find_cached_dataframe(job_id: str):
     """
@@ -132,13 +116,7 @@ def find_cached_dataframe(job_id: str):
     run = SimulationRun.objects.filter(job_id=job_id).select_related("sim_key").first()
     if not run:
         return None, None
-    rows = SimulationResult.objects.filter(job=run).order_by("idx").values_list("x", "y")
-    rows = list(rows)
-    if not rows:
-        return run, None
-    h0, h1 = get_headers(run.sim_key.simulation_type)
-    df = pd.DataFrame(rows, columns=[h0, h1])
-    return run, df
+    return run, run_frame(run)
 
 
 def main():
@@ -184,8 +162,9 @@ def main():
 
     # 6) Persist results and print df.head()
     run, df = upsert_from_api_payload(normalised)
-    print(f"[api] job_id={run.job_id} status={run.status} rows={len(df)}")
-    print(df.head())
+    print(f"[api] job_id={run.job_id} status={run.status} rows={0 if df is None else len(df)}")
+    if df is not None:
+        print(df.head())
 
 if __name__ == "__main__":
     main()
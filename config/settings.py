@@ -199,7 +199,14 @@ CACHES = {
         "LOCATION": BASE_DIR / "data" / "django_cache",
         "TIMEOUT": 60 * 30,
         "OPTIONS": {"MAX_ENTRIES": 50000},
-    }
+    },
+    # Chart Q&A answers: per-process LRU (locmem evicts least recently used past MAX_ENTRIES) with a TTL.
+    "chart_qa": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "chart-qa-answers",
+        "TIMEOUT": int(os.getenv("CHART_QA_CACHE_TTL_SECONDS", str(6 * 60 * 60))),
+        "OPTIONS": {"MAX_ENTRIES": int(os.getenv("CHART_QA_CACHE_MAX_ENTRIES", "1000"))},
+    },
 }
 
 # Login protection thresholds
@@ -271,6 +278,37 @@ SCIO_PATHOGEN_SYNC_CHUNK_DAYS = int(os.getenv("SCIO_PATHOGEN_SYNC_CHUNK_DAYS", "
 SCIO_PATHOGEN_SYNC_REQUEST_DELAY_SECONDS = float(os.getenv("SCIO_PATHOGEN_SYNC_REQUEST_DELAY_SECONDS", "2"))
 SCIO_PATHOGEN_SYNC_CHUNK_MAX_RETRIES = int(os.getenv("SCIO_PATHOGEN_SYNC_CHUNK_MAX_RETRIES", "2"))
 SCIO_PATHOGEN_SYNC_MAX_CONSECUTIVE_FAILURES = int(os.getenv("SCIO_PATHOGEN_SYNC_MAX_CONSECUTIVE_FAILURES", "5"))
+SCIO_VOCAB_SYNC_BATCH_SIZE = int(os.getenv("SCIO_VOCAB_SYNC_BATCH_SIZE", "500"))
+SCIO_SIMULATION_API_URL = os.getenv(
+    "SCIO_SIMULATION_API_URL",
+    "https://dev.api.ambrosia.scio.services/api/run-simulation",
+)
+# An in-flight simulation run older than this is assumed lost and a new one is submitted.
+SCIO_SIMULATION_STALE_SECONDS = int(os.getenv("SCIO_SIMULATION_STALE_SECONDS", str(6 * 60 * 60)))
+# "array": one SimulationSeries row (float8[] columns) per run; "rows": legacy SimulationResult per point.
+SCIO_SIMULATION_RESULT_STORAGE = os.getenv("SCIO_SIMULATION_RESULT_STORAGE", "array")
+# Background polling of in-flight simulation runs: exponential backoff per run between
+# the base and max delay. Set the batch URL when the API offers a multi-job status call.
+SCIO_SIMULATION_POLL_BASE_SECONDS = int(os.getenv("SCIO_SIMULATION_POLL_BASE_SECONDS", "30"))
+SCIO_SIMULATION_POLL_MAX_SECONDS = int(os.getenv("SCIO_SIMULATION_POLL_MAX_SECONDS", "1800"))
+SCIO_SIMULATION_POLL_BATCH_SIZE = int(os.getenv("SCIO_SIMULATION_POLL_BATCH_SIZE", "50"))
+SCIO_SIMULATION_STATUS_BATCH_URL = os.getenv("SCIO_SIMULATION_STATUS_BATCH_URL", "")
+
+# Concept history: store a full snapshot every N versions (JSON-patch deltas in between)
+# and drop versions older than the retention window (0 keeps everything).
+CONCEPT_HISTORY_FULL_SNAPSHOT_EVERY = int(os.getenv("CONCEPT_HISTORY_FULL_SNAPSHOT_EVERY", "10"))
+CONCEPT_HISTORY_RETENTION_DAYS = int(os.getenv("CONCEPT_HISTORY_RETENTION_DAYS", "365"))
+
+# ERA5 NetCDF ingestion: time steps read and copied per block (bounds worker memory).
+CLIMATE_INGEST_TIME_BLOCK = int(os.getenv("CLIMATE_INGEST_TIME_BLOCK", "24"))
+# Where ingested fields go: "rows" (climate_data table), "grid" (float32 array store) or "both".
+CLIMATE_STORAGE_BACKEND = os.getenv("CLIMATE_STORAGE_BACKEND", "rows")
+# ERA5 single-level grid spacing in degrees (cell squares for NUTS zonal statistics).
+CLIMATE_GRID_RESOLUTION = float(os.getenv("CLIMATE_GRID_RESOLUTION", "0.25"))
+CLIMATE_GRID_STORE_DIR = os.getenv("CLIMATE_GRID_STORE_DIR", str(BASE_DIR / "data" / "climate_grid"))
+# ERA5 downloads run as monthly CDS requests; CDS queues per user, so keep this small.
+ERA5_DOWNLOAD_WORKERS = int(os.getenv("ERA5_DOWNLOAD_WORKERS", "4"))
+ERA5_DOWNLOAD_RETRIES = int(os.getenv("ERA5_DOWNLOAD_RETRIES", "2"))
 
 # Broker/result (Redis example)
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "").strip()
@@ -292,4 +330,25 @@ CELERY_BEAT_SCHEDULE = {
         "schedule": crontab(minute="*/5"),
         "kwargs": {"batch_size": PATHOGEN_AUTO_SYNC_BATCH_SIZE},
     },
+    # Daily ERA5 refresh: re-fetches the open month, ingests only the new days.
+    "refresh-climate-data": {
+        "task": "lumenix.tasks.refresh_climate_data_task",
+        "schedule": crontab(minute=0, hour=6),
+    },
+    # Per-NUTS daily climate statistics for the days the refresh above just loaded.
+    "compute-nuts-climate-stats": {
+        "task": "lumenix.tasks.compute_nuts_climate_stats_task",
+        "schedule": crontab(minute=0, hour=8),
+    },
+    # In-flight simulation runs; each run is only polled when its backoff has elapsed.
+    "poll-simulation-runs": {
+        "task": "lumenix.tasks.poll_simulation_runs_task",
+        "schedule": crontab(minute="*"),
+        "kwargs": {"limit": SCIO_SIMULATION_POLL_BATCH_SIZE},
+    },
+    # Weekly retention + delta re-encoding of ConceptHistory.
+    "compact-concept-history": {
+        "task": "lumenix.tasks.compact_concept_history_task",
+        "schedule": crontab(minute=30, hour=3, day_of_week="sun"),
+    },
 }
@@ -25,6 +25,11 @@ done
 echo "PostgreSQL is up - applying migrations..."
 python manage.py migrate --noinput
 
+if [ ! -f static/data/nuts/build/manifest.json ]; then
+  echo "Building NUTS geometry bundles..."
+  python manage.py build_nuts_bundles
+fi
+
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
 
@@ -1,5 +1,6 @@
 # lumenix/admin.py
 
+import json
 from datetime import date
 from urllib.parse import urlparse
 
@@ -19,12 +20,14 @@ from django_json_widget.widgets import JSONEditorWidget
 from .forms import EmailOrUsernameAdminAuthenticationForm
 from .models import (Vocabulary, Scheme, Concept, PlantConcept, PathogenConcept, ConceptHistory, DashboardChart,
                      DashboardViewChart, DashboardViewMode, SidebarChartLink, NutsRegion, ScioModel, UserProfile,
-                     PathogenQuerySpec, PathogenConcentrationRecord, AdminMenuMaster)
+                     PathogenQuerySpec, PathogenConcentrationRecord, AdminMenuMaster, ApiSyncState)
+from .services.concept_hierarchy import descendants_of, parent_concepts
+from .services.concept_history import reconstruct_version
 from .services.models_sync import sync_models
-from .services.nuts_sync import sync_nuts
+from .services.nuts_sync import sync_nuts, sync_nuts_levels
 from .services.pathogen_query import sync_pathogen_query_spec
 from .services.vocabulary_sync import sync_vocabulary
-from .tasks import sync_pathogen_query_spec_task, sync_pathogen_query_specs_batch_task
+from .tasks import sync_models_task, sync_pathogen_query_spec_task, sync_pathogen_query_specs_batch_task
 
 
 class ApiSyncedReadOnlyAdmin(admin.ModelAdmin):
@@ -437,6 +440,22 @@ class ScioModelNameDuplicateFilter(admin.SimpleListFilter):
         return queryset.exclude(name__in=dup_names)
 
 
+class ConceptSubtreeFilter(admin.SimpleListFilter):
+    title = "Under concept"
+    parameter_name = "under"
+
+    def lookups(self, request, model_admin):
+        parents = parent_concepts().only("id", "uri", "pref_label").order_by("uri")
+        return [(str(c.pk), str(c)) for c in parents]
+
+    def queryset(self, request, queryset):
+        try:
+            concept_id = int(self.value() or "")
+        except ValueError:
+            return queryset
+        return queryset.filter(pk__in=descendants_of(concept_id).values("pk"))
+
+
 @admin.register(Vocabulary)
 class VocabularyAdmin(ApiSyncedReadOnlyAdmin):
     list_display = ("id", "status", "created_at")
@@ -452,7 +471,7 @@ class SchemeAdmin(ApiSyncedReadOnlyAdmin):
 class ConceptAdmin(ApiSyncedReadOnlyAdmin):
     list_display = ("uri", "vocabulary", "scheme", "ambrosia_supported_badge", "status", "updated_at")
     search_fields = ("uri", "pref_label__en")
-    list_filter = ("vocabulary", "status", "ambrosia_supported")
+    list_filter = ("vocabulary", "status", "ambrosia_supported", ConceptSubtreeFilter)
 
     @admin.display(description="Ambrosia Supported", ordering="ambrosia_supported")
     def ambrosia_supported_badge(self, obj):
@@ -472,9 +491,25 @@ class PathogenConceptAdmin(ConceptAdmin):
 
 @admin.register(ConceptHistory)
 class ConceptHistoryAdmin(ApiSyncedReadOnlyAdmin):
-    list_display = ("concept", "change_type", "changed_at")
-    list_filter = ("change_type",)
+    list_display = ("concept", "version", "change_type", "is_full", "changed_at")
+    list_filter = ("change_type", "is_full")
     search_fields = ("concept__uri",)
+    list_select_related = ("concept",)
+    readonly_fields = ("reconstructed_snapshot",)
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        if request.resolver_match and request.resolver_match.url_name.endswith("_changelist"):
+            # The list never shows the JSON payloads; don't ship them from the DB.
+            qs = qs.defer("snapshot", "delta")
+        return qs
+
+    @admin.display(description="Reconstructed snapshot")
+    def reconstructed_snapshot(self, obj):
+        doc = reconstruct_version(obj.concept_id, obj.version)
+        if doc is None:
+            return "-"
+        return format_html("<pre>{}</pre>", json.dumps(doc, indent=2, ensure_ascii=False))
 
 
 @admin.register(NutsRegion)
@@ -485,6 +520,13 @@ class NutsRegionAdmin(ApiSyncedReadOnlyAdmin):
     ordering = ("level", "notation")
 
 
+@admin.register(ApiSyncState)
+class ApiSyncStateAdmin(ApiSyncedReadOnlyAdmin):
+    list_display = ("endpoint", "etag", "last_modified", "last_checked_at", "last_changed_at")
+    search_fields = ("endpoint",)
+    ordering = ("endpoint",)
+
+
 @admin.register(ScioModel)
 class ScioModelAdmin(ApiSyncedReadOnlyAdmin):
     list_display = ("name", "external_id", "duplicate_name_badge", "status", "cpu_cores_required", "ram_gb_required", "updated_at")
@@ -783,6 +825,7 @@ def _custom_get_app_list(request, app_label=None):
         "PathogenConcept",
         "PathogenQuerySpec",
         "PathogenConcentrationRecord",
+        "ApiSyncState",
     }
     scio_order = {
         "ScioModel": 1,
@@ -795,6 +838,7 @@ def _custom_get_app_list(request, app_label=None):
         "ConceptHistory": 6,
         "PlantConcept": 7,
         "PathogenConcept": 8,
+        "ApiSyncState": 9,
     }
 
     scio_models = []
@@ -837,6 +881,9 @@ def _sync_vocab_from_admin(request, vocab_id):
 
     try:
         res = sync_vocabulary(vocab_id=vocab_id, reset=False)
+        if res.get("not_modified"):
+            messages.info(request, f"{vocab_id} sync: not modified upstream, nothing to do.")
+            return redirect("admin:index")
         messages.success(
             request,
             f"{vocab_id} sync completed: created={res['created']}, updated={res['updated']}, unchanged={res['unchanged']}, "
@@ -895,6 +942,9 @@ def _sync_nuts_level_view(request, level):
 
     try:
         res = sync_nuts(level=level, reset=False)
+        if res.get("not_modified"):
+            messages.info(request, f"NUTS L{level} sync: not modified upstream, nothing to do.")
+            return redirect("admin:index")
         messages.success(
             request,
             f"NUTS L{level} sync completed: created={res['created']}, updated={res['updated']}, unchanged={res['unchanged']}, deleted={res.get('deleted', 0)}",
@@ -931,12 +981,11 @@ def _sync_nuts_all_view(request):
     if not lock_key:
         return redirect("admin:index")
 
-    totals = {"created": 0, "updated": 0, "unchanged": 0, "deleted": 0}
     try:
-        for level in (0, 1, 2, 3):
-            res = sync_nuts(level=level, reset=False)
-            for k in totals:
-                totals[k] += res[k]
+        totals = sync_nuts_levels((0, 1, 2, 3), reset=False)
+        if totals["not_modified"]:
+            messages.info(request, "NUTS all-level sync: not modified upstream, nothing to do.")
+            return redirect("admin:index")
         messages.success(
             request,
             f"NUTS all-level sync completed: created={totals['created']}, updated={totals['updated']}, unchanged={totals['unchanged']}, deleted={totals['deleted']}",
@@ -957,8 +1006,22 @@ def _sync_models_view(request):
     if not lock_key:
         return redirect("admin:index")
 
+    if _pathogen_sync_queue_available():
+        # Don't block the admin request for the whole catalog; the task releases the lock.
+        try:
+            sync_models_task.delay(lock_key=lock_key)
+        except Exception as exc:
+            _release_admin_sync_lock(lock_key)
+            messages.error(request, f"models sync queueing failed: {exc}")
+            return redirect("admin:index")
+        messages.success(request, "models sync queued in background.")
+        return redirect("admin:index")
+
     try:
         res = sync_models(reset=False)
+        if res.get("not_modified"):
+            messages.info(request, "models sync: not modified upstream, nothing to do.")
+            return redirect("admin:index")
         messages.success(
             request,
             f"models sync completed: created={res['created']}, updated={res['updated']}, unchanged={res['unchanged']}, "
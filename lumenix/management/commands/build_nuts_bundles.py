@@ -0,0 +1,106 @@
+import gzip
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.gis.geos import GEOSGeometry
+from django.core.management.base import BaseCommand, CommandError
+
+try:
+    import brotli
+except ImportError:  # optional: only needed for the .br siblings
+    brotli = None
+
+NUTS_DIR = Path(settings.BASE_DIR) / "static" / "data" / "nuts"
+DEFAULT_SOURCE = NUTS_DIR / "NUTS_RG_20M_2021_4326.geojson"
+DEFAULT_OUTPUT = NUTS_DIR / "build"
+
+# name -> (simplify tolerance in degrees, coordinate decimals kept)
+RESOLUTIONS = {
+    "high": (0.001, 4),
+    "medium": (0.01, 3),
+    "low": (0.05, 2),
+}
+
+KEPT_PROPERTIES = ("NUTS_ID", "LEVL_CODE", "CNTR_CODE", "NAME_LATN")
+
+
+def _quantize(coords, decimals):
+    if isinstance(coords[0], (int, float)):
+        return [round(coords[0], decimals), round(coords[1], decimals)]
+    return [_quantize(c, decimals) for c in coords]
+
+
+def _write_with_siblings(path: Path, payload: bytes) -> list[Path]:
+    written = [path]
+    path.write_bytes(payload)
+    gz_path = path.with_name(path.name + ".gz")
+    gz_path.write_bytes(gzip.compress(payload, compresslevel=9, mtime=0))
+    written.append(gz_path)
+    if brotli is not None:
+        br_path = path.with_name(path.name + ".br")
+        br_path.write_bytes(brotli.compress(payload, quality=11))
+        written.append(br_path)
+    return written
+
+
+class Command(BaseCommand):
+    help = (
+        "Build per-level (L0-L3), simplified and coordinate-quantized NUTS GeoJSON bundles "
+        "with pre-compressed .gz/.br siblings for nginx gzip_static/brotli_static."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", default=str(DEFAULT_SOURCE), help="GISCO NUTS GeoJSON (EPSG:4326).")
+        parser.add_argument("--output", default=str(DEFAULT_OUTPUT), help="Directory for the bundles.")
+
+    def handle(self, *args, **opts):
+        source = Path(opts["source"])
+        if not source.exists():
+            raise CommandError(f"GeoJSON file not found: {source}")
+        output = Path(opts["output"])
+        output.mkdir(parents=True, exist_ok=True)
+        if brotli is None:
+            self.stdout.write(self.style.WARNING("brotli is not installed; writing .gz siblings only."))
+
+        with source.open(encoding="utf-8") as fh:
+            features = json.load(fh).get("features") or []
+
+        by_level = {0: [], 1: [], 2: [], 3: []}
+        for feature in features:
+            level = (feature.get("properties") or {}).get("LEVL_CODE")
+            if level in by_level and feature.get("geometry"):
+                by_level[level].append(feature)
+
+        manifest = {"source": source.name, "levels": {}}
+        for level, level_features in by_level.items():
+            geoms = [GEOSGeometry(json.dumps(f["geometry"]), srid=4326) for f in level_features]
+            manifest["levels"][level] = {}
+            for name, (tolerance, decimals) in RESOLUTIONS.items():
+                out_features = []
+                for feature, geom in zip(level_features, geoms):
+                    simplified = json.loads(geom.simplify(tolerance, preserve_topology=True).geojson)
+                    simplified["coordinates"] = _quantize(simplified["coordinates"], decimals)
+                    out_features.append({
+                        "type": "Feature",
+                        "properties": {k: feature["properties"].get(k) for k in KEPT_PROPERTIES},
+                        "geometry": simplified,
+                    })
+                payload = json.dumps(
+                    {"type": "FeatureCollection", "features": out_features},
+                    separators=(",", ":"),
+                    ensure_ascii=False,
+                ).encode("utf-8")
+
+                path = output / f"nuts_L{level}_{name}.geojson"
+                written = _write_with_siblings(path, payload)
+                manifest["levels"][level][name] = {
+                    "file": path.name,
+                    "tolerance_deg": tolerance,
+                    "decimals": decimals,
+                    "bytes": {p.suffix.lstrip(".") if p != path else "raw": p.stat().st_size for p in written},
+                }
+                self.stdout.write(f"L{level} {name}: {len(out_features)} features, {len(payload):,} bytes")
+
+        (output / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        self.stdout.write(self.style.SUCCESS(f"NUTS bundles written to {output}"))
@@ -0,0 +1,42 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lumenix.services.climate_grid import CLIMATE_VARIABLES
+from lumenix.services.climatology import create_baseline
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute a versioned day-of-year climatology (per NUTS region from NutsClimateDaily, "
+        "per grid cell from the climate grid store) used for anomaly lookups."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start-year", type=int, default=1991)
+        parser.add_argument("--end-year", type=int, default=2020)
+        parser.add_argument("--name", default=None, help="Baseline name (default: <start>-<end>).")
+        parser.add_argument("--window", type=int, default=15, help="Centred day-of-year smoothing window in days.")
+        parser.add_argument("--variable", action="append", choices=CLIMATE_VARIABLES, dest="variables")
+        parser.add_argument("--no-cells", action="store_true", help="Skip the per-cell arrays.")
+        parser.add_argument("--keep-current", action="store_true", help="Do not make this version the current one.")
+
+    def handle(self, *args, **opts):
+        if opts["end_year"] < opts["start_year"]:
+            raise CommandError("--end-year must not be before --start-year.")
+        name = opts["name"] or f"{opts['start_year']}-{opts['end_year']}"
+
+        baseline = create_baseline(
+            name,
+            date(opts["start_year"], 1, 1),
+            date(opts["end_year"], 12, 31),
+            window_days=opts["window"],
+            variables=opts["variables"],
+            cells=not opts["no_cells"],
+            make_current=not opts["keep_current"],
+        )
+        regions = baseline.nuts_climatology.count()
+        self.stdout.write(self.style.SUCCESS(
+            f"Baseline {baseline}: {regions} NUTS climatology rows, per-cell arrays: {'yes' if baseline.has_cells else 'no'}"
+            f"{' (current)' if baseline.is_current else ''}"
+        ))
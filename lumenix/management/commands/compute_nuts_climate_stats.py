@@ -0,0 +1,41 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lumenix.services.climate_grid import CLIMATE_VARIABLES
+from lumenix.services.nuts_zonal_stats import build_cell_weights, compute_zonal_stats
+
+
+class Command(BaseCommand):
+    help = "Precompute per-NUTS daily mean/min/max of the climate variables (NutsClimateDaily)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", required=True, help="First date (YYYY-MM-DD).")
+        parser.add_argument("--end", required=True, help="Last date (YYYY-MM-DD).")
+        parser.add_argument("--variable", action="append", choices=CLIMATE_VARIABLES, dest="variables")
+        parser.add_argument(
+            "--rebuild-weights",
+            action="store_true",
+            help="Recompute the cell -> region weights first (after loading NUTS geometries or a new grid).",
+        )
+
+    def handle(self, *args, **opts):
+        try:
+            start = date.fromisoformat(opts["start"])
+            end = date.fromisoformat(opts["end"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if end < start:
+            raise CommandError("--end must not be before --start.")
+
+        try:
+            if opts["rebuild_weights"]:
+                weights = build_cell_weights()
+                self.stdout.write(f"Cell weights: {weights} rows")
+            result = compute_zonal_stats(start, end, variables=opts["variables"])
+        except LookupError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"NUTS climate stats: {result['rows']} rows for {result['dates']} dates over {result['regions']} regions"
+        ))
@@ -1,13 +1,69 @@
-from django.core.management.base import BaseCommand
-from utils.fetch_era5_data import download_era5_data
-from utils.process_nc_data import process_netCDF
+from django.core.management.base import BaseCommand, CommandError
+from utils.fetch_era5_data import Era5Downloader, month_partitions
+from utils.process_nc_data import (
+    DEFAULT_BACKEND,
+    INGEST_MODES,
+    STORAGE_BACKENDS,
+    TIME_BLOCK_SIZE,
+    process_netCDF,
+)
 
 class Command(BaseCommand):
     help = "Fetch and process ERA5 climate data"
 
-    def handle(self, *args, **kwargs):
-        self.stdout.write("Fetching latest climate data...")
-        download_era5_data()
-        self.stdout.write("Processing NetCDF data...")
-        process_netCDF()
+    def add_arguments(self, parser):
+        parser.add_argument("--skip-download", action="store_true", help="Only ingest an existing NetCDF file.")
+        parser.add_argument("--file", dest="nc_file", default=None, help="NetCDF file to ingest.")
+        parser.add_argument("--start-year", type=int, default=2015)
+        parser.add_argument("--end-year", type=int, default=2024)
+        parser.add_argument("--workers", type=int, default=None, help="Parallel CDS downloads.")
+        parser.add_argument(
+            "--time-block",
+            type=int,
+            default=TIME_BLOCK_SIZE,
+            help="Time steps read and copied per block; lower it to reduce memory use.",
+        )
+        parser.add_argument(
+            "--backend",
+            choices=STORAGE_BACKENDS,
+            default=DEFAULT_BACKEND,
+            help="Write climate_data rows, float32 grid frames, or both.",
+        )
+        parser.add_argument(
+            "--mode",
+            choices=INGEST_MODES,
+            default="skip",
+            help="skip: only ingest time steps not loaded yet; upsert: rewrite values for every time step.",
+        )
+
+    def handle(self, *args, **options):
+        def ingest(nc_file):
+            count = process_netCDF(
+                nc_file,
+                time_block=options["time_block"],
+                backend=options["backend"],
+                mode=options["mode"],
+            )
+            if count is None:
+                raise CommandError(f"Ingesting {nc_file} failed.")
+            return count
+
+        if options["skip_download"]:
+            self.stdout.write("Processing NetCDF data...")
+            ingest(options["nc_file"])
+            self.stdout.write(self.style.SUCCESS("Climate data updated successfully!"))
+            return
+
+        self.stdout.write("Fetching climate data month by month; each month is ingested as it lands...")
+        downloader_kwargs = {"workers": options["workers"]} if options["workers"] else {}
+        summary = Era5Downloader(**downloader_kwargs).run(
+            month_partitions(options["start_year"], options["end_year"]),
+            on_ready=lambda partition, path: ingest(path),
+        )
+        self.stdout.write(
+            f"Downloaded {len(summary['downloaded'])}, reused {len(summary['reused'])}, "
+            f"already ingested {len(summary['skipped'])}."
+        )
+        if summary["failed"]:
+            raise CommandError(f"Failed partitions: {', '.join(sorted(summary['failed']))}")
         self.stdout.write(self.style.SUCCESS("Climate data updated successfully!"))
@@ -0,0 +1,56 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.gis.geos import GEOSGeometry, MultiPolygon
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from lumenix.models import NutsRegion
+
+DEFAULT_FILE = Path(settings.BASE_DIR) / "static" / "data" / "nuts" / "NUTS_RG_20M_2021_4326.geojson"
+
+
+class Command(BaseCommand):
+    help = "Load NUTS boundaries from a GISCO GeoJSON file into NutsRegion.geom (matched on level + NUTS code)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", default=str(DEFAULT_FILE), help="GISCO NUTS GeoJSON in EPSG:4326.")
+        parser.add_argument("--level", choices=["0", "1", "2", "3", "all"], default="all")
+
+    def handle(self, *args, **opts):
+        path = Path(opts["file"])
+        if not path.exists():
+            raise CommandError(f"GeoJSON file not found: {path}")
+
+        levels = {0, 1, 2, 3} if opts["level"] == "all" else {int(opts["level"])}
+        with path.open(encoding="utf-8") as fh:
+            features = json.load(fh).get("features") or []
+
+        geom_by_key = {}
+        for feature in features:
+            props = feature.get("properties") or {}
+            level = props.get("LEVL_CODE")
+            code = (props.get("NUTS_ID") or "").strip()
+            if level not in levels or not code or not feature.get("geometry"):
+                continue
+            geom = GEOSGeometry(json.dumps(feature["geometry"]), srid=4326)
+            if geom.geom_type == "Polygon":
+                geom = MultiPolygon(geom, srid=4326)
+            geom_by_key[(level, code)] = geom
+
+        regions = list(NutsRegion.objects.filter(level__in=levels).only("id", "level", "notation"))
+        to_update = []
+        for region in regions:
+            geom = geom_by_key.pop((region.level, region.notation), None)
+            if geom is not None:
+                region.geom = geom
+                to_update.append(region)
+
+        with transaction.atomic():
+            NutsRegion.objects.bulk_update(to_update, ["geom"], batch_size=200)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"NUTS geometries: updated={len(to_update)}, regions_without_geometry={len(regions) - len(to_update)}, "
+            f"unmatched_features={len(geom_by_key)}"
+        ))
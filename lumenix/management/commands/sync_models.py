@@ -12,7 +12,12 @@ class Command(BaseCommand):
             action="store_true",
             help="Delete existing model rows before syncing.",
         )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Reprocess the payload even if it is unchanged upstream.",
+        )
 
     def handle(self, *args, **opts):
-        result = sync_models(reset=opts["reset"])
+        result = sync_models(reset=opts["reset"], force=opts["force"])
         self.stdout.write(self.style.SUCCESS(f"Models sync: {result}"))
@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
 
-from lumenix.services.nuts_sync import sync_nuts
+from lumenix.services.nuts_sync import sync_nuts_levels
 
 
 class Command(BaseCommand):
@@ -13,14 +13,17 @@ class Command(BaseCommand):
             action="store_true",
             help="Delete existing rows for selected level(s) before syncing.",
         )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Reprocess payloads even if they are unchanged upstream.",
+        )
 
     def handle(self, *args, **opts):
         levels = [0, 1, 2, 3] if opts["level"] == "all" else [int(opts["level"])]
 
-        totals = {"created": 0, "updated": 0, "unchanged": 0, "fetched": 0}
-        for level in levels:
-            res = sync_nuts(level=level, reset=opts["reset"])
-            self.stdout.write(self.style.SUCCESS(f"NUTS L{level}: {res}"))
-            for k in totals:
-                totals[k] += res[k]
+        res = sync_nuts_levels(levels, reset=opts["reset"], force=opts["force"])
+        for level, level_res in res["levels"].items():
+            self.stdout.write(self.style.SUCCESS(f"NUTS L{level}: {level_res}"))
+        totals = {k: res[k] for k in ("created", "updated", "unchanged", "fetched")}
         self.stdout.write(self.style.SUCCESS(f"NUTS total: {totals}"))
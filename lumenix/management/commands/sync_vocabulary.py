@@ -11,12 +11,14 @@ class Command(BaseCommand):
         parser.add_argument("--vocab", choices=["plants", "pathogens", "all"], default="all")
         parser.add_argument("--reset", action="store_true",
                             help="Delete existing concepts/schemes for this vocab before syncing.")
+        parser.add_argument("--force", action="store_true",
+                            help="Reprocess the payload even if it is unchanged upstream.")
 
     def handle(self, *args, **opts):
         targets = ["plants", "pathogens"] if opts["vocab"] == "all" else [opts["vocab"]]
         totals = {"created": 0, "updated": 0, "unchanged": 0}
         for v in targets:
-            res = sync_vocabulary(v, reset=opts["reset"])
+            res = sync_vocabulary(v, reset=opts["reset"], force=opts["force"])
             self.stdout.write(self.style.SUCCESS(f"{v}: {res}"))
             for k in totals:
                 totals[k] += res[k]
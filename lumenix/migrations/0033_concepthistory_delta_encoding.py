@@ -0,0 +1,50 @@
+from django.db import migrations, models
+
+
+# Existing rows all hold full snapshots; number them 1..n per concept in change order
+# so the new (concept, version) constraint holds. `compact_concept_history_task`
+# later re-encodes the in-between versions as deltas.
+NUMBER_VERSIONS_SQL = """
+UPDATE vocabulary_concept_history AS h
+SET version = v.rn
+FROM (
+    SELECT id, ROW_NUMBER() OVER (PARTITION BY concept_id ORDER BY changed_at, id) AS rn
+    FROM vocabulary_concept_history
+) AS v
+WHERE h.id = v.id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lumenix", "0032_seed_view_chart_emphasis"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="concepthistory",
+            name="version",
+            field=models.PositiveIntegerField(default=1, help_text="1-based version number per concept"),
+        ),
+        migrations.AddField(
+            model_name="concepthistory",
+            name="is_full",
+            field=models.BooleanField(default=True, help_text="True when this row holds a full snapshot"),
+        ),
+        migrations.AddField(
+            model_name="concepthistory",
+            name="delta",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="concepthistory",
+            name="snapshot",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.RunSQL(NUMBER_VERSIONS_SQL, migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name="concepthistory",
+            constraint=models.UniqueConstraint(fields=("concept", "version"), name="uq_concept_history_version"),
+        ),
+    ]
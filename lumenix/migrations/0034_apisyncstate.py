@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lumenix", "0033_concepthistory_delta_encoding"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ApiSyncState",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("endpoint", models.CharField(help_text="Full endpoint URL", max_length=512, unique=True)),
+                ("etag", models.CharField(blank=True, default="", max_length=255)),
+                ("last_modified", models.CharField(blank=True, default="", help_text="Raw Last-Modified header", max_length=64)),
+                ("body_hash", models.CharField(blank=True, default="", help_text="SHA256 of the raw response body", max_length=64)),
+                ("last_checked_at", models.DateTimeField(blank=True, null=True)),
+                ("last_changed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "db_table": "api_sync_state",
+                "verbose_name": "API Sync State",
+                "verbose_name_plural": "API Sync State",
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lumenix", "0034_apisyncstate"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ConceptClosure",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("depth", models.PositiveSmallIntegerField(help_text="0 = self, 1 = direct child, ...")),
+                ("ancestor", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="descendant_links", to="lumenix.concept")),
+                ("descendant", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="ancestor_links", to="lumenix.concept")),
+            ],
+            options={
+                "db_table": "vocabulary_concept_closure",
+                "verbose_name": "Concept Closure",
+                "verbose_name_plural": "Concept Closure",
+                "indexes": [
+                    models.Index(fields=["ancestor", "depth"], name="vocabulary__ancesto_990cf1_idx"),
+                    models.Index(fields=["descendant", "depth"], name="vocabulary__descend_e6aa3e_idx"),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(fields=("ancestor", "descendant"), name="uq_concept_closure_pair"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lumenix", "0035_conceptclosure"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sciomodel",
+            name="content_hash",
+            field=models.CharField(blank=True, default="", help_text="SHA256 over the synced fields", max_length=64),
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+def backfill_cuda_version_code(apps, schema_editor):
+    ScioModel = apps.get_model("lumenix", "ScioModel")
+    rows = []
+    for obj in ScioModel.objects.exclude(min_cuda_version_required__isnull=True).only("id", "min_cuda_version_required"):
+        parts = str(obj.min_cuda_version_required or "").strip().lstrip("vV").split(".")
+        try:
+            major = int(parts[0])
+            minor = int(parts[1]) if len(parts) > 1 and parts[1] else 0
+        except ValueError:
+            continue
+        obj.min_cuda_version_code = major * 1000 + min(minor, 999)
+        rows.append(obj)
+    ScioModel.objects.bulk_update(rows, ["min_cuda_version_code"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lumenix", "0036_sciomodel_content_hash"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="sciomodel",
+            name="min_cuda_version_code",
+            field=models.PositiveIntegerField(blank=True, help_text="min_cuda_version_required as major*1000+minor, for range filters", null=True),
+        ),
+        migrations.RunPython(backfill_cuda_version_code, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="sciomodel",
+            index=models.Index(fields=["status", "gpu_count_required", "cpu_cores_required", "ram_gb_required"], name="scio_models_status_04ae99_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="sciomodel",
+            index=models.Index(fields=["status", "gpu_memory_gb_required", "min_cuda_version_code"], name="scio_models_status_f1f798_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="sciomodel",
+            index=GinIndex(fields=["name"], name="scio_models_name_trgm", opclasses=["gin_trgm_ops"]),
+        ),
+    ]
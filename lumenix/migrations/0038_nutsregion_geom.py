@@ -0,0 +1,17 @@
+import django.contrib.gis.db.models.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lumenix", "0037_sciomodel_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="nutsregion",
+            name="geom",
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, help_text="Region boundary (GISCO NUTS, EPSG:4326); loaded by the load_nuts_geometries command", null=True, srid=4326),
+        ),
+    ]
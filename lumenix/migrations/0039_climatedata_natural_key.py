@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+# Earlier ingests could load the same file twice; keep the oldest row of each
+# (timestamp, location) pair before the natural key is enforced.
+DEDUPE_SQL = """
+DELETE FROM climate_data AS c
+USING (
+    SELECT id, ROW_NUMBER() OVER (PARTITION BY timestamp, location ORDER BY id) AS rn
+    FROM climate_data
+    WHERE location IS NOT NULL
+) AS ranked
+WHERE c.id = ranked.id AND ranked.rn > 1;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lumenix", "0038_nutsregion_geom"),
+    ]
+
+    operations = [
+        migrations.RunSQL(DEDUPE_SQL, reverse_sql=migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name="climatedata",
+            constraint=models.UniqueConstraint(
+                fields=("timestamp", "location"), name="uq_climate_data_timestamp_location"
+            ),
+        ),
+    ]
@@ -0,0 +1,48 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lumenix", "0039_climatedata_natural_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NutsCellWeight",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("lon", models.FloatField(help_text="Grid cell centre longitude")),
+                ("lat", models.FloatField(help_text="Grid cell centre latitude")),
+                ("weight", models.FloatField()),
+                ("region", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="cell_weights", to="lumenix.nutsregion")),
+            ],
+            options={
+                "db_table": "nuts_cell_weights",
+                "verbose_name": "NUTS Cell Weight",
+                "verbose_name_plural": "NUTS Cell Weights",
+            },
+        ),
+        migrations.CreateModel(
+            name="NutsClimateDaily",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField()),
+                ("variable", models.CharField(max_length=32)),
+                ("mean", models.FloatField(blank=True, null=True)),
+                ("min", models.FloatField(blank=True, null=True)),
+                ("max", models.FloatField(blank=True, null=True)),
+                ("cells", models.PositiveIntegerField(default=0, help_text="Grid cells with a value that day")),
+                ("region", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="climate_daily", to="lumenix.nutsregion")),
+            ],
+            options={
+                "db_table": "nuts_climate_daily",
+                "verbose_name": "NUTS Daily Climate",
+                "verbose_name_plural": "NUTS Daily Climate",
+                "constraints": [
+                    models.UniqueConstraint(fields=("region", "date", "variable"), name="uq_nuts_climate_daily"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lumenix", "0040_nuts_zonal_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ClimateBaseline",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(help_text="e.g. 1991-2020", max_length=64)),
+                ("version", models.PositiveIntegerField(default=1)),
+                ("start_date", models.DateField()),
+                ("end_date", models.DateField()),
+                ("window_days", models.PositiveSmallIntegerField(default=15, help_text="Centred day-of-year smoothing window")),
+                ("variables", models.JSONField(blank=True, default=list)),
+                ("has_cells", models.BooleanField(default=False, help_text="Per-cell arrays were written to the grid store")),
+                ("is_current", models.BooleanField(db_index=True, default=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "db_table": "climate_baselines",
+                "verbose_name": "Climate Baseline",
+                "verbose_name_plural": "Climate Baselines",
+                "constraints": [
+                    models.UniqueConstraint(fields=("name", "version"), name="uq_climate_baseline_version"),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="NutsClimatology",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("variable", models.CharField(max_length=32)),
+                ("mean", django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(null=True), size=366)),
+                ("std", django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(null=True), size=366)),
+                ("samples", models.PositiveIntegerField(default=0, help_text="Daily values in the baseline period")),
+                ("baseline", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="nuts_climatology", to="lumenix.climatebaseline")),
+                ("region", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="climatology", to="lumenix.nutsregion")),
+            ],
+            options={
+                "db_table": "nuts_climatology",
+                "verbose_name": "NUTS Climatology",
+                "verbose_name_plural": "NUTS Climatology",
+                "constraints": [
+                    models.UniqueConstraint(fields=("baseline", "region", "variable"), name="uq_nuts_climatology"),
+                ],
+            },
+        ),
+    ]
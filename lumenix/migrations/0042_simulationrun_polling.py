@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lumenix", "0041_climate_baselines"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="simulationrun",
+            name="poll_attempts",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="simulationrun",
+            name="next_poll_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="simulationrun",
+            name="last_poll_error",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name="simulationrun",
+            index=models.Index(fields=["status", "next_poll_at"], name="idx_simrun_status_next_poll"),
+        ),
+    ]
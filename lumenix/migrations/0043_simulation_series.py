@@ -0,0 +1,46 @@
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lumenix", "0042_simulationrun_polling"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SimulationSeries",
+            fields=[
+                ("job", models.OneToOneField(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    primary_key=True,
+                    related_name="series",
+                    serialize=False,
+                    to="lumenix.simulationrun",
+                )),
+                ("x", django.contrib.postgres.fields.ArrayField(
+                    base_field=models.FloatField(null=True), default=list, size=None,
+                )),
+                ("y", django.contrib.postgres.fields.ArrayField(
+                    base_field=models.FloatField(null=True), default=list, size=None,
+                )),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "simulation_series",
+            },
+        ),
+        # Fold the existing per-point rows into one array row per run.
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO simulation_series (job_id, x, y, updated_at)
+                SELECT job_id, array_agg(x ORDER BY idx), array_agg(y ORDER BY idx), NOW()
+                FROM simulation_results
+                GROUP BY job_id
+                ON CONFLICT (job_id) DO NOTHING;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -3,9 +3,13 @@
 import hashlib
 import json
 
+import numpy as np
+
 from django.conf import settings
 from django.contrib.gis.db import models as gis_models
 from django.contrib.gis.db.models import Index as GISIndex
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator, MinValueValidator, MaxValueValidator
 from django.db import models
@@ -162,22 +166,56 @@ class PathogenConcept(Concept):
 
 class ConceptHistory(models.Model):
     """
-    Append-only snapshot of a Concept whenever it changes.
-    Stores the full JSON payload (+ hash) so we can diff later.
+    Append-only version log of a Concept whenever it changes.
+    Every Nth version stores the full JSON payload in ``snapshot``; the versions in
+    between store a JSON-patch ``delta`` against the previous version.
+    See lumenix.services.concept_history for reconstruction and compaction.
     """
     concept = models.ForeignKey(Concept, on_delete=models.CASCADE, related_name="history")
     change_type = models.CharField(max_length=16, choices=(("created","created"),("updated","updated")))
     changed_at = models.DateTimeField(default=timezone.now, db_index=True)
     content_hash = models.CharField(max_length=64)
-    snapshot = models.JSONField()  # full concept dict as we persisted it
+    version = models.PositiveIntegerField(default=1, help_text="1-based version number per concept")
+    is_full = models.BooleanField(default=True, help_text="True when this row holds a full snapshot")
+    snapshot = models.JSONField(null=True, blank=True)  # full concept dict, only on full rows
+    delta = models.JSONField(null=True, blank=True)     # RFC 6902 patch from the previous version
 
     class Meta:
         db_table = "vocabulary_concept_history"
         indexes = [models.Index(fields=["concept", "changed_at"])]
+        constraints = [
+            models.UniqueConstraint(fields=["concept", "version"], name="uq_concept_history_version"),
+        ]
         verbose_name = "Concept History"
         verbose_name_plural = "Concept History"
 
 
+class ConceptClosure(models.Model):
+    """
+    Transitive closure of the broader/narrower hierarchy: one row per
+    (ancestor, descendant) pair, including a depth-0 row per concept.
+    Rebuilt by sync_vocabulary; see lumenix.services.concept_hierarchy.
+    """
+    ancestor = models.ForeignKey(Concept, on_delete=models.CASCADE, related_name="descendant_links")
+    descendant = models.ForeignKey(Concept, on_delete=models.CASCADE, related_name="ancestor_links")
+    depth = models.PositiveSmallIntegerField(help_text="0 = self, 1 = direct child, ...")
+
+    class Meta:
+        db_table = "vocabulary_concept_closure"
+        indexes = [
+            models.Index(fields=["ancestor", "depth"]),
+            models.Index(fields=["descendant", "depth"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["ancestor", "descendant"], name="uq_concept_closure_pair"),
+        ]
+        verbose_name = "Concept Closure"
+        verbose_name_plural = "Concept Closure"
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} (depth {self.depth})"
+
+
 class NutsRegion(models.Model):
     """
     NUTS region entry fetched from /api/nuts/{level}.
@@ -191,6 +229,10 @@ class NutsRegion(models.Model):
     )
     pref_label = models.CharField(max_length=255, db_index=True, help_text="Primary label from API")
     alt_labels_en = models.JSONField(default=list, blank=True, help_text="English alternative labels")
+    geom = gis_models.MultiPolygonField(
+        srid=4326, null=True, blank=True,
+        help_text="Region boundary (GISCO NUTS, EPSG:4326); loaded by the load_nuts_geometries command",
+    )
     status = models.SmallIntegerField(default=1, choices=((1, "Active"), (0, "Inactive"), (2, "Deleted")), db_index=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -210,6 +252,107 @@ class NutsRegion(models.Model):
         return f"L{self.level} {self.notation} - {self.pref_label}"
 
 
+class NutsCellWeight(models.Model):
+    """
+    Share of a NUTS region's area covered by one climate grid cell (weights of a
+    region sum to 1). Built once per grid by lumenix.services.nuts_zonal_stats.
+    """
+    region = models.ForeignKey(NutsRegion, on_delete=models.CASCADE, related_name="cell_weights")
+    lon = models.FloatField(help_text="Grid cell centre longitude")
+    lat = models.FloatField(help_text="Grid cell centre latitude")
+    weight = models.FloatField()
+
+    class Meta:
+        db_table = "nuts_cell_weights"
+        verbose_name = "NUTS Cell Weight"
+        verbose_name_plural = "NUTS Cell Weights"
+
+    def __str__(self):
+        return f"{self.region_id} @ ({self.lon}, {self.lat}): {self.weight:.4f}"
+
+
+class NutsClimateDaily(models.Model):
+    """
+    Area-weighted daily mean and cell min/max of one climate variable over a NUTS
+    region, precomputed from the climate grid (see lumenix.services.nuts_zonal_stats).
+    """
+    region = models.ForeignKey(NutsRegion, on_delete=models.CASCADE, related_name="climate_daily")
+    date = models.DateField()
+    variable = models.CharField(max_length=32)
+    mean = models.FloatField(null=True, blank=True)
+    min = models.FloatField(null=True, blank=True)
+    max = models.FloatField(null=True, blank=True)
+    cells = models.PositiveIntegerField(default=0, help_text="Grid cells with a value that day")
+
+    class Meta:
+        db_table = "nuts_climate_daily"
+        constraints = [
+            models.UniqueConstraint(fields=["region", "date", "variable"], name="uq_nuts_climate_daily"),
+        ]
+        verbose_name = "NUTS Daily Climate"
+        verbose_name_plural = "NUTS Daily Climate"
+
+    def __str__(self):
+        return f"{self.region_id} {self.date} {self.variable}"
+
+
+class ClimateBaseline(models.Model):
+    """
+    One computed day-of-year climatology over a baseline period. Recomputing a
+    baseline under the same name adds a new version; ``is_current`` marks the one
+    anomaly lookups use by default. Per-cell arrays live in the climate grid store
+    under ``climatology/<name>-v<version>/``.
+    """
+    name = models.CharField(max_length=64, help_text="e.g. 1991-2020")
+    version = models.PositiveIntegerField(default=1)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    window_days = models.PositiveSmallIntegerField(default=15, help_text="Centred day-of-year smoothing window")
+    variables = models.JSONField(default=list, blank=True)
+    has_cells = models.BooleanField(default=False, help_text="Per-cell arrays were written to the grid store")
+    is_current = models.BooleanField(default=False, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "climate_baselines"
+        constraints = [
+            models.UniqueConstraint(fields=["name", "version"], name="uq_climate_baseline_version"),
+        ]
+        verbose_name = "Climate Baseline"
+        verbose_name_plural = "Climate Baselines"
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+    @property
+    def slug(self) -> str:
+        return f"{self.name}-v{self.version}"
+
+
+class NutsClimatology(models.Model):
+    """
+    Day-of-year mean and standard deviation of one variable over a NUTS region for a
+    baseline, as 366-slot arrays (slot 59 is 29 February).
+    """
+    baseline = models.ForeignKey(ClimateBaseline, on_delete=models.CASCADE, related_name="nuts_climatology")
+    region = models.ForeignKey(NutsRegion, on_delete=models.CASCADE, related_name="climatology")
+    variable = models.CharField(max_length=32)
+    mean = ArrayField(models.FloatField(null=True), size=366)
+    std = ArrayField(models.FloatField(null=True), size=366)
+    samples = models.PositiveIntegerField(default=0, help_text="Daily values in the baseline period")
+
+    class Meta:
+        db_table = "nuts_climatology"
+        constraints = [
+            models.UniqueConstraint(fields=["baseline", "region", "variable"], name="uq_nuts_climatology"),
+        ]
+        verbose_name = "NUTS Climatology"
+        verbose_name_plural = "NUTS Climatology"
+
+    def __str__(self):
+        return f"{self.baseline_id} {self.region_id} {self.variable}"
+
+
 class ScioModel(models.Model):
     """
     Model registry entry fetched from /api/models.
@@ -223,8 +366,12 @@ class ScioModel(models.Model):
     gpu_count_required = models.PositiveIntegerField(default=0)
     gpu_memory_gb_required = models.FloatField(default=0.0)
     min_cuda_version_required = models.CharField(max_length=64, null=True, blank=True)
+    min_cuda_version_code = models.PositiveIntegerField(
+        null=True, blank=True, help_text="min_cuda_version_required as major*1000+minor, for range filters"
+    )
     source_timestamp = models.BigIntegerField(null=True, blank=True, help_text="models[n]._id.timestamp")
     source_date_ms = models.BigIntegerField(null=True, blank=True, help_text="models[n]._id.date")
+    content_hash = models.CharField(max_length=64, blank=True, default="", help_text="SHA256 over the synced fields")
     status = models.SmallIntegerField(default=1, choices=((1, "Active"), (0, "Inactive"), (2, "Deleted")), db_index=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -235,6 +382,10 @@ class ScioModel(models.Model):
         indexes = [
             models.Index(fields=["name"]),
             models.Index(fields=["updated_at"]),
+            # Resource-fit search (lumenix.services.model_search)
+            models.Index(fields=["status", "gpu_count_required", "cpu_cores_required", "ram_gb_required"]),
+            models.Index(fields=["status", "gpu_memory_gb_required", "min_cuda_version_code"]),
+            GinIndex(fields=["name"], name="scio_models_name_trgm", opclasses=["gin_trgm_ops"]),
         ]
         verbose_name = "Model"
         verbose_name_plural = "Models"
@@ -243,6 +394,27 @@ class ScioModel(models.Model):
         return f"{self.name} ({self.external_id})"
 
 
+class ApiSyncState(models.Model):
+    """
+    Last response validators seen per source API endpoint (vocabulary, NUTS, models),
+    so syncs can skip unchanged payloads. See lumenix.services.conditional_fetch.
+    """
+    endpoint = models.CharField(max_length=512, unique=True, help_text="Full endpoint URL")
+    etag = models.CharField(max_length=255, blank=True, default="")
+    last_modified = models.CharField(max_length=64, blank=True, default="", help_text="Raw Last-Modified header")
+    body_hash = models.CharField(max_length=64, blank=True, default="", help_text="SHA256 of the raw response body")
+    last_checked_at = models.DateTimeField(null=True, blank=True)
+    last_changed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "api_sync_state"
+        verbose_name = "API Sync State"
+        verbose_name_plural = "API Sync State"
+
+    def __str__(self):
+        return self.endpoint
+
+
 class ClimateData(BaseModel):
     timestamp = models.DateTimeField(verbose_name="Timestamp")
     location = gis_models.PointField(geography=True, null=True, blank=True)
@@ -273,6 +445,9 @@ class ClimateData(BaseModel):
             GISIndex(fields=["location"]),
             # models.Index(fields=["latitude", "longitude"]),
         ]
+        constraints = [
+            models.UniqueConstraint(fields=["timestamp", "location"], name="uq_climate_data_timestamp_location"),
+        ]
 
     def clean(self):
         """Ensure temperature values are within a reasonable range."""
@@ -342,19 +517,33 @@ class SimulationKey(BaseModel):
             if self.time_period_start > self.time_period_end:
                 raise ValidationError({"time_period_start": "Start date must be before end date."})
 
-    def save(self, *args, **kwargs):
-        # Compute stable request_hash before save
+    @staticmethod
+    def compute_request_hash(simulation_type, crop, nuts_id, climate_model, time_scale,
+                             time_period_start, time_period_end) -> str:
+        """Stable hash of the request fields; lets callers look a key up before it exists."""
         key_fields = {
-            "simulation_type": self.simulation_type,
-            "crop": self.crop,
-            "nuts_id": self.nuts_id,
-            "climate_model": self.climate_model,
-            "time_scale": self.time_scale,
-            "time_period_start": self.time_period_start.isoformat() if self.time_period_start else "",
-            "time_period_end": self.time_period_end.isoformat() if self.time_period_end else "",
+            "simulation_type": simulation_type,
+            "crop": crop,
+            "nuts_id": nuts_id,
+            "climate_model": climate_model,
+            "time_scale": time_scale,
+            "time_period_start": time_period_start.isoformat() if time_period_start else "",
+            "time_period_end": time_period_end.isoformat() if time_period_end else "",
         }
         s = json.dumps(key_fields, sort_keys=True, separators=(",", ":"))
-        self.request_hash = hashlib.sha256(s.encode()).hexdigest()
+        return hashlib.sha256(s.encode()).hexdigest()
+
+    def save(self, *args, **kwargs):
+        # Compute stable request_hash before save
+        self.request_hash = self.compute_request_hash(
+            self.simulation_type,
+            self.crop,
+            self.nuts_id,
+            self.climate_model,
+            self.time_scale,
+            self.time_period_start,
+            self.time_period_end,
+        )
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -377,11 +566,17 @@ class SimulationRun(BaseModel):
     submission_timestamp = models.BigIntegerField(null=True, blank=True)
     completion_timestamp = models.CharField(max_length=64, null=True, blank=True)
 
+    # Background polling state: consecutive polls without progress drive the backoff.
+    poll_attempts = models.PositiveIntegerField(default=0)
+    next_poll_at = models.DateTimeField(null=True, blank=True)
+    last_poll_error = models.CharField(max_length=255, blank=True, default="")
+
     class Meta:
         db_table = "simulation_runs"
         indexes = [
             models.Index(fields=["status"]),
             models.Index(fields=["sim_key", "updated_at"]),
+            models.Index(fields=["status", "next_poll_at"], name="idx_simrun_status_next_poll"),
         ]
 
     def __str__(self):
@@ -410,6 +605,42 @@ class SimulationResult(models.Model):
         return f"{self.job.job_id}#{self.idx}: ({self.x}, {self.y})"
 
 
+class SimulationSeries(models.Model):
+    """
+    Result series of a run stored as two parallel float8[] columns: one row per run
+    instead of one per point. Replaces SimulationResult for new results.
+    """
+    job = models.OneToOneField(SimulationRun, on_delete=models.CASCADE, primary_key=True, related_name="series")
+    x = ArrayField(models.FloatField(null=True), default=list)
+    y = ArrayField(models.FloatField(null=True), default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "simulation_series"
+
+    @property
+    def points(self) -> int:
+        """Number of points in the series."""
+        return len(self.x)
+
+    def as_arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        """``x`` and ``y`` as float64 arrays; missing points become NaN."""
+        return np.asarray(self.x, dtype="f8"), np.asarray(self.y, dtype="f8")
+
+    @classmethod
+    def from_rows(cls, job, rows) -> "SimulationSeries":
+        """Build an unsaved series from API rows ``[[x, y], ...]``."""
+        rows = list(rows or [])
+        return cls(
+            job=job,
+            x=[row[0] if len(row) > 0 else None for row in rows],
+            y=[row[1] if len(row) > 1 else None for row in rows],
+        )
+
+    def __str__(self):
+        return f"{self.job_id} ({self.points} points)"
+
+
 # class RoleMaster(models.Model):
 #     """
 #     User role (Farmer, Policy advisor, Distributor, ...)
@@ -0,0 +1,235 @@
+# lumenix/services/climate_frames.py
+
+import hashlib
+import struct
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+
+from django.core.cache import cache
+from django.db import connection
+
+from lumenix.services.climate_grid import CLIMATE_VARIABLES
+from lumenix.services.climate_store import ClimateGridStore
+
+# Binary layout (all little-endian):
+#   header  64 bytes  see HEADER_FORMAT; origin is the centre of the north-west cell,
+#                     res_lat is negative because rows run north -> south
+#   times   int64[count]                    epoch seconds of each frame
+#   frames  float32[count][height][width]   NaN = nodata
+MAGIC = b"LXGF"
+FORMAT_VERSION = 1
+HEADER_FORMAT = "<4sHHIIII4dff"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+FRAME_DTYPE = np.dtype("<f4")
+
+MAX_FRAMES = 400
+FRAME_CACHE_SECONDS = 24 * 60 * 60
+
+# Frames of the bbox for the first MAX_FRAMES time steps that have cells in it, in one pass.
+ROW_FRAMES_SQL = """
+WITH stamps AS (
+    SELECT DISTINCT timestamp
+    FROM climate_data
+    WHERE status = 1
+      AND timestamp >= %(start)s
+      AND timestamp <= %(end)s
+      AND location && ST_MakeEnvelope(%(min_lon)s, %(min_lat)s, %(max_lon)s, %(max_lat)s, 4326)::geography
+    ORDER BY timestamp
+    LIMIT %(limit)s
+)
+SELECT EXTRACT(EPOCH FROM c.timestamp)::bigint, ST_X(c.location::geometry), ST_Y(c.location::geometry), c.{variable}
+FROM climate_data AS c
+JOIN stamps ON c.timestamp = stamps.timestamp
+WHERE c.status = 1
+  AND c.location && ST_MakeEnvelope(%(min_lon)s, %(min_lat)s, %(max_lon)s, %(max_lat)s, 4326)::geography
+ORDER BY c.timestamp;
+"""
+
+
+@dataclass
+class FramePayload:
+    """
+    An encoded frame sequence that is read lazily: ``prefix`` (header + time table)
+    is held in memory, frames come from ``read_frames(first, last)`` (inclusive), so a
+    range request only touches the frames it overlaps.
+    """
+    prefix: bytes
+    count: int
+    frame_bytes: int
+    etag: str
+    read_frames: Callable[[int, int], bytes]
+
+    @property
+    def size(self) -> int:
+        return len(self.prefix) + self.count * self.frame_bytes
+
+    def read(self, first: int = 0, last: int | None = None) -> bytes:
+        """Bytes ``first..last`` (inclusive) of the encoded payload."""
+        last = self.size - 1 if last is None else min(last, self.size - 1)
+        parts = [self.prefix[first:last + 1]]
+        frames_first, frames_last = max(first - len(self.prefix), 0), last - len(self.prefix)
+        if frames_last >= 0 and self.frame_bytes:
+            k_first, k_last = frames_first // self.frame_bytes, frames_last // self.frame_bytes
+            offset = k_first * self.frame_bytes
+            parts.append(self.read_frames(k_first, k_last)[frames_first - offset:frames_last - offset + 1])
+        return b"".join(parts)
+
+
+def _north_up(lat: np.ndarray, lon: np.ndarray, values: np.ndarray):
+    """Reorder ``(time, lat, lon)`` frames so rows run north -> south and columns west -> east."""
+    lat_order = np.argsort(-lat)
+    lon_order = np.argsort(lon)
+    return lat[lat_order], lon[lon_order], values[:, lat_order][:, :, lon_order]
+
+
+def _resolution(axis: np.ndarray) -> float:
+    return float(np.median(np.diff(axis))) if axis.size > 1 else 0.0
+
+
+def encode_prefix(times: np.ndarray, lat: np.ndarray, lon: np.ndarray) -> bytes:
+    """Header + time table for frames on the north-up ``lat`` / ``lon`` axes."""
+    header = struct.pack(
+        HEADER_FORMAT,
+        MAGIC,
+        FORMAT_VERSION,
+        HEADER_SIZE,
+        lon.size,
+        lat.size,
+        len(times),
+        0,
+        float(lon[0]) if lon.size else 0.0,
+        float(lat[0]) if lat.size else 0.0,
+        _resolution(lon),
+        _resolution(lat),
+        float("nan"),
+        0.0,
+    )
+    return header + np.asarray(times, dtype="<i8").tobytes()
+
+
+def encode_frames(times: np.ndarray, lat: np.ndarray, lon: np.ndarray, values: np.ndarray) -> bytes:
+    """The whole payload (see the layout comment above) in one buffer."""
+    return encode_prefix(times, lat, lon) + np.ascontiguousarray(values, dtype=FRAME_DTYPE).tobytes()
+
+
+def _etag(*parts) -> str:
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def _store_payload(store: ClimateGridStore, variable: str, bbox, start, end) -> FramePayload | None:
+    """Frames sliced from the store's memmaps on demand; only the axes and times are read up front."""
+    grid = store.grid()
+    if grid is None:
+        return None
+    times = store.timestamps(variable, start, end)[:MAX_FRAMES]
+    if not times.size:
+        return None
+    lat, lon = grid
+    min_lon, min_lat, max_lon, max_lat = bbox
+    lat = np.sort(lat[(lat >= min_lat) & (lat <= max_lat)])[::-1]
+    lon = np.sort(lon[(lon >= min_lon) & (lon <= max_lon)])
+    epochs = times.astype("int64")
+    prefix = encode_prefix(epochs, lat, lon)
+
+    def read_frames(first: int, last: int) -> bytes:
+        selection = store.read_bbox(variable, bbox, times[first], times[last])
+        _, _, values = _north_up(selection.lat, selection.lon, selection.values)
+        return np.ascontiguousarray(values, dtype=FRAME_DTYPE).tobytes()
+
+    return FramePayload(
+        prefix=prefix,
+        count=int(epochs.size),
+        frame_bytes=lat.size * lon.size * FRAME_DTYPE.itemsize,
+        etag=_etag(prefix, store.data_version(variable)),
+        read_frames=read_frames,
+    )
+
+
+def _frames_from_rows(variable: str, bbox, start, end):
+    min_lon, min_lat, max_lon, max_lat = bbox
+    with connection.cursor() as cursor:
+        cursor.execute(
+            ROW_FRAMES_SQL.format(variable=variable),
+            {
+                "start": start, "end": end, "limit": MAX_FRAMES,
+                "min_lon": min_lon, "min_lat": min_lat, "max_lon": max_lon, "max_lat": max_lat,
+            },
+        )
+        rows = cursor.fetchall()
+    if not rows:
+        return None
+    cells = np.asarray(rows, dtype="f8")
+    times, frame_index = np.unique(cells[:, 0].astype("int64"), return_inverse=True)
+    lon, cols = np.unique(cells[:, 1], return_inverse=True)
+    lat_ascending, lat_rows = np.unique(cells[:, 2], return_inverse=True)
+    values = np.full((times.size, lat_ascending.size, lon.size), np.nan, dtype=FRAME_DTYPE)
+    values[frame_index, lat_ascending.size - 1 - lat_rows, cols] = cells[:, 3]
+    return times, lat_ascending[::-1], lon, values
+
+
+def _rows_payload(variable: str, bbox, start, end, cache_key: str) -> FramePayload | None:
+    """
+    Frames built from climate_data. The prefix and each frame are cached under their
+    own keys, so later range requests load only the frames they cover.
+    """
+    def build():
+        found = _frames_from_rows(variable, bbox, start, end)
+        if found is None:
+            cache.set(cache_key, {}, FRAME_CACHE_SECONDS)
+            return None
+        times, lat, lon, values = found
+        prefix = encode_prefix(times, lat, lon)
+        frames = {f"{cache_key}:{k}": values[k].tobytes() for k in range(times.size)}
+        meta = {
+            "prefix": prefix,
+            "count": int(times.size),
+            "frame_bytes": lat.size * lon.size * FRAME_DTYPE.itemsize,
+            "etag": _etag(prefix, *frames.values()),
+        }
+        cache.set_many(frames, FRAME_CACHE_SECONDS)
+        cache.set(cache_key, meta, FRAME_CACHE_SECONDS)
+        return meta, frames
+
+    meta = cache.get(cache_key)
+    built = None
+    if meta is None:
+        built = build()
+        if built is None:
+            return None
+        meta = built[0]
+    elif not meta:
+        return None
+
+    def read_frames(first: int, last: int) -> bytes:
+        keys = [f"{cache_key}:{k}" for k in range(first, last + 1)]
+        frames = built[1] if built else cache.get_many(keys)
+        if any(key not in frames for key in keys):
+            rebuilt = build()
+            frames = rebuilt[1] if rebuilt else {}
+        return b"".join(frames.get(key, b"") for key in keys)
+
+    return FramePayload(meta["prefix"], meta["count"], meta["frame_bytes"], meta["etag"], read_frames)
+
+
+def climate_frames(variable: str, bbox, start, end, store: ClimateGridStore | None = None) -> FramePayload | None:
+    """
+    Encoded frames of ``variable`` in ``bbox`` for every stored time step in
+    ``[start, end]`` (at most ``MAX_FRAMES``), from the grid store when it has the
+    variable and from climate_data otherwise; ``None`` if there are none.
+    """
+    if variable not in CLIMATE_VARIABLES:
+        raise ValueError(f"Unknown climate variable: {variable}")
+
+    store = store or ClimateGridStore()
+    payload = _store_payload(store, variable, bbox, start, end)
+    if payload is not None:
+        return payload
+
+    key_source = f"{variable}|{','.join(f'{v:.4f}' for v in bbox)}|{start.isoformat()}|{end.isoformat()}"
+    cache_key = f"climate-frames:{hashlib.sha256(key_source.encode()).hexdigest()}"
+    return _rows_payload(variable, bbox, start, end, cache_key)
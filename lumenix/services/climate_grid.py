@@ -0,0 +1,99 @@
+# lumenix/services/climate_grid.py
+
+from django.db import connection
+
+# Whitelisted ClimateData columns that may be aggregated (they are interpolated into SQL).
+CLIMATE_VARIABLES = (
+    "temperature_2m",
+    "sea_surface_temperature",
+    "max_temperature_2m",
+    "min_temperature_2m",
+    "skin_temperature",
+)
+DEFAULT_VARIABLE = "temperature_2m"
+
+# Approximate extent of Europe: (min_lon, min_lat, max_lon, max_lat).
+EUROPE_BBOX = (-25.0, 35.0, 45.0, 71.0)
+
+MIN_ZOOM = 0
+MAX_ZOOM = 12
+# Grid cells are sized to roughly this many screen pixels of a 256px tile at the requested zoom.
+CELL_PIXELS = 8
+# Below this size (degrees) the ERA5 grid (0.25 deg) is already finer than any cell, so skip snapping.
+MIN_CELL_DEG = 0.01
+
+GRID_SQL = """
+SELECT
+    ST_X(cell) AS lon,
+    ST_Y(cell) AS lat,
+    AVG(value) AS value,
+    COUNT(*) AS n
+FROM (
+    SELECT
+        ST_SnapToGrid(c.location::geometry, %(cell)s) AS cell,
+        c.{variable} AS value
+    FROM climate_data AS c
+    WHERE c.status = 1
+      AND c.location && ST_MakeEnvelope(%(min_lon)s, %(min_lat)s, %(max_lon)s, %(max_lat)s, 4326)::geography
+      AND c.timestamp >= %(start)s
+      AND c.timestamp <= %(end)s
+      AND c.{variable} IS NOT NULL
+      AND c.{variable} <> 'NaN'::float8
+) AS snapped
+GROUP BY cell
+ORDER BY lat, lon;
+"""
+
+LATEST_TIMESTAMP_SQL = "SELECT MAX(timestamp) FROM climate_data WHERE status = 1;"
+
+
+def cell_size_for_zoom(zoom: int) -> float:
+    """Grid cell edge in degrees: about ``CELL_PIXELS`` screen pixels at ``zoom``."""
+    zoom = min(max(int(zoom), MIN_ZOOM), MAX_ZOOM)
+    return max(360.0 / (256 * 2 ** zoom) * CELL_PIXELS, MIN_CELL_DEG)
+
+
+def latest_timestamp():
+    """Most recent active ClimateData timestamp (an index-only lookup), or ``None``."""
+    with connection.cursor() as cursor:
+        cursor.execute(LATEST_TIMESTAMP_SQL)
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def aggregate_climate_grid(bbox, start, end, zoom: int, variable: str = DEFAULT_VARIABLE) -> dict:
+    """
+    Average ``variable`` over ``[start, end]`` on a zoom-dependent grid inside ``bbox``.
+
+    The bbox test runs against the GIST index on ``location``; points are then snapped
+    with ``ST_SnapToGrid`` and averaged per cell, so the response size depends on the
+    viewport and zoom rather than on the table size. Returns parallel column lists.
+    """
+    if variable not in CLIMATE_VARIABLES:
+        raise ValueError(f"Unknown climate variable: {variable}")
+
+    min_lon, min_lat, max_lon, max_lat = bbox
+    cell = cell_size_for_zoom(zoom)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            GRID_SQL.format(variable=variable),
+            {
+                "cell": cell,
+                "min_lon": min_lon,
+                "min_lat": min_lat,
+                "max_lon": max_lon,
+                "max_lat": max_lat,
+                "start": start,
+                "end": end,
+            },
+        )
+        rows = cursor.fetchall()
+
+    return {
+        "variable": variable,
+        "cell": cell,
+        "lon": [round(r[0], 4) for r in rows],
+        "lat": [round(r[1], 4) for r in rows],
+        "value": [round(r[2], 2) for r in rows],
+        "count": [r[3] for r in rows],
+    }
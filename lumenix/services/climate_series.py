@@ -0,0 +1,206 @@
+# lumenix/services/climate_series.py
+
+from datetime import datetime, time, timedelta, timezone
+
+from django.db import connection
+
+from lumenix.models import NutsClimateDaily
+from lumenix.services.climate_grid import CLIMATE_VARIABLES
+
+# Nearest stored grid cell by GIST KNN (<->), then the cell's rows via the same index.
+POINT_SERIES_SQL = """
+WITH cell AS (
+    SELECT c.location
+    FROM climate_data AS c
+    WHERE c.status = 1 AND c.location IS NOT NULL
+    ORDER BY c.location <-> ST_SetSRID(ST_MakePoint(%(lon)s, %(lat)s), 4326)::geography
+    LIMIT 1
+)
+SELECT
+    ST_X(cell.location::geometry) AS lon,
+    ST_Y(cell.location::geometry) AS lat,
+    c.timestamp,
+    c.{variable}
+FROM cell
+JOIN climate_data AS c ON c.location && cell.location
+WHERE c.status = 1
+  AND c.timestamp >= %(start)s
+  AND c.timestamp <= %(end)s
+ORDER BY c.timestamp;
+"""
+
+# Cells whose point lies inside the region, averaged per time step. Regions too small
+# to contain a cell centre fall back to the cell nearest to a point on their surface.
+REGION_SERIES_SQL = """
+WITH region AS (
+    SELECT geom FROM nuts_regions
+    WHERE notation = %(nuts_id)s AND status = 1 AND geom IS NOT NULL
+    ORDER BY level DESC
+    LIMIT 1
+),
+inside AS (
+    SELECT DISTINCT c.location
+    FROM climate_data AS c, region
+    WHERE c.status = 1
+      AND c.timestamp >= %(start)s
+      AND c.timestamp <= %(end)s
+      AND c.location && region.geom::geography
+      AND ST_Covers(region.geom, c.location::geometry)
+),
+nearest AS (
+    SELECT c.location
+    FROM climate_data AS c, region
+    WHERE c.status = 1 AND c.location IS NOT NULL AND NOT EXISTS (SELECT 1 FROM inside)
+    ORDER BY c.location <-> ST_PointOnSurface(region.geom)::geography
+    LIMIT 1
+),
+cells AS (
+    SELECT location FROM inside
+    UNION ALL
+    SELECT location FROM nearest
+)
+SELECT c.timestamp, AVG(c.{variable}), MIN(c.{variable}), MAX(c.{variable}), COUNT(*)
+FROM cells
+JOIN climate_data AS c ON c.location && cells.location
+WHERE c.status = 1
+  AND c.timestamp >= %(start)s
+  AND c.timestamp <= %(end)s
+  AND c.{variable} IS NOT NULL
+  AND c.{variable} <> 'NaN'::float8
+GROUP BY c.timestamp
+ORDER BY c.timestamp;
+"""
+
+RAW_BOUNDS_SQL = """
+SELECT MIN(timestamp), MAX(timestamp) FROM climate_data
+WHERE status = 1 AND timestamp >= %s AND timestamp <= %s;
+"""
+
+# Which of the given days have any climate_data rows (one index probe per day).
+RAW_DAYS_SQL = """
+SELECT d FROM unnest(%s::date[]) AS d
+WHERE EXISTS (
+    SELECT 1 FROM climate_data
+    WHERE status = 1 AND timestamp >= d AND timestamp < d + 1
+);
+"""
+
+# Precomputed series with more missing days than this are not probed day by day.
+COVERAGE_PROBE_LIMIT = 31
+
+REGION_EXISTS_SQL = """
+SELECT 1 FROM nuts_regions WHERE notation = %s AND status = 1 AND geom IS NOT NULL LIMIT 1;
+"""
+
+
+def _check_variable(variable: str) -> None:
+    if variable not in CLIMATE_VARIABLES:
+        raise ValueError(f"Unknown climate variable: {variable}")
+
+
+def _round(value):
+    return None if value is None or value != value else round(value, 2)
+
+
+def point_series(lon: float, lat: float, start, end, variable: str) -> dict | None:
+    """
+    Time series of ``variable`` at the stored grid cell nearest to ``(lon, lat)`` as
+    parallel ``timestamps`` / ``values`` arrays; ``None`` when no climate data exists.
+    """
+    _check_variable(variable)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            POINT_SERIES_SQL.format(variable=variable),
+            {"lon": lon, "lat": lat, "start": start, "end": end},
+        )
+        rows = cursor.fetchall()
+    if not rows:
+        return None
+    return {
+        "variable": variable,
+        "cell": {"lon": round(rows[0][0], 4), "lat": round(rows[0][1], 4)},
+        "timestamps": [row[2].isoformat() for row in rows],
+        "values": [_round(row[3]) for row in rows],
+    }
+
+
+def _precomputed_region_rows(nuts_id: str, start, end, variable: str) -> list:
+    """NutsClimateDaily rows ``(date, mean, min, max, cells)`` of the region in range."""
+    return list(
+        NutsClimateDaily.objects
+        .filter(
+            region__notation=nuts_id,
+            region__status=1,
+            variable=variable,
+            date__gte=start.date(),
+            date__lte=end.date(),
+        )
+        .order_by("date")
+        .values_list("date", "mean", "min", "max", "cells")
+    )
+
+
+def _region_payload(nuts_id: str, variable: str, source: str, rows) -> dict:
+    """Region series from ``(timestamp, mean, min, max, cells)`` rows; same shape for every source."""
+    return {
+        "variable": variable,
+        "nuts_id": nuts_id,
+        "source": source,
+        "timestamps": [row[0].isoformat() for row in rows],
+        "values": [_round(row[1]) for row in rows],
+        "min": [_round(row[2]) for row in rows],
+        "max": [_round(row[3]) for row in rows],
+        "cells": [row[4] for row in rows],
+    }
+
+
+def _covers_raw_data(dates, start, end) -> bool:
+    """
+    True when the precomputed ``dates`` include every day that has climate_data rows
+    in ``[start, end]``, so the precomputed series is not a truncated view of it.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(RAW_BOUNDS_SQL, [start, end])
+        first, last = cursor.fetchone()
+        if first is None:
+            return True
+        known = set(dates)
+        missing = []
+        day = first.date()
+        while day <= last.date():
+            if day not in known:
+                missing.append(day)
+                if len(missing) > COVERAGE_PROBE_LIMIT:
+                    return False
+            day += timedelta(days=1)
+        if not missing:
+            return True
+        cursor.execute(RAW_DAYS_SQL, [missing])
+        return cursor.fetchone() is None
+
+
+def region_series(nuts_id: str, start, end, variable: str) -> dict | None:
+    """
+    Time series of ``variable`` averaged over the grid cells inside NUTS region
+    ``nuts_id``; ``None`` when the region or its geometry is unknown.
+
+    Served from the precomputed NutsClimateDaily table when it covers every day with
+    climate data in range, otherwise by a spatial join over climate_data.
+    """
+    _check_variable(variable)
+    daily = _precomputed_region_rows(nuts_id, start, end, variable)
+    if daily and _covers_raw_data([row[0] for row in daily], start, end):
+        # Daily statistics are stamped at the start of their UTC day.
+        rows = [(datetime.combine(row[0], time.min, tzinfo=timezone.utc), *row[1:]) for row in daily]
+        return _region_payload(nuts_id, variable, "nuts_climate_daily", rows)
+
+    with connection.cursor() as cursor:
+        cursor.execute(REGION_EXISTS_SQL, [nuts_id])
+        if cursor.fetchone() is None:
+            return None
+        cursor.execute(
+            REGION_SERIES_SQL.format(variable=variable),
+            {"nuts_id": nuts_id, "start": start, "end": end},
+        )
+        rows = cursor.fetchall()
+    return _region_payload(nuts_id, variable, "climate_data", rows)
@@ -0,0 +1,244 @@
+# lumenix/services/climate_store.py
+
+import io
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from django.conf import settings
+
+from lumenix.services.climate_grid import CLIMATE_VARIABLES
+
+FRAME_DTYPE = np.dtype("<f4")
+TIME_UNIT = "s"
+
+
+@dataclass
+class GridSelection:
+    """Result of a store read: ``values`` is shaped ``(time, lat, lon)``."""
+    variable: str
+    times: np.ndarray
+    lat: np.ndarray
+    lon: np.ndarray
+    values: np.ndarray
+
+
+def _to_epoch(values) -> np.ndarray:
+    """Datetime-likes (naive values are taken as UTC) -> int64 epoch seconds."""
+    index = pd.DatetimeIndex(pd.to_datetime(np.atleast_1d(np.asarray(values, dtype=object)), utc=True))
+    return index.as_unit(TIME_UNIT).asi8
+
+
+class ClimateGridStore:
+    """
+    On-disk array store for gridded ERA5 fields: one float32 frame per time step.
+
+    Layout under ``root``::
+
+        grid.json                   latitude / longitude axes shared by all variables
+        <variable>/<year>.f4        raw C-order frames, shape (n, lat, lon)
+        <variable>/<year>.time.npy  int64 epoch seconds of each frame, in file order
+
+    Files are read through ``np.memmap``, so a point time series touches one value
+    per frame and a bbox read only the rows it needs.
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root or settings.CLIMATE_GRID_STORE_DIR)
+
+    # -- grid -----------------------------------------------------------------------
+
+    @property
+    def _grid_path(self) -> Path:
+        return self.root / "grid.json"
+
+    def grid(self) -> tuple[np.ndarray, np.ndarray] | None:
+        if not self._grid_path.exists():
+            return None
+        data = json.loads(self._grid_path.read_text())
+        return np.asarray(data["lat"], dtype="f8"), np.asarray(data["lon"], dtype="f8")
+
+    def _ensure_grid(self, lat: np.ndarray, lon: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        existing = self.grid()
+        if existing is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            self._atomic_write(self._grid_path, json.dumps({"lat": lat.tolist(), "lon": lon.tolist()}).encode())
+            return lat, lon
+        if existing[0].shape != lat.shape or existing[1].shape != lon.shape or not (
+            np.allclose(existing[0], lat) and np.allclose(existing[1], lon)
+        ):
+            raise ValueError("Grid of the incoming data does not match the store grid.")
+        return existing
+
+    # -- files ----------------------------------------------------------------------
+
+    @staticmethod
+    def _atomic_write(path: Path, payload: bytes) -> None:
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(payload)
+        os.replace(tmp, path)
+
+    def _paths(self, variable: str, year: int) -> tuple[Path, Path]:
+        base = self.root / variable
+        return base / f"{year}.f4", base / f"{year}.time.npy"
+
+    def _years(self, variable: str) -> list[int]:
+        base = self.root / variable
+        if not base.exists():
+            return []
+        return sorted(int(p.name.split(".")[0]) for p in base.glob("*.time.npy"))
+
+    def _frame_times(self, variable: str, year: int) -> np.ndarray:
+        _, time_path = self._paths(variable, year)
+        return np.load(time_path) if time_path.exists() else np.empty(0, dtype="int64")
+
+    def _memmap(self, variable: str, year: int, count: int, mode: str = "r") -> np.memmap:
+        lat, lon = self.grid()
+        data_path, _ = self._paths(variable, year)
+        return np.memmap(data_path, dtype=FRAME_DTYPE, mode=mode, shape=(count, lat.size, lon.size))
+
+    # -- writes ---------------------------------------------------------------------
+
+    def write_frames(self, variable: str, times, values: np.ndarray, lat: np.ndarray, lon: np.ndarray) -> int:
+        """
+        Store ``values`` (``(time, lat, lon)``) for ``variable``. Frames for a time step
+        already in the store are overwritten in place; new ones are appended to the
+        file of their year. Returns the number of frames written.
+        """
+        if variable not in CLIMATE_VARIABLES:
+            raise ValueError(f"Unknown climate variable: {variable}")
+        lat, lon = self._ensure_grid(np.asarray(lat, dtype="f8"), np.asarray(lon, dtype="f8"))
+        values = np.asarray(values, dtype=FRAME_DTYPE)
+        epochs = _to_epoch(times)
+        if values.shape != (epochs.size, lat.size, lon.size):
+            raise ValueError(f"Expected frames shaped {(epochs.size, lat.size, lon.size)}, got {values.shape}.")
+
+        years = epochs.astype("datetime64[s]").astype("datetime64[Y]").astype(int) + 1970
+        (self.root / variable).mkdir(parents=True, exist_ok=True)
+        for year in np.unique(years):
+            selected = np.nonzero(years == year)[0]
+            self._write_year(variable, int(year), epochs[selected], values[selected])
+        return int(epochs.size)
+
+    def _write_year(self, variable: str, year: int, epochs: np.ndarray, frames: np.ndarray) -> None:
+        data_path, time_path = self._paths(variable, year)
+        known = self._frame_times(variable, year)
+        position = {int(t): i for i, t in enumerate(known)}
+
+        existing = [(position[int(t)], k) for k, t in enumerate(epochs) if int(t) in position]
+        if existing:
+            mm = self._memmap(variable, year, known.size, mode="r+")
+            for index, k in existing:
+                mm[index] = frames[k]
+            mm.flush()
+            del mm
+
+        fresh = [k for k, t in enumerate(epochs) if int(t) not in position]
+        if fresh:
+            # The time index is the source of truth: bytes past its last frame are left
+            # over from an append that never got its index written, and are dropped so
+            # frame i keeps matching timestamp i. The data is synced before the index moves.
+            indexed_bytes = known.size * frames[0].nbytes
+            with open(data_path, "a+b") as fh:
+                size = fh.seek(0, os.SEEK_END)
+                if size < indexed_bytes:
+                    raise ValueError(
+                        f"{data_path} holds {size} bytes but its time index needs {indexed_bytes}."
+                    )
+                if size > indexed_bytes:
+                    fh.truncate(indexed_bytes)
+                fh.write(np.ascontiguousarray(frames[fresh]).tobytes())
+                fh.flush()
+                os.fsync(fh.fileno())
+            new_times = np.concatenate([known, epochs[fresh]])
+            buffer = io.BytesIO()
+            np.save(buffer, new_times)
+            self._atomic_write(time_path, buffer.getvalue())
+
+    # -- reads ----------------------------------------------------------------------
+
+    def data_version(self, variable: str) -> int:
+        """Latest modification time (ns) of the variable's files; changes on every write."""
+        base = self.root / variable
+        if not base.exists():
+            return 0
+        return max((p.stat().st_mtime_ns for p in base.iterdir() if p.suffix in (".f4", ".npy")), default=0)
+
+    @staticmethod
+    def _time_mask(known: np.ndarray, start, end) -> np.ndarray:
+        mask = np.ones(known.size, dtype=bool)
+        if start is not None:
+            mask &= known >= _to_epoch(start)[0]
+        if end is not None:
+            mask &= known <= _to_epoch(end)[0]
+        return mask
+
+    def timestamps(self, variable: str, start=None, end=None) -> np.ndarray:
+        """Stored time steps of ``variable`` in ``[start, end]`` as sorted ``datetime64[s]``."""
+        chunks = []
+        for year in self._years(variable):
+            times = self._frame_times(variable, year)
+            chunks.append(times[self._time_mask(times, start, end)])
+        times = np.sort(np.concatenate(chunks)) if chunks else np.empty(0, dtype="int64")
+        return times.astype("datetime64[s]")
+
+    def _select(self, variable: str, start, end, lat_index, lon_index) -> tuple[np.ndarray, np.ndarray]:
+        times, parts = [], []
+        for year in self._years(variable):
+            known = self._frame_times(variable, year)
+            frames = np.nonzero(self._time_mask(known, start, end))[0]
+            if not frames.size:
+                continue
+            mm = self._memmap(variable, year, known.size)
+            # One open-mesh fancy index, so only the requested cells of each frame are read.
+            parts.append(np.array(mm[np.ix_(frames, lat_index, lon_index)]))
+            times.append(known[frames])
+            del mm
+        if not parts:
+            return np.empty(0, dtype="datetime64[s]"), np.empty((0, 0, 0), dtype=FRAME_DTYPE)
+        times = np.concatenate(times)
+        values = np.concatenate(parts)
+        order = np.argsort(times, kind="stable")
+        return times[order].astype("datetime64[s]"), values[order]
+
+    def read_bbox(self, variable: str, bbox, start=None, end=None) -> GridSelection:
+        """Frames in ``[start, end]`` cropped to ``bbox`` = ``(min_lon, min_lat, max_lon, max_lat)``."""
+        grid = self.grid()
+        if grid is None:
+            raise LookupError("The climate grid store is empty.")
+        lat, lon = grid
+        min_lon, min_lat, max_lon, max_lat = bbox
+        lat_index = np.nonzero((lat >= min_lat) & (lat <= max_lat))[0]
+        lon_index = np.nonzero((lon >= min_lon) & (lon <= max_lon))[0]
+        times, values = self._select(variable, start, end, lat_index, lon_index)
+        if not times.size:
+            values = np.empty((0, lat_index.size, lon_index.size), dtype=FRAME_DTYPE)
+        return GridSelection(variable, times, lat[lat_index], lon[lon_index], values)
+
+    def read_frame(self, variable: str, timestamp) -> GridSelection:
+        """The full grid of one stored time step."""
+        grid = self.grid()
+        if grid is None:
+            raise LookupError("The climate grid store is empty.")
+        lat, lon = grid
+        return self.read_bbox(variable, (lon.min(), lat.min(), lon.max(), lat.max()), timestamp, timestamp)
+
+    def nearest_cell(self, lat_value: float, lon_value: float) -> tuple[int, int]:
+        grid = self.grid()
+        if grid is None:
+            raise LookupError("The climate grid store is empty.")
+        lat, lon = grid
+        return int(np.abs(lat - lat_value).argmin()), int(np.abs(lon - lon_value).argmin())
+
+    def point_series(self, variable: str, lat_value: float, lon_value: float, start=None, end=None) -> GridSelection:
+        """Time series of the grid cell nearest to ``(lat_value, lon_value)``."""
+        i, j = self.nearest_cell(lat_value, lon_value)
+        lat, lon = self.grid()
+        times, values = self._select(variable, start, end, np.array([i]), np.array([j]))
+        if not times.size:
+            values = np.empty((0, 1, 1), dtype=FRAME_DTYPE)
+        return GridSelection(variable, times, lat[[i]], lon[[j]], values)
@@ -0,0 +1,236 @@
+# lumenix/services/climatology.py
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from django.db import transaction
+from django.db.models import Max
+
+from lumenix.models import ClimateBaseline, NutsClimateDaily, NutsClimatology
+from lumenix.services.climate_grid import CLIMATE_VARIABLES
+from lumenix.services.climate_store import ClimateGridStore
+
+DOY_SLOTS = 366
+FEB_29_SLOT = 59
+# Frames read per store request while accumulating the per-cell climatology.
+CELL_READ_DAYS = 31
+
+
+def day_slots(dates) -> np.ndarray:
+    """
+    Day-of-year slot (0..365) for each date, with 29 February fixed at slot 59 so a
+    calendar day maps to the same slot in leap and common years.
+    """
+    index = pd.DatetimeIndex(pd.to_datetime(np.atleast_1d(np.asarray(dates, dtype=object))))
+    doy = index.dayofyear.to_numpy() - 1
+    shift = (~index.is_leap_year) & (doy >= FEB_29_SLOT)
+    return doy + shift.astype(int)
+
+
+def _smooth(values: np.ndarray, window: int) -> np.ndarray:
+    """Centred circular moving sum over axis 0 (the 366 day slots)."""
+    half = max(0, int(window)) // 2
+    if not half:
+        return values
+    padded = np.concatenate([values[-half:], values, values[:half]], axis=0)
+    cumulative = np.cumsum(padded, axis=0)
+    cumulative = np.concatenate([np.zeros_like(cumulative[:1]), cumulative], axis=0)
+    return cumulative[2 * half + 1:] - cumulative[:-(2 * half + 1)]
+
+
+def _moments(sums: np.ndarray, squares: np.ndarray, counts: np.ndarray, window: int):
+    """Smoothed mean and standard deviation from per-slot sums (slot axis first)."""
+    sums, squares, counts = _smooth(sums, window), _smooth(squares, window), _smooth(counts, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(counts > 0, sums / counts, np.nan)
+        variance = np.where(counts > 1, squares / counts - mean ** 2, np.nan)
+    return mean, np.sqrt(np.clip(variance, 0, None))
+
+
+def _as_list(values: np.ndarray) -> list:
+    return [None if np.isnan(v) else round(float(v), 3) for v in values]
+
+
+def compute_nuts_climatology(baseline: ClimateBaseline, variables) -> int:
+    """
+    Day-of-year climatology per NUTS region from NutsClimateDaily: one query per
+    variable, then ``np.add.at`` into ``(slot, region)`` accumulators.
+    """
+    written = 0
+    for variable in variables:
+        rows = list(
+            NutsClimateDaily.objects
+            .filter(
+                variable=variable,
+                date__gte=baseline.start_date,
+                date__lte=baseline.end_date,
+                mean__isnull=False,
+            )
+            .values_list("region_id", "date", "mean")
+        )
+        if not rows:
+            continue
+        region_ids, dates, values = zip(*rows)
+        regions, positions = np.unique(np.asarray(region_ids, dtype="int64"), return_inverse=True)
+        slots = day_slots(dates)
+        values = np.asarray(values, dtype="f8")
+
+        shape = (DOY_SLOTS, regions.size)
+        sums, squares, counts = np.zeros(shape), np.zeros(shape), np.zeros(shape)
+        np.add.at(sums, (slots, positions), values)
+        np.add.at(squares, (slots, positions), values ** 2)
+        np.add.at(counts, (slots, positions), 1.0)
+        samples = counts.sum(axis=0)
+        mean, std = _moments(sums, squares, counts, baseline.window_days)
+
+        NutsClimatology.objects.bulk_create(
+            [
+                NutsClimatology(
+                    baseline=baseline,
+                    region_id=int(region_id),
+                    variable=variable,
+                    mean=_as_list(mean[:, k]),
+                    std=_as_list(std[:, k]),
+                    samples=int(samples[k]),
+                )
+                for k, region_id in enumerate(regions)
+            ],
+            batch_size=500,
+        )
+        written += regions.size
+    return written
+
+
+def cell_climatology_dir(baseline: ClimateBaseline, store: ClimateGridStore | None = None):
+    return (store or ClimateGridStore()).root / "climatology" / baseline.slug
+
+
+def compute_cell_climatology(baseline: ClimateBaseline, variables, store: ClimateGridStore | None = None) -> list:
+    """
+    Per-cell day-of-year climatology from the grid store, written as float32
+    ``<variable>.mean.npy`` / ``<variable>.std.npy`` arrays shaped ``(366, lat, lon)``.
+    Frames are read a month at a time and folded into the slot accumulators.
+    Returns the variables that had data.
+    """
+    store = store or ClimateGridStore()
+    grid = store.grid()
+    if grid is None:
+        return []
+    lat, lon = grid
+    bbox = (lon.min(), lat.min(), lon.max(), lat.max())
+    target = cell_climatology_dir(baseline, store)
+    start = pd.Timestamp(baseline.start_date, tz="UTC")
+    end = pd.Timestamp(baseline.end_date, tz="UTC") + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+
+    done = []
+    for variable in variables:
+        shape = (DOY_SLOTS, lat.size, lon.size)
+        sums, squares, counts = np.zeros(shape), np.zeros(shape), np.zeros(shape, dtype="f4")
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(chunk_start + pd.Timedelta(days=CELL_READ_DAYS) - pd.Timedelta(seconds=1), end)
+            selection = store.read_bbox(variable, bbox, chunk_start, chunk_end)
+            if selection.times.size:
+                frames = selection.values.astype("f8")
+                valid = ~np.isnan(frames)
+                frames = np.where(valid, frames, 0.0)
+                slots = day_slots(selection.times)
+                np.add.at(sums, slots, frames)
+                np.add.at(squares, slots, frames ** 2)
+                np.add.at(counts, slots, valid.astype("f4"))
+            chunk_start = chunk_end + pd.Timedelta(seconds=1)
+        if not counts.any():
+            continue
+        mean, std = _moments(sums, squares, counts.astype("f8"), baseline.window_days)
+        target.mkdir(parents=True, exist_ok=True)
+        np.save(target / f"{variable}.mean.npy", mean.astype("f4"))
+        np.save(target / f"{variable}.std.npy", std.astype("f4"))
+        done.append(variable)
+    return done
+
+
+def create_baseline(name: str, start: date, end: date, window_days: int = 15, variables=None,
+                    cells: bool = True, make_current: bool = True) -> ClimateBaseline:
+    """Compute a new version of baseline ``name`` (NUTS rows and, optionally, per-cell arrays)."""
+    variables = [v for v in (variables or CLIMATE_VARIABLES) if v in CLIMATE_VARIABLES]
+    with transaction.atomic():
+        last_version = ClimateBaseline.objects.filter(name=name).aggregate(v=Max("version"))["v"] or 0
+        baseline = ClimateBaseline.objects.create(
+            name=name,
+            version=last_version + 1,
+            start_date=start,
+            end_date=end,
+            window_days=window_days,
+            variables=variables,
+        )
+        compute_nuts_climatology(baseline, variables)
+    if cells:
+        baseline.has_cells = bool(compute_cell_climatology(baseline, variables))
+        baseline.save(update_fields=["has_cells"])
+    if make_current:
+        with transaction.atomic():
+            ClimateBaseline.objects.filter(is_current=True).update(is_current=False)
+            ClimateBaseline.objects.filter(pk=baseline.pk).update(is_current=True)
+        baseline.is_current = True
+    return baseline
+
+
+def current_baseline() -> ClimateBaseline | None:
+    return ClimateBaseline.objects.filter(is_current=True).order_by("-created_at").first()
+
+
+def region_climatology(nuts_id: str, variable: str, dates, baseline: ClimateBaseline | None = None) -> list | None:
+    """Baseline mean for each of ``dates`` in NUTS region ``nuts_id`` (one row lookup)."""
+    baseline = baseline or current_baseline()
+    if baseline is None:
+        return None
+    row = (
+        NutsClimatology.objects
+        .filter(baseline=baseline, region__notation=nuts_id, region__status=1, variable=variable)
+        .values_list("mean", flat=True)
+        .first()
+    )
+    if row is None:
+        return None
+    return [row[slot] for slot in day_slots(dates)]
+
+
+def _cell_mean_memmap(variable: str, baseline: ClimateBaseline | None, store: ClimateGridStore | None):
+    baseline = baseline or current_baseline()
+    if baseline is None or not baseline.has_cells:
+        return None
+    path = cell_climatology_dir(baseline, store) / f"{variable}.mean.npy"
+    if not path.exists():
+        return None
+    return np.load(path, mmap_mode="r")
+
+
+def cell_climatology(variable: str, dates, baseline: ClimateBaseline | None = None,
+                     store: ClimateGridStore | None = None) -> np.ndarray | None:
+    """
+    Per-cell baseline mean frames (``(len(dates), lat, lon)``, loaded into memory) for
+    the day slots of ``dates``; ``None`` when the baseline has no cell arrays. For a
+    single cell use :func:`point_climatology`, which reads only that cell's 366 slots.
+    """
+    means = _cell_mean_memmap(variable, baseline, store)
+    return None if means is None else means[day_slots(dates)]
+
+
+def point_climatology(variable: str, dates, lat_index: int, lon_index: int,
+                      baseline: ClimateBaseline | None = None,
+                      store: ClimateGridStore | None = None) -> np.ndarray | None:
+    """Baseline mean of grid cell ``(lat_index, lon_index)`` for each of ``dates``."""
+    means = _cell_mean_memmap(variable, baseline, store)
+    if means is None:
+        return None
+    return np.asarray(means[:, lat_index, lon_index])[day_slots(dates)]
+
+
+def anomalies(values, climatology) -> list:
+    """Element-wise ``value - climatology``; ``None`` where either side is missing."""
+    return [
+        None if value is None or clim is None else round(value - clim, 2)
+        for value, clim in zip(values, climatology)
+    ]
@@ -0,0 +1,94 @@
+# lumenix/services/concept_hierarchy.py
+
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.db import transaction
+
+from lumenix.models import Concept, ConceptClosure
+
+BULK_BATCH_SIZE = max(1, int(getattr(settings, "SCIO_VOCAB_SYNC_BATCH_SIZE", 500)))
+
+
+def _children_by_pk(concepts: list) -> dict:
+    """
+    Parent pk -> set of child pks, merged from both ``broader`` and ``narrower``
+    URI lists. URIs that don't resolve to a concept in ``concepts`` are ignored.
+    """
+    pk_by_uri = {uri: pk for pk, uri, _, _ in concepts}
+    children = defaultdict(set)
+    for pk, _, broader, narrower in concepts:
+        for parent_uri in broader or []:
+            parent = pk_by_uri.get(parent_uri)
+            if parent is not None and parent != pk:
+                children[parent].add(pk)
+        for child_uri in narrower or []:
+            child = pk_by_uri.get(child_uri)
+            if child is not None and child != pk:
+                children[pk].add(child)
+    return children
+
+
+def rebuild_concept_closure(vocab_id: str) -> int:
+    """
+    Recompute the ancestor/descendant closure of one vocabulary's active concepts.
+    Every concept gets a depth-0 row to itself; cycles in the source data are cut
+    at the first revisit. Returns the number of rows written.
+    """
+    concepts = list(
+        Concept.objects
+        .filter(vocabulary_id=vocab_id, status=1)
+        .values_list("pk", "uri", "broader", "narrower")
+    )
+    children = _children_by_pk(concepts)
+
+    rows = []
+    for root, _, _, _ in concepts:
+        depth_by_pk = {root: 0}
+        queue = deque([root])
+        while queue:
+            node = queue.popleft()
+            for child in children.get(node, ()):
+                if child not in depth_by_pk:
+                    depth_by_pk[child] = depth_by_pk[node] + 1
+                    queue.append(child)
+        rows.extend(
+            ConceptClosure(ancestor_id=root, descendant_id=pk, depth=depth)
+            for pk, depth in depth_by_pk.items()
+        )
+
+    with transaction.atomic():
+        ConceptClosure.objects.filter(descendant__vocabulary_id=vocab_id).delete()
+        ConceptClosure.objects.bulk_create(rows, batch_size=BULK_BATCH_SIZE)
+    return len(rows)
+
+
+def descendants_of(concept, include_self: bool = True, max_depth: int | None = None):
+    """
+    Concepts under ``concept`` (an instance or pk), as one indexed join on the
+    closure table. ``max_depth=1`` gives direct children only.
+    """
+    ancestor_id = getattr(concept, "pk", concept)
+    filters = {"ancestor_links__ancestor_id": ancestor_id}
+    if not include_self:
+        filters["ancestor_links__depth__gte"] = 1
+    if max_depth is not None:
+        filters["ancestor_links__depth__lte"] = max_depth
+    return Concept.objects.filter(**filters)
+
+
+def ancestors_of(concept, include_self: bool = True):
+    """Concepts above ``concept`` (an instance or pk), nearest first."""
+    descendant_id = getattr(concept, "pk", concept)
+    filters = {"descendant_links__descendant_id": descendant_id}
+    if not include_self:
+        filters["descendant_links__depth__gte"] = 1
+    return Concept.objects.filter(**filters).order_by("descendant_links__depth")
+
+
+def parent_concepts(vocab_id: str | None = None):
+    """Concepts that have at least one descendant, e.g. for subtree pickers."""
+    qs = Concept.objects.filter(status=1, descendant_links__depth=1)
+    if vocab_id:
+        qs = qs.filter(vocabulary_id=vocab_id)
+    return qs.distinct()
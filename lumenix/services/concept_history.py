@@ -0,0 +1,231 @@
+# lumenix/services/concept_history.py
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from lumenix.models import Concept, ConceptHistory
+
+# A full snapshot is stored at least every N versions; the rows in between hold JSON-patch deltas.
+FULL_SNAPSHOT_EVERY = max(1, int(getattr(settings, "CONCEPT_HISTORY_FULL_SNAPSHOT_EVERY", 10)))
+RETENTION_DAYS = max(0, int(getattr(settings, "CONCEPT_HISTORY_RETENTION_DAYS", 365)))
+COMPACT_BATCH_SIZE = 200
+
+
+def _escape(key: str) -> str:
+    # RFC 6901 JSON-pointer escaping.
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def make_patch(old: dict, new: dict) -> list:
+    """
+    RFC 6902 patch turning ``old`` into ``new``. Snapshots are flat documents, so
+    operations are emitted on top-level members only (a changed label dict or URI
+    list is replaced as a whole).
+    """
+    ops = []
+    for key in old:
+        if key not in new:
+            ops.append({"op": "remove", "path": f"/{_escape(key)}"})
+    for key, value in new.items():
+        if key not in old:
+            ops.append({"op": "add", "path": f"/{_escape(key)}", "value": value})
+        elif old[key] != value:
+            ops.append({"op": "replace", "path": f"/{_escape(key)}", "value": value})
+    return ops
+
+
+def apply_patch(doc: dict, ops: list) -> dict:
+    """Apply a top-level RFC 6902 patch produced by :func:`make_patch`."""
+    result = dict(doc)
+    for op in ops or []:
+        key = _unescape(op["path"].lstrip("/"))
+        if op["op"] == "remove":
+            result.pop(key, None)
+        elif op["op"] in ("add", "replace"):
+            result[key] = op["value"]
+        else:
+            raise ValueError(f"Unsupported JSON-patch op: {op['op']}")
+    return result
+
+
+def concept_snapshot(concept: Concept, scheme_uri=None) -> dict:
+    """The document a history row describes for ``concept`` in its current state."""
+    if scheme_uri is None and concept.scheme_id:
+        scheme_uri = concept.scheme.uri
+    return {
+        "uri": concept.uri,
+        "vocabulary": concept.vocabulary_id,
+        "scheme": scheme_uri,
+        "pref_label": concept.pref_label,
+        "alt_label": concept.alt_label,
+        "definition": concept.definition,
+        "notation": concept.notation,
+        "broader": concept.broader,
+        "narrower": concept.narrower,
+        "exact_match": concept.exact_match,
+        "close_match": concept.close_match,
+        "related": concept.related,
+        "in_scheme": concept.in_scheme,
+        "content_hash": concept.content_hash,
+    }
+
+
+def build_history_rows(changes: list, change_type: str, changed_at) -> list:
+    """
+    Unsaved ConceptHistory rows for a batch of ``(concept, previous_snapshot, snapshot)``.
+
+    ``previous_snapshot`` is ``None`` for newly created concepts. Version numbers and
+    the full-vs-delta decision come from one aggregate query over the batch.
+    """
+    concept_ids = [concept.pk for concept, _, _ in changes if concept.pk]
+    last_version, last_full = {}, {}
+    if concept_ids:
+        history = ConceptHistory.objects.filter(concept_id__in=concept_ids)
+        last_version = dict(
+            history.values("concept_id").annotate(v=Max("version")).values_list("concept_id", "v")
+        )
+        last_full = dict(
+            history.filter(is_full=True)
+            .values("concept_id").annotate(v=Max("version")).values_list("concept_id", "v")
+        )
+
+    rows = []
+    for concept, previous, snapshot in changes:
+        version = last_version.get(concept.pk, 0) + 1
+        full = (
+            previous is None
+            or concept.pk not in last_full
+            or version - last_full[concept.pk] >= FULL_SNAPSHOT_EVERY
+        )
+        rows.append(
+            ConceptHistory(
+                concept=concept,
+                change_type=change_type,
+                changed_at=changed_at,
+                content_hash=concept.content_hash,
+                version=version,
+                is_full=full,
+                snapshot=snapshot if full else None,
+                delta=None if full else make_patch(previous, snapshot),
+            )
+        )
+    return rows
+
+
+def reconstruct_version(concept_id: int, version: int | None = None) -> dict | None:
+    """
+    Return the concept document as of ``version`` (latest when omitted), or ``None``
+    if that version is not retained.
+
+    Loads the nearest full snapshot at or below ``version`` and replays the deltas
+    after it, so at most ``FULL_SNAPSHOT_EVERY`` rows are read.
+    """
+    history = ConceptHistory.objects.filter(concept_id=concept_id)
+    if version is None:
+        version = history.aggregate(v=Max("version"))["v"]
+        if version is None:
+            return None
+
+    base_version = (
+        history.filter(is_full=True, version__lte=version).aggregate(v=Max("version"))["v"]
+    )
+    if base_version is None:
+        return None
+
+    rows = list(
+        history.filter(version__gte=base_version, version__lte=version)
+        .order_by("version")
+        .values_list("version", "is_full", "snapshot", "delta")
+    )
+    if not rows or rows[-1][0] != version:
+        return None
+
+    doc = {}
+    for _, is_full, snapshot, delta in rows:
+        doc = dict(snapshot or {}) if is_full else apply_patch(doc, delta)
+    return doc
+
+
+def _reencode(rows: list, cutoff) -> tuple[list, list]:
+    """
+    Given one concept's rows in version order, decide which to drop and how to store
+    the rest. Returns ``(rows_to_update, ids_to_delete)``.
+    """
+    states = []
+    doc = {}
+    for row in rows:
+        doc = dict(row.snapshot or {}) if row.is_full else apply_patch(doc, row.delta)
+        states.append(doc)
+
+    latest = rows[-1].version
+    kept, dropped = [], []
+    for row, state in zip(rows, states):
+        if cutoff is not None and row.changed_at < cutoff and row.version != latest:
+            dropped.append(row.pk)
+        else:
+            kept.append((row, state))
+
+    to_update = []
+    previous_state = None
+    last_full_version = None
+    for row, state in kept:
+        full = last_full_version is None or row.version - last_full_version >= FULL_SNAPSHOT_EVERY
+        snapshot = state if full else None
+        delta = None if full else make_patch(previous_state, state)
+        if row.is_full != full or row.snapshot != snapshot or row.delta != delta:
+            row.is_full, row.snapshot, row.delta = full, snapshot, delta
+            to_update.append(row)
+        if full:
+            last_full_version = row.version
+        previous_state = state
+    return to_update, dropped
+
+
+def compact_history(retention_days: int | None = None) -> dict:
+    """
+    Apply retention and re-encode stored history.
+
+    Versions older than ``retention_days`` are removed (the latest version of each
+    concept is always kept), the oldest retained version becomes a full snapshot, and
+    every other version is rewritten as a delta unless it falls on the
+    ``FULL_SNAPSHOT_EVERY`` boundary. Legacy rows that hold full snapshots are
+    converted the same way. ``retention_days=0`` keeps every version.
+    """
+    if retention_days is None:
+        retention_days = RETENTION_DAYS
+    cutoff = timezone.now() - timedelta(days=retention_days) if retention_days else None
+
+    concept_ids = list(
+        ConceptHistory.objects.values_list("concept_id", flat=True).distinct().order_by("concept_id")
+    )
+    rewritten = deleted = 0
+    for i in range(0, len(concept_ids), COMPACT_BATCH_SIZE):
+        chunk = concept_ids[i:i + COMPACT_BATCH_SIZE]
+        by_concept = defaultdict(list)
+        for row in ConceptHistory.objects.filter(concept_id__in=chunk).order_by("concept_id", "version"):
+            by_concept[row.concept_id].append(row)
+
+        to_update, to_delete = [], []
+        for rows in by_concept.values():
+            updates, drops = _reencode(rows, cutoff)
+            to_update.extend(updates)
+            to_delete.extend(drops)
+
+        with transaction.atomic():
+            if to_delete:
+                ConceptHistory.objects.filter(pk__in=to_delete).delete()
+            if to_update:
+                ConceptHistory.objects.bulk_update(to_update, ["is_full", "snapshot", "delta"])
+        rewritten += len(to_update)
+        deleted += len(to_delete)
+
+    return {"concepts": len(concept_ids), "rewritten": rewritten, "deleted": deleted}
@@ -0,0 +1,80 @@
+# lumenix/services/conditional_fetch.py
+
+import hashlib
+from dataclasses import dataclass
+
+import requests
+
+from django.utils import timezone
+
+from lumenix.models import ApiSyncState
+
+
+@dataclass
+class ConditionalFetch:
+    """
+    Result of a conditional GET against a reference API endpoint.
+
+    ``data`` is ``None`` when the endpoint answered 304 or returned a body identical
+    to the last one we processed.
+    """
+    endpoint: str
+    data: dict | None
+    etag: str = ""
+    last_modified: str = ""
+    body_hash: str = ""
+
+    @property
+    def not_modified(self) -> bool:
+        return self.data is None
+
+
+def fetch_json_if_changed(url: str, timeout: int, force: bool = False) -> ConditionalFetch:
+    """
+    GET ``url`` sending the stored ETag / Last-Modified validators. Falls back to a
+    SHA256 of the raw body for endpoints that don't emit validators.
+    ``force`` skips both checks (used by ``reset`` syncs).
+    """
+    state = None if force else ApiSyncState.objects.filter(endpoint=url).first()
+
+    headers = {"Accept": "application/json"}
+    if state and state.etag:
+        headers["If-None-Match"] = state.etag
+    if state and state.last_modified:
+        headers["If-Modified-Since"] = state.last_modified
+
+    r = requests.get(url, headers=headers, timeout=timeout)
+    if r.status_code == 304 and state:
+        ApiSyncState.objects.filter(pk=state.pk).update(last_checked_at=timezone.now())
+        return ConditionalFetch(endpoint=url, data=None, etag=state.etag,
+                                last_modified=state.last_modified, body_hash=state.body_hash)
+    r.raise_for_status()
+
+    body_hash = hashlib.sha256(r.content).hexdigest()
+    etag = r.headers.get("ETag", "")
+    last_modified = r.headers.get("Last-Modified", "")
+    if state and state.body_hash == body_hash:
+        ApiSyncState.objects.filter(pk=state.pk).update(
+            etag=etag, last_modified=last_modified, last_checked_at=timezone.now()
+        )
+        return ConditionalFetch(endpoint=url, data=None, etag=etag, last_modified=last_modified, body_hash=body_hash)
+
+    return ConditionalFetch(endpoint=url, data=r.json(), etag=etag, last_modified=last_modified, body_hash=body_hash)
+
+
+def remember_fetch(result: ConditionalFetch) -> None:
+    """
+    Store the validators of a processed response. Call this only after the payload
+    has been fully applied, so a failed sync is retried on the next run.
+    """
+    now = timezone.now()
+    ApiSyncState.objects.update_or_create(
+        endpoint=result.endpoint,
+        defaults={
+            "etag": result.etag,
+            "last_modified": result.last_modified,
+            "body_hash": result.body_hash,
+            "last_checked_at": now,
+            "last_changed_at": now,
+        },
+    )
@@ -0,0 +1,81 @@
+# lumenix/services/model_search.py
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+from lumenix.models import ScioModel
+from lumenix.services.models_sync import cuda_version_code
+
+MAX_PAGE_SIZE = 100
+
+
+def search_models(
+    q: str = "",
+    cpu_cores: float | None = None,
+    ram_gb: float | None = None,
+    gpu_count: int | None = None,
+    gpu_memory_gb: float | None = None,
+    cuda_version: str | None = None,
+):
+    """
+    Active models whose requirements fit within the given resources.
+
+    Each resource argument is what the caller has available; ``None`` leaves that
+    dimension unfiltered. With ``cuda_version`` set, models without a CUDA minimum
+    still match. ``q`` matches name substrings (trigram-indexed) and orders results
+    by similarity; otherwise results are ordered by name.
+    """
+    qs = ScioModel.objects.filter(status=1)
+    if gpu_count is not None:
+        qs = qs.filter(gpu_count_required__lte=gpu_count)
+    if cpu_cores is not None:
+        qs = qs.filter(cpu_cores_required__lte=cpu_cores)
+    if ram_gb is not None:
+        qs = qs.filter(ram_gb_required__lte=ram_gb)
+    if gpu_memory_gb is not None:
+        qs = qs.filter(gpu_memory_gb_required__lte=gpu_memory_gb)
+    if cuda_version:
+        code = cuda_version_code(cuda_version)
+        if code is not None:
+            qs = qs.filter(Q(min_cuda_version_code__isnull=True) | Q(min_cuda_version_code__lte=code))
+
+    q = (q or "").strip()
+    if q:
+        return (
+            qs.filter(name__icontains=q)
+            .annotate(similarity=TrigramSimilarity("name", q))
+            .order_by("-similarity", "name", "pk")
+        )
+    return qs.order_by("name", "pk")
+
+
+def paginate_models(qs, page=1, page_size: int = 25) -> dict:
+    page_size = max(1, min(int(page_size or 25), MAX_PAGE_SIZE))
+    paginator = Paginator(
+        qs.only(
+            "external_id", "name", "image_tag", "cpu_cores_required", "ram_gb_required",
+            "gpu_count_required", "gpu_memory_gb_required", "min_cuda_version_required",
+        ),
+        page_size,
+    )
+    page_obj = paginator.get_page(page)
+    return {
+        "count": paginator.count,
+        "page": page_obj.number,
+        "page_size": page_size,
+        "num_pages": paginator.num_pages,
+        "results": [
+            {
+                "id": m.external_id,
+                "name": m.name,
+                "image_tag": m.image_tag,
+                "cpu_cores_required": m.cpu_cores_required,
+                "ram_gb_required": m.ram_gb_required,
+                "gpu_count_required": m.gpu_count_required,
+                "gpu_memory_gb_required": m.gpu_memory_gb_required,
+                "min_cuda_version_required": m.min_cuda_version_required,
+            }
+            for m in page_obj.object_list
+        ],
+    }
@@ -1,25 +1,71 @@
-import requests
+import hashlib
+import json
 
 from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
 
 from lumenix.models import ScioModel
+from lumenix.services.conditional_fetch import ConditionalFetch, fetch_json_if_changed, remember_fetch
 
 URL = settings.SCIO_MODELS_API_URL
+BULK_BATCH_SIZE = 1000
 
+SYNCED_FIELDS = (
+    "name", "source_url", "image_tag",
+    "cpu_cores_required", "ram_gb_required", "gpu_count_required", "gpu_memory_gb_required",
+    "min_cuda_version_required", "min_cuda_version_code", "source_timestamp", "source_date_ms",
+    "content_hash", "status", "deleted_at",
+)
 
-def fetch_models() -> dict:
-    response = requests.get(URL, headers={"Accept": "application/json"}, timeout=120)
-    response.raise_for_status()
-    return response.json()
 
+def cuda_version_code(value) -> int | None:
+    """'12.1' -> 12001, '11' -> 11000; ``None`` for empty or unparseable versions."""
+    parts = str(value or "").strip().lstrip("vV").split(".")
+    try:
+        major = int(parts[0])
+        minor = int(parts[1]) if len(parts) > 1 and parts[1] else 0
+    except ValueError:
+        return None
+    if major < 0 or minor < 0:
+        return None
+    return major * 1000 + min(minor, 999)
+
+
+def _hash_model(fields: dict) -> str:
+    """Stable SHA256 over the persisted model fields."""
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def fetch_models(force: bool = False) -> ConditionalFetch:
+    return fetch_json_if_changed(URL, timeout=120, force=force)
+
+
+def sync_models(reset: bool = False, force: bool = False) -> dict:
+    """
+    Upsert the model registry. The fetch happens outside the write transaction, and
+    the writes are one pre-load plus bulk inserts/updates rather than a locked
+    get_or_create per model.
+    """
+    fetched = fetch_models(force=force or reset)
+    if fetched.not_modified:
+        return {
+            "created": 0,
+            "updated": 0,
+            "unchanged": 0,
+            "deleted": 0,
+            "fetched": 0,
+            "deduped": 0,
+            "not_modified": True,
+        }
+    rows = fetched.data.get("models", []) or []
+    summary = _apply_models(rows, reset=reset)
+    remember_fetch(fetched)
+    return {**summary, "fetched": len(rows), "not_modified": False}
 
-@transaction.atomic
-def sync_models(reset: bool = False) -> dict:
-    data = fetch_models()
-    rows = data.get("models", []) or []
 
+@transaction.atomic
+def _apply_models(rows: list, reset: bool = False) -> dict:
     if reset:
         ScioModel.objects.all().delete()
 
@@ -30,11 +76,21 @@ def sync_models(reset: bool = False) -> dict:
         if model_id:
             deduped_by_id[model_id] = raw
 
-    created, updated, unchanged = 0, 0, 0
+    # One query for the current state; unchanged models are skipped on content_hash alone.
+    existing = {
+        external_id: (pk, content_hash, status, deleted_at)
+        for external_id, pk, content_hash, status, deleted_at in (
+            ScioModel.objects.values_list("external_id", "pk", "content_hash", "status", "deleted_at")
+        )
+    }
+
+    now = timezone.now()
+    to_create, to_update = [], []
+    unchanged = 0
 
     for model_id, raw in deduped_by_id.items():
         source_obj = raw.get("_id") or {}
-        defaults = {
+        fields = {
             "name": (raw.get("name") or "").strip(),
             "source_url": (raw.get("url") or "").strip(),
             "image_tag": (raw.get("image_tag") or "").strip(),
@@ -43,29 +99,36 @@ def sync_models(reset: bool = False) -> dict:
             "gpu_count_required": int(raw.get("gpu_count_required") or 0),
             "gpu_memory_gb_required": float(raw.get("gpu_memory_gb_required") or 0.0),
             "min_cuda_version_required": raw.get("min_cuda_version_required") or None,
+            "min_cuda_version_code": cuda_version_code(raw.get("min_cuda_version_required")),
             "source_timestamp": source_obj.get("timestamp"),
             "source_date_ms": source_obj.get("date"),
-            "status": 1,
-            "deleted_at": None,
         }
-
-        obj, was_created = ScioModel.objects.select_for_update().get_or_create(
+        content_hash = _hash_model(fields)
+        obj = ScioModel(
             external_id=model_id,
-            defaults=defaults,
+            **fields,
+            content_hash=content_hash,
+            status=1,
+            deleted_at=None,
+            updated_at=now,
         )
-        if was_created:
-            created += 1
+
+        current = existing.get(model_id)
+        if current is None:
+            to_create.append(obj)
             continue
 
-        changed = any(getattr(obj, field) != value for field, value in defaults.items())
-        if changed:
-            for field, value in defaults.items():
-                setattr(obj, field, value)
-            obj.save(update_fields=[*defaults.keys(), "updated_at"])
-            updated += 1
+        pk, current_hash, status, deleted_at = current
+        if current_hash != content_hash or status != 1 or deleted_at is not None:
+            obj.pk = pk
+            to_update.append(obj)
         else:
             unchanged += 1
 
+    ScioModel.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+    ScioModel.objects.bulk_update(to_update, [*SYNCED_FIELDS, "updated_at"], batch_size=BULK_BATCH_SIZE)
+    created, updated = len(to_create), len(to_update)
+
     deleted = (
         ScioModel.objects
         .filter(status=1)
@@ -78,6 +141,5 @@ def sync_models(reset: bool = False) -> dict:
         "updated": updated,
         "unchanged": unchanged,
         "deleted": deleted,
-        "fetched": len(rows),
         "deduped": len(deduped_by_id),
     }
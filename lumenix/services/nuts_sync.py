@@ -1,31 +1,25 @@
-import requests
-
 from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
 
 from lumenix.models import NutsRegion
+from lumenix.services.conditional_fetch import ConditionalFetch, fetch_json_if_changed, remember_fetch
 
 BASE = settings.SCIO_NUTS_API_BASE.rstrip("/")
+NUTS_LEVELS = (0, 1, 2, 3)
+BULK_BATCH_SIZE = 1000
 
+# Columns compared (and written) per region; status/deleted_at are reset on every seen row.
+SYNCED_FIELDS = ("notation", "level", "pref_label", "alt_labels_en", "status", "deleted_at")
 
-def fetch_nuts(level: int) -> dict:
-    r = requests.get(f"{BASE}/{level}", headers={"Accept": "application/json"}, timeout=60)
-    r.raise_for_status()
-    return r.json()
-
-
-@transaction.atomic
-def sync_nuts(level: int, reset: bool = False) -> dict:
-    data = fetch_nuts(level)
-    rows = data.get("levels", []) or []
 
-    if reset:
-        NutsRegion.objects.filter(level=level).delete()
+def fetch_nuts(level: int, force: bool = False) -> ConditionalFetch:
+    return fetch_json_if_changed(f"{BASE}/{level}", timeout=60, force=force)
 
-    created, updated, unchanged = 0, 0, 0
-    seen_iris = set()
 
+def _normalize_rows(level: int, rows: list) -> dict:
+    """Map API rows of one level to ``{iri: defaults}``; rows without iri/notation are dropped."""
+    by_iri = {}
     for raw in rows:
         iri = (raw.get("iri") or "").strip()
         notation = (raw.get("notation") or "").strip()
@@ -41,9 +35,8 @@ def sync_nuts(level: int, reset: bool = False) -> dict:
 
         if not iri or not notation:
             continue
-        seen_iris.add(iri)
 
-        defaults = {
+        by_iri[iri] = {
             "notation": notation,
             "level": item_level,
             "pref_label": pref_label,
@@ -51,40 +44,78 @@ def sync_nuts(level: int, reset: bool = False) -> dict:
             "status": 1,
             "deleted_at": None,
         }
-
-        obj, was_created = NutsRegion.objects.select_for_update().get_or_create(
-            iri=iri,
-            defaults=defaults,
-        )
-        if was_created:
-            created += 1
-            continue
-
-        changed = (
-            obj.notation != notation
-            or obj.level != item_level
-            or obj.pref_label != pref_label
-            or obj.alt_labels_en != alt_labels_en
-            or obj.status != 1
-            or obj.deleted_at is not None
-        )
-        if changed:
-            obj.notation = notation
-            obj.level = item_level
-            obj.pref_label = pref_label
-            obj.alt_labels_en = alt_labels_en
-            obj.status = 1
-            obj.deleted_at = None
-            obj.save(update_fields=["notation", "level", "pref_label", "alt_labels_en", "status", "deleted_at", "updated_at"])
-            updated += 1
-        else:
-            unchanged += 1
-
-    deleted = (
-        NutsRegion.objects
-        .filter(level=level, status=1)
-        .exclude(iri__in=list(seen_iris))
-        .update(status=2, deleted_at=timezone.now())
-    )
-
-    return {"created": created, "updated": updated, "unchanged": unchanged, "deleted": deleted, "fetched": len(rows)}
+    return by_iri
+
+
+def sync_nuts_levels(levels=NUTS_LEVELS, reset: bool = False, force: bool = False) -> dict:
+    """
+    Sync several NUTS levels in one pass: one fetch per level, one query to load the
+    existing regions, an in-memory diff keyed by IRI, then bulk inserts/updates.
+
+    Returns per-level summaries under ``"levels"`` plus the summed counts.
+    """
+    levels = [int(level) for level in levels]
+    fetched_by_level = {level: fetch_nuts(level, force=force or reset) for level in levels}
+    changed_levels = [level for level, fetched in fetched_by_level.items() if not fetched.not_modified]
+
+    results = {
+        level: {"created": 0, "updated": 0, "unchanged": 0, "deleted": 0, "fetched": 0, "not_modified": True}
+        for level in levels
+    }
+
+    if changed_levels:
+        incoming = {}
+        for level in changed_levels:
+            rows = fetched_by_level[level].data.get("levels", []) or []
+            results[level].update(fetched=len(rows), not_modified=False)
+            for iri, defaults in _normalize_rows(level, rows).items():
+                incoming[iri] = (level, defaults)
+
+        with transaction.atomic():
+            if reset:
+                NutsRegion.objects.filter(level__in=changed_levels).delete()
+
+            existing = {obj.iri: obj for obj in NutsRegion.objects.filter(iri__in=list(incoming))}
+
+            now = timezone.now()
+            to_create, to_update = [], []
+            for iri, (level, defaults) in incoming.items():
+                obj = existing.get(iri)
+                if obj is None:
+                    to_create.append(NutsRegion(iri=iri, **defaults))
+                    results[level]["created"] += 1
+                elif any(getattr(obj, field) != value for field, value in defaults.items()):
+                    for field, value in defaults.items():
+                        setattr(obj, field, value)
+                    obj.updated_at = now
+                    to_update.append(obj)
+                    results[level]["updated"] += 1
+                else:
+                    results[level]["unchanged"] += 1
+
+            NutsRegion.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+            NutsRegion.objects.bulk_update(to_update, [*SYNCED_FIELDS, "updated_at"], batch_size=BULK_BATCH_SIZE)
+
+            seen_by_level = {level: [] for level in changed_levels}
+            for iri, (level, _) in incoming.items():
+                seen_by_level[level].append(iri)
+            for level in changed_levels:
+                results[level]["deleted"] = (
+                    NutsRegion.objects
+                    .filter(level=level, status=1)
+                    .exclude(iri__in=seen_by_level[level])
+                    .update(status=2, deleted_at=now)
+                )
+
+        for level in changed_levels:
+            remember_fetch(fetched_by_level[level])
+
+    totals = {
+        key: sum(res[key] for res in results.values())
+        for key in ("created", "updated", "unchanged", "deleted", "fetched")
+    }
+    return {**totals, "not_modified": not changed_levels, "levels": results}
+
+
+def sync_nuts(level: int, reset: bool = False, force: bool = False) -> dict:
+    return sync_nuts_levels([level], reset=reset, force=force)["levels"][int(level)]
@@ -0,0 +1,69 @@
+# lumenix/services/nuts_tiles.py
+
+from django.db import connection
+
+# Web-Mercator world width in metres; one tile at zoom z spans WORLD_M / 2**z.
+WORLD_M = 40075016.68
+TILE_EXTENT = 4096
+MAX_ZOOM = 14
+
+# Simplify to roughly half a screen pixel of a 256px tile, so tiles stay small at low zoom
+# without visible artefacts.
+SIMPLIFY_PIXELS = 0.5
+
+TILE_SQL = """
+WITH bounds AS (
+    SELECT ST_TileEnvelope(%(z)s, %(x)s, %(y)s) AS env
+),
+mvtgeom AS (
+    SELECT
+        ST_AsMVTGeom(
+            ST_SimplifyPreserveTopology(ST_Transform(r.geom, 3857), %(tolerance)s),
+            bounds.env, %(extent)s, 64, true
+        ) AS geom,
+        r.notation AS nuts_id,
+        r.level AS level,
+        r.pref_label AS name
+    FROM nuts_regions AS r, bounds
+    WHERE r.status = 1
+      AND r.level = %(level)s
+      AND r.geom IS NOT NULL
+      AND r.geom && ST_Transform(bounds.env, 4326)
+)
+SELECT ST_AsMVT(mvtgeom.*, 'nuts', %(extent)s, 'geom') FROM mvtgeom WHERE geom IS NOT NULL;
+"""
+
+
+def default_level_for_zoom(z: int) -> int:
+    """Coarse levels when zoomed out, NUTS-3 only once regions are big enough to see."""
+    if z <= 3:
+        return 0
+    if z <= 5:
+        return 1
+    if z <= 7:
+        return 2
+    return 3
+
+
+def simplify_tolerance(z: int) -> float:
+    return WORLD_M / (2 ** z) / 256 * SIMPLIFY_PIXELS
+
+
+def render_nuts_tile(z: int, x: int, y: int, level: int | None = None) -> bytes:
+    """Return one Mapbox Vector Tile (layer ``nuts``) built by PostGIS ``ST_AsMVT``."""
+    if level is None:
+        level = default_level_for_zoom(z)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            TILE_SQL,
+            {
+                "z": z,
+                "x": x,
+                "y": y,
+                "level": level,
+                "tolerance": simplify_tolerance(z),
+                "extent": TILE_EXTENT,
+            },
+        )
+        row = cursor.fetchone()
+    return bytes(row[0]) if row and row[0] else b""
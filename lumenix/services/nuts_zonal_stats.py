@@ -0,0 +1,242 @@
+# lumenix/services/nuts_zonal_stats.py
+
+from collections import defaultdict
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from lumenix.models import NutsCellWeight, NutsClimateDaily
+from lumenix.services.climate_grid import CLIMATE_VARIABLES
+from lumenix.services.climate_store import ClimateGridStore
+
+GRID_RESOLUTION = float(getattr(settings, "CLIMATE_GRID_RESOLUTION", 0.25))
+BULK_BATCH_SIZE = 2000
+
+# Area of every region/cell-square intersection, computed once in PostGIS. Cell centres
+# are passed as arrays; the regions' GIST index answers the && probe per cell.
+CELL_OVERLAP_SQL = """
+WITH cells AS (
+    SELECT lon, lat, ST_MakeEnvelope(lon - %(half)s, lat - %(half)s, lon + %(half)s, lat + %(half)s, 4326) AS env
+    FROM unnest(%(lons)s::float8[], %(lats)s::float8[]) AS t(lon, lat)
+)
+SELECT r.id, cells.lon, cells.lat, ST_Area(ST_Intersection(r.geom, cells.env)::geography) AS area
+FROM nuts_regions AS r
+JOIN cells ON r.geom && cells.env
+WHERE r.status = 1 AND r.geom IS NOT NULL {level_filter};
+"""
+
+LATEST_CELLS_SQL = """
+SELECT ST_X(location::geometry), ST_Y(location::geometry)
+FROM climate_data
+WHERE status = 1 AND location IS NOT NULL
+  AND timestamp = (SELECT MAX(timestamp) FROM climate_data WHERE status = 1);
+"""
+
+DAY_ROWS_SQL = """
+SELECT ST_X(location::geometry), ST_Y(location::geometry), {columns}
+FROM climate_data
+WHERE status = 1 AND location IS NOT NULL AND timestamp >= %s AND timestamp < %s;
+"""
+
+
+def _nearest_index(axis: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Index of the nearest entry of the sorted ``axis`` for each of ``values``."""
+    if axis.size == 1:
+        return np.zeros(values.shape, dtype=int)
+    right = np.clip(np.searchsorted(axis, values), 1, axis.size - 1)
+    left = right - 1
+    return np.where(np.abs(values - axis[left]) <= np.abs(axis[right] - values), left, right)
+
+
+def _flat_cell_index(lat: np.ndarray, lon: np.ndarray, cell_lat: np.ndarray, cell_lon: np.ndarray) -> np.ndarray:
+    return _nearest_index(lat, cell_lat) * lon.size + _nearest_index(lon, cell_lon)
+
+
+def _use_grid_store() -> bool:
+    return getattr(settings, "CLIMATE_STORAGE_BACKEND", "rows") == "grid"
+
+
+def grid_axes(store: ClimateGridStore | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """Sorted latitude and longitude axes of the climate grid (grid store or climate_data)."""
+    if _use_grid_store():
+        grid = (store or ClimateGridStore()).grid()
+        if grid is None:
+            raise LookupError("The climate grid store is empty.")
+        return np.sort(grid[0]), np.sort(grid[1])
+    with connection.cursor() as cursor:
+        cursor.execute(LATEST_CELLS_SQL)
+        rows = cursor.fetchall()
+    if not rows:
+        raise LookupError("No climate data loaded.")
+    cells = np.asarray(rows, dtype="f8")
+    return np.unique(cells[:, 1]), np.unique(cells[:, 0])
+
+
+def build_cell_weights(levels=None, store: ClimateGridStore | None = None) -> int:
+    """
+    Rebuild NutsCellWeight: for every region, the fraction of its area inside each
+    ``GRID_RESOLUTION`` square around a grid cell centre. Returns the rows written.
+    """
+    lat, lon = grid_axes(store)
+    lon_grid, lat_grid = np.meshgrid(lon, lat)
+    level_filter = ""
+    params = {"half": GRID_RESOLUTION / 2, "lons": lon_grid.ravel().tolist(), "lats": lat_grid.ravel().tolist()}
+    if levels is not None:
+        level_filter = "AND r.level = ANY(%(levels)s)"
+        params["levels"] = [int(level) for level in levels]
+
+    with connection.cursor() as cursor:
+        cursor.execute(CELL_OVERLAP_SQL.format(level_filter=level_filter), params)
+        overlaps = cursor.fetchall()
+
+    total_by_region = defaultdict(float)
+    for region_id, _, _, area in overlaps:
+        total_by_region[region_id] += area or 0.0
+    rows = [
+        NutsCellWeight(region_id=region_id, lon=cell_lon, lat=cell_lat, weight=area / total_by_region[region_id])
+        for region_id, cell_lon, cell_lat, area in overlaps
+        if area and total_by_region[region_id] > 0
+    ]
+
+    with transaction.atomic():
+        stale = NutsCellWeight.objects.all()
+        if levels is not None:
+            stale = stale.filter(region__level__in=params["levels"])
+        stale.delete()
+        NutsCellWeight.objects.bulk_create(rows, batch_size=BULK_BATCH_SIZE)
+    return len(rows)
+
+
+class _WeightMatrix:
+    """Cell weights sorted by region, as flat arrays for bincount / reduceat."""
+
+    def __init__(self, lat: np.ndarray, lon: np.ndarray):
+        weights = list(NutsCellWeight.objects.order_by("region_id").values_list("region_id", "lon", "lat", "weight"))
+        if not weights:
+            raise LookupError("No NUTS cell weights; run build_cell_weights first.")
+        data = np.asarray(weights, dtype="f8")
+        self.region_ids, positions = np.unique(data[:, 0].astype("int64"), return_inverse=True)
+        self.positions = positions
+        self.starts = np.flatnonzero(np.r_[True, positions[1:] != positions[:-1]])
+        self.weight = data[:, 3]
+        self.cell_index = _flat_cell_index(lat, lon, data[:, 2], data[:, 1])
+
+    def reduce(self, frame: np.ndarray) -> dict:
+        """Weighted mean, min, max and valid-cell count per region for one flattened frame."""
+        values = frame[self.cell_index]
+        valid = ~np.isnan(values)
+        n = self.region_ids.size
+        weight_sum = np.bincount(self.positions, weights=np.where(valid, self.weight, 0.0), minlength=n)
+        value_sum = np.bincount(self.positions, weights=np.where(valid, self.weight * values, 0.0), minlength=n)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(weight_sum > 0, value_sum / weight_sum, np.nan)
+        low = np.minimum.reduceat(np.where(valid, values, np.inf), self.starts)
+        high = np.maximum.reduceat(np.where(valid, values, -np.inf), self.starts)
+        cells = np.bincount(self.positions, weights=valid.astype("f8"), minlength=n).astype(int)
+        return {
+            "mean": mean,
+            "min": np.where(np.isfinite(low), low, np.nan),
+            "max": np.where(np.isfinite(high), high, np.nan),
+            "cells": cells,
+        }
+
+
+def _daily_frames_from_store(store: ClimateGridStore, variables, start, end):
+    """Yield ``(date, {variable: flat frame})`` with frames on the sorted axes, averaged per day."""
+    store_lat, store_lon = store.grid()
+    lat_order, lon_order = np.argsort(store_lat), np.argsort(store_lon)
+    range_start = pd.Timestamp(start, tz="UTC")
+    range_end = pd.Timestamp(end, tz="UTC") + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+    days = sorted({
+        pd.Timestamp(t).date()
+        for variable in variables
+        for t in store.timestamps(variable, range_start, range_end)
+    })
+    for day in days:
+        day_start = pd.Timestamp(day, tz="UTC")
+        day_end = day_start + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+        frames = {}
+        for variable in variables:
+            selection = store.read_bbox(
+                variable, (store_lon.min(), store_lat.min(), store_lon.max(), store_lat.max()), day_start, day_end
+            )
+            if selection.values.shape[0]:
+                with np.errstate(invalid="ignore"):
+                    frame = np.nanmean(selection.values.astype("f8"), axis=0)
+                frames[variable] = frame[np.ix_(lat_order, lon_order)].ravel()
+        yield day, frames
+
+
+def _daily_frames_from_rows(variables, start, end, lat, lon):
+    """Same as :func:`_daily_frames_from_store`, read one day at a time from climate_data."""
+    sql = DAY_ROWS_SQL.format(columns=", ".join(variables))
+    day = start
+    while day <= end:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [pd.Timestamp(day, tz="UTC"), pd.Timestamp(day + timedelta(days=1), tz="UTC")])
+            rows = cursor.fetchall()
+        if rows:
+            data = np.asarray(rows, dtype="f8")
+            flat = _flat_cell_index(lat, lon, data[:, 1], data[:, 0])
+            frames = {}
+            for k, variable in enumerate(variables):
+                sums = np.bincount(flat, weights=np.nan_to_num(data[:, 2 + k]), minlength=lat.size * lon.size)
+                counts = np.bincount(flat, weights=~np.isnan(data[:, 2 + k]), minlength=lat.size * lon.size)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    frames[variable] = np.where(counts > 0, sums / counts, np.nan)
+            yield day, frames
+        day += timedelta(days=1)
+
+
+def _clean(value):
+    return None if np.isnan(value) else round(float(value), 2)
+
+
+def compute_zonal_stats(start, end, variables=None, store: ClimateGridStore | None = None) -> dict:
+    """
+    Upsert NutsClimateDaily for every region with cell weights and every date in
+    ``[start, end]`` (``date`` objects). Each day is one vectorized pass per variable:
+    gather the region cells, ``bincount`` the weighted sums, ``reduceat`` min/max.
+    """
+    variables = [v for v in (variables or CLIMATE_VARIABLES) if v in CLIMATE_VARIABLES]
+    store = store or ClimateGridStore()
+    lat, lon = grid_axes(store)
+    matrix = _WeightMatrix(lat, lon)
+
+    if _use_grid_store():
+        days = _daily_frames_from_store(store, variables, start, end)
+    else:
+        days = _daily_frames_from_rows(variables, start, end, lat, lon)
+
+    written = dates = 0
+    for day, frames in days:
+        rows = []
+        for variable, frame in frames.items():
+            stats = matrix.reduce(frame)
+            rows.extend(
+                NutsClimateDaily(
+                    region_id=int(region_id),
+                    date=day,
+                    variable=variable,
+                    mean=_clean(stats["mean"][i]),
+                    min=_clean(stats["min"][i]),
+                    max=_clean(stats["max"][i]),
+                    cells=int(stats["cells"][i]),
+                )
+                for i, region_id in enumerate(matrix.region_ids)
+            )
+        with transaction.atomic():
+            NutsClimateDaily.objects.bulk_create(
+                rows,
+                batch_size=BULK_BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=["region", "date", "variable"],
+                update_fields=["mean", "min", "max", "cells"],
+            )
+        written += len(rows)
+        dates += 1
+    return {"dates": dates, "rows": written, "regions": int(matrix.region_ids.size)}
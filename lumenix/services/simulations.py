@@ -0,0 +1,432 @@
+import logging
+import random
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import requests
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from lumenix.models import (
+    ClimateModelChoices,
+    SimulationKey,
+    SimulationResult,
+    SimulationRun,
+    SimulationSeries,
+    TimeScale,
+)
+
+URL = settings.SCIO_SIMULATION_API_URL
+STALE_AFTER = timedelta(seconds=max(60, int(getattr(settings, "SCIO_SIMULATION_STALE_SECONDS", 6 * 60 * 60))))
+DEFAULT_SIMULATION_TYPE = "disease-risk"
+IN_FLIGHT_STATUSES = ("submitted", "queued", "in_progress")
+POLL_BASE_SECONDS = max(1, int(getattr(settings, "SCIO_SIMULATION_POLL_BASE_SECONDS", 30)))
+POLL_MAX_SECONDS = max(POLL_BASE_SECONDS, int(getattr(settings, "SCIO_SIMULATION_POLL_MAX_SECONDS", 1800)))
+STATUS_BATCH_URL = getattr(settings, "SCIO_SIMULATION_STATUS_BATCH_URL", "")
+RESULT_STORAGE = getattr(settings, "SCIO_SIMULATION_RESULT_STORAGE", "array")
+# Submission runs while holding the SimulationKey row lock, so keep it short.
+SUBMIT_TIMEOUT_SECONDS = 10
+
+# Column names of the two numeric result columns, per simulation type.
+RESULT_HEADERS = {
+    "disease-risk": ("time_index", "risk_score"),
+}
+logger = logging.getLogger(__name__)
+
+
+def result_headers(simulation_type: str) -> tuple[str, str]:
+    return RESULT_HEADERS.get(simulation_type, ("x", "y"))
+
+
+def parse_simulation_request(payload: dict) -> dict:
+    """
+    Validate a dashboard simulation request into SimulationKey fields.
+    ``time_period`` is ``[start, end]`` as ISO dates. Raises ``ValueError``.
+    """
+    missing = [key for key in ("crop", "nuts_id", "climate_model", "time_period", "time_scale") if not payload.get(key)]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+
+    period = payload["time_period"]
+    if not isinstance(period, (list, tuple)) or not period:
+        raise ValueError("time_period must be [start, end].")
+    try:
+        start, end = date.fromisoformat(str(period[0])), date.fromisoformat(str(period[-1]))
+    except ValueError:
+        raise ValueError("time_period dates must be YYYY-MM-DD.")
+    if start > end:
+        raise ValueError("time_period start must not be after its end.")
+
+    climate_model = str(payload["climate_model"]).strip()
+    if climate_model not in ClimateModelChoices.values:
+        raise ValueError(f"climate_model must be one of: {', '.join(ClimateModelChoices.values)}.")
+    time_scale = str(payload["time_scale"]).strip().lower()
+    if time_scale not in TimeScale.values:
+        raise ValueError(f"time_scale must be one of: {', '.join(TimeScale.values)}.")
+
+    return {
+        "simulation_type": str(payload.get("simulation_type") or DEFAULT_SIMULATION_TYPE).strip(),
+        "crop": str(payload["crop"]).strip(),
+        "nuts_id": str(payload["nuts_id"]).strip().upper(),
+        "climate_model": climate_model,
+        "time_scale": time_scale,
+        "time_period_start": start,
+        "time_period_end": end,
+    }
+
+
+def _api_payload(key: SimulationKey) -> dict:
+    return {
+        "crop": key.crop,
+        "nuts_id": key.nuts_id,
+        "climate_model": key.climate_model,
+        "time_period": [key.time_period_start.isoformat(), key.time_period_end.isoformat()],
+        "time_scale": key.time_scale,
+    }
+
+
+def submit_simulation(key: SimulationKey) -> dict:
+    response = requests.post(
+        f"{URL}/{key.simulation_type}",
+        json=_api_payload(key),
+        headers={"Accept": "application/json", "Content-Type": "application/json"},
+        timeout=SUBMIT_TIMEOUT_SECONDS,
+    )
+    response.raise_for_status()
+    data = response.json() or {}
+    if not data.get("job_id"):
+        raise ValueError(f"Simulation API accepted the request but returned no job_id: {data}")
+    return data
+
+
+def fetch_simulation(job_id: str) -> dict:
+    response = requests.get(f"{URL}/{job_id}", headers={"Accept": "application/json"}, timeout=20)
+    response.raise_for_status()
+    return response.json() or {}
+
+
+def fetch_simulation_statuses(job_ids) -> dict[str, dict]:
+    """
+    Status payloads for several jobs in one call to ``SCIO_SIMULATION_STATUS_BATCH_URL``
+    (a list of job payloads, or ``{"jobs": [...]}``), keyed by job id.
+    """
+    response = requests.post(
+        STATUS_BATCH_URL,
+        json={"job_ids": list(job_ids)},
+        headers={"Accept": "application/json", "Content-Type": "application/json"},
+        timeout=30,
+    )
+    response.raise_for_status()
+    data = response.json() or []
+    jobs = (data.get("jobs") or []) if isinstance(data, dict) else data
+    return {job["job_id"]: job for job in jobs if isinstance(job, dict) and job.get("job_id")}
+
+
+def replace_results(run: SimulationRun, rows) -> int:
+    """Replace the run's stored series with ``rows`` of ``[x, y]`` (one upsert in array storage)."""
+    if RESULT_STORAGE == "rows":
+        SimulationSeries.objects.filter(job=run).delete()
+        SimulationResult.objects.filter(job=run).delete()
+        bulk = [
+            SimulationResult(
+                job=run,
+                idx=i,
+                x=row[0] if len(row) > 0 else None,
+                y=row[1] if len(row) > 1 else None,
+            )
+            for i, row in enumerate(rows or [])
+        ]
+        SimulationResult.objects.bulk_create(bulk, batch_size=1000)
+        return len(bulk)
+
+    series = SimulationSeries.from_rows(run, rows)
+    if not series.points:
+        # An empty series would make the run look cached while having nothing to serve.
+        SimulationSeries.objects.filter(job=run).delete()
+        SimulationResult.objects.filter(job=run).delete()
+        return 0
+    SimulationSeries.objects.bulk_create(
+        [series],
+        update_conflicts=True,
+        unique_fields=["job"],
+        update_fields=["x", "y", "updated_at"],
+    )
+    # Drop any per-point rows the run had before it moved to array storage.
+    SimulationResult.objects.filter(job=run).delete()
+    return series.points
+
+
+def run_arrays(run: SimulationRun) -> tuple[np.ndarray, np.ndarray] | None:
+    """The run's series as float64 ``(x, y)`` arrays (NaN for gaps); ``None`` when nothing is stored."""
+    series = SimulationSeries.objects.filter(job=run).first()
+    if series is not None and series.points:
+        return series.as_arrays()
+    rows = list(SimulationResult.objects.filter(job=run).order_by("idx").values_list("x", "y"))
+    if not rows:
+        return None
+    data = np.asarray(rows, dtype="f8")
+    return data[:, 0], data[:, 1]
+
+
+def run_frame(run: SimulationRun) -> pd.DataFrame | None:
+    """The run's series as a DataFrame named after the simulation type's result headers."""
+    arrays = run_arrays(run)
+    if arrays is None:
+        return None
+    x_name, y_name = result_headers(run.sim_key.simulation_type)
+    return pd.DataFrame({x_name: arrays[0], y_name: arrays[1]})
+
+
+def _json_values(values: np.ndarray) -> list:
+    return [None if np.isnan(v) else float(v) for v in values]
+
+
+def run_results(run: SimulationRun) -> dict | None:
+    """The run's series as columnar ``x`` / ``y`` lists; ``None`` when nothing is stored."""
+    arrays = run_arrays(run)
+    if arrays is None:
+        return None
+    return {"x": _json_values(arrays[0]), "y": _json_values(arrays[1])}
+
+
+def store_simulation_response(run: SimulationRun, data: dict) -> SimulationRun:
+    """Record the upstream status of ``run`` and, once it has them, its results."""
+    metadata = data.get("metadata") or {}
+    run.status = (data.get("status") or run.status or "").lower()
+    run.submission_timestamp = metadata.get("submission_timestamp") or run.submission_timestamp
+    run.completion_timestamp = metadata.get("completion_timestamp") or run.completion_timestamp
+    with transaction.atomic():
+        run.save(update_fields=["status", "submission_timestamp", "completion_timestamp", "updated_at"])
+        if data.get("results"):
+            replace_results(run, data["results"])
+    return run
+
+
+def refresh_run(run: SimulationRun) -> SimulationRun:
+    """Fetch the run's current status (and results) from the simulation API."""
+    return store_simulation_response(run, fetch_simulation(run.job_id))
+
+
+def completed_run(key: SimulationKey) -> SimulationRun | None:
+    """Most recent completed run of ``key`` that has results stored."""
+    return (
+        key.runs.filter(status="completed")
+        .filter(Q(series__x__len__gt=0) | Q(results__isnull=False))
+        .order_by("-updated_at")
+        .distinct()
+        .first()
+    )
+
+
+def in_flight_run(key: SimulationKey) -> SimulationRun | None:
+    """Most recent run of ``key`` still being computed upstream and not yet considered lost."""
+    return (
+        key.runs.filter(status__in=IN_FLIGHT_STATUSES, created_at__gte=timezone.now() - STALE_AFTER)
+        .order_by("-created_at")
+        .first()
+    )
+
+
+def request_simulation(fields: dict, force: bool = False) -> tuple[SimulationRun, str]:
+    """
+    Resolve a simulation request to a run, submitting upstream only when necessary.
+
+    Returns ``(run, source)`` where ``source`` is ``"cache"`` (a completed run of the
+    same request hash), ``"in_flight"`` (joined an identical pending submission) or
+    ``"submitted"``. Submission happens under a row lock on the SimulationKey, so
+    concurrent identical requests wait for the first one and then join its run
+    instead of submitting duplicates. ``force`` skips the completed-run cache.
+    """
+    key, _ = SimulationKey.objects.get_or_create(**fields)
+    if not force:
+        cached = completed_run(key)
+        if cached is not None:
+            return cached, "cache"
+
+    with transaction.atomic():
+        key = SimulationKey.objects.select_for_update().get(pk=key.pk)
+        if not force:
+            cached = completed_run(key)
+            if cached is not None:
+                return cached, "cache"
+        pending = in_flight_run(key)
+        if pending is not None:
+            return pending, "in_flight"
+
+        # Deliberately submitted with the row lock held (single-flight): identical
+        # requests block here for at most SUBMIT_TIMEOUT_SECONDS and then join this
+        # run instead of submitting a duplicate job.
+        data = submit_simulation(key)
+        run = SimulationRun.objects.create(
+            job_id=data["job_id"],
+            sim_key=key,
+            status=(data.get("status") or "submitted").lower(),
+            next_poll_at=timezone.now() + poll_delay(0),
+        )
+    logger.info("Submitted simulation job=%s request_hash=%s", run.job_id, key.request_hash)
+    return run, "submitted"
+
+
+def latest_run(key: SimulationKey) -> SimulationRun | None:
+    """The run that answers ``key`` right now: completed with results, else the newest one."""
+    return completed_run(key) or key.runs.order_by("-updated_at").first()
+
+
+def simulation_summary(run: SimulationRun, source: str | None = None) -> dict:
+    """JSON-ready description of ``run`` with its results once completed."""
+    key = run.sim_key
+    summary = {
+        "request_hash": key.request_hash,
+        "job_id": run.job_id,
+        "status": run.status,
+        "request": {
+            "simulation_type": key.simulation_type,
+            **_api_payload(key),
+        },
+        "updated_at": run.updated_at.isoformat() if run.updated_at else None,
+    }
+    if source:
+        summary["source"] = source
+    if run.status == "completed":
+        results = run_results(run)
+        if results is not None:
+            summary["columns"] = list(result_headers(key.simulation_type))
+            summary["results"] = results
+    return summary
+
+
+def align_on_x(series: dict) -> tuple[np.ndarray, dict]:
+    """
+    Align ``{name: (x, y)}`` arrays on the sorted union of their x values; each name
+    gets a y array over that axis with NaN where it has no point.
+    """
+    xs = [x[~np.isnan(x)] for x, _ in series.values()]
+    axis = np.unique(np.concatenate(xs)) if xs else np.empty(0)
+    aligned = {}
+    for name, (x, y) in series.items():
+        valid = ~np.isnan(x)
+        column = np.full(axis.size, np.nan)
+        column[np.searchsorted(axis, x[valid])] = y[valid]
+        aligned[name] = column
+    return axis, aligned
+
+
+def compare_scenarios(fields: dict, climate_models, force: bool = False) -> dict:
+    """
+    Resolve one request per climate model (all other SimulationKey fields shared)
+    through :func:`request_simulation`, so completed scenarios come from the cache
+    and only the missing ones are submitted, then align the completed series on x.
+    """
+    scenarios, arrays = {}, {}
+    for climate_model in climate_models:
+        entry = {"climate_model": climate_model}
+        try:
+            run, source = request_simulation({**fields, "climate_model": climate_model}, force=force)
+        except (requests.RequestException, ValueError) as exc:
+            entry.update(status="error", error=str(exc))
+            scenarios[climate_model] = entry
+            continue
+        entry.update(
+            request_hash=run.sim_key.request_hash,
+            job_id=run.job_id,
+            status=run.status,
+            source=source,
+        )
+        result = run_arrays(run) if run.status == "completed" else None
+        if result is not None:
+            arrays[climate_model] = result
+        scenarios[climate_model] = entry
+
+    axis, aligned = align_on_x(arrays)
+    x_name, y_name = result_headers(fields["simulation_type"])
+    return {
+        "request": {
+            "simulation_type": fields["simulation_type"],
+            "crop": fields["crop"],
+            "nuts_id": fields["nuts_id"],
+            "time_period": [fields["time_period_start"].isoformat(), fields["time_period_end"].isoformat()],
+            "time_scale": fields["time_scale"],
+        },
+        "columns": [x_name, *aligned],
+        "value": y_name,
+        "x": _json_values(axis),
+        "values": {name: _json_values(column) for name, column in aligned.items()},
+        "scenarios": scenarios,
+        "complete": len(aligned) == len(scenarios),
+    }
+
+
+def poll_delay(attempts: int) -> timedelta:
+    """Exponential backoff with +-20% jitter, so runs submitted together spread out."""
+    seconds = min(POLL_MAX_SECONDS, POLL_BASE_SECONDS * 2 ** min(attempts, 16))
+    return timedelta(seconds=seconds * random.uniform(0.8, 1.2))
+
+
+def _expire_lost_runs(now) -> int:
+    return (
+        SimulationRun.objects
+        .filter(status__in=IN_FLIGHT_STATUSES, created_at__lt=now - STALE_AFTER)
+        .update(status="failed", last_poll_error="Expired while still pending upstream.", updated_at=now)
+    )
+
+
+def _batched_statuses(runs) -> dict[str, dict]:
+    if not STATUS_BATCH_URL or len(runs) < 2:
+        return {}
+    try:
+        return fetch_simulation_statuses(run.job_id for run in runs)
+    except (requests.RequestException, ValueError) as exc:
+        logger.warning("Batched simulation status call failed, polling jobs one by one: %s", exc)
+        return {}
+
+
+def poll_simulation_runs(limit: int = 50) -> dict:
+    """
+    Refresh in-flight runs whose backoff has elapsed and store results of the ones
+    that completed. A run's delay doubles with every poll that shows no progress
+    (see ``poll_delay``) and resets when its status changes; runs pending longer than
+    ``SCIO_SIMULATION_STALE_SECONDS`` are marked failed so a new request resubmits.
+    """
+    now = timezone.now()
+    expired = _expire_lost_runs(now)
+    due = list(
+        SimulationRun.objects
+        .filter(status__in=IN_FLIGHT_STATUSES)
+        .filter(Q(next_poll_at__isnull=True) | Q(next_poll_at__lte=now))
+        .select_related("sim_key")
+        .order_by("next_poll_at", "created_at")[: max(1, int(limit))]
+    )
+    if not due:
+        return {"polled": 0, "completed": 0, "failed": 0, "errors": 0, "expired": expired}
+
+    batched = _batched_statuses(due)
+    summary = {"polled": len(due), "completed": 0, "failed": 0, "errors": 0, "expired": expired}
+    for run in due:
+        previous = run.status
+        try:
+            data = batched.get(run.job_id)
+            # Batch payloads may omit results; completed runs are fetched individually.
+            if data is None or ((data.get("status") or "").lower() == "completed" and not data.get("results")):
+                data = fetch_simulation(run.job_id)
+            store_simulation_response(run, data)
+            run.last_poll_error = ""
+        except (requests.RequestException, ValueError) as exc:
+            summary["errors"] += 1
+            run.last_poll_error = str(exc)[:255]
+            logger.warning("Polling simulation job=%s failed: %s", run.job_id, exc)
+
+        if run.status == "completed":
+            summary["completed"] += 1
+            run.next_poll_at = None
+        elif run.status not in IN_FLIGHT_STATUSES:
+            summary["failed"] += 1
+            run.next_poll_at = None
+        else:
+            run.poll_attempts = 0 if run.status != previous else run.poll_attempts + 1
+            run.next_poll_at = timezone.now() + poll_delay(run.poll_attempts)
+        run.save(update_fields=["poll_attempts", "next_poll_at", "last_poll_error", "updated_at"])
+    return summary
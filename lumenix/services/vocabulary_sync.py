@@ -3,15 +3,24 @@
 import hashlib
 import json
 
-import requests
-
 from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
 
 from lumenix.models import Vocabulary, Scheme, Concept, ConceptHistory
+from lumenix.services.concept_hierarchy import rebuild_concept_closure
+from lumenix.services.concept_history import build_history_rows, concept_snapshot
+from lumenix.services.conditional_fetch import ConditionalFetch, fetch_json_if_changed, remember_fetch
 
 BASE = settings.SCIO_VOCAB_API_BASE.rstrip("/")
+BULK_BATCH_SIZE = max(1, int(getattr(settings, "SCIO_VOCAB_SYNC_BATCH_SIZE", 500)))
+
+# Concept columns that make up the hashed document (see _flatten_concept_payload).
+CONCEPT_FIELDS = (
+    "pref_label", "alt_label", "definition", "notation",
+    "broader", "narrower", "exact_match", "close_match", "related", "in_scheme",
+    "content_hash",
+)
 
 
 def _hash_payload(obj: dict) -> str:
@@ -52,135 +61,175 @@ def _flatten_concept_payload(vocab_id: str, scheme_map: dict, raw: dict) -> dict
         "ambrosia_supported": ambrosia_supported,
     }
 
-def fetch_vocabulary(vocab_id: str) -> dict:
-    r = requests.get(f"{BASE}/{vocab_id}", headers={"Accept": "application/json"}, timeout=30)
-    r.raise_for_status()
-    return r.json()
+def fetch_vocabulary(vocab_id: str, force: bool = False) -> ConditionalFetch:
+    return fetch_json_if_changed(f"{BASE}/{vocab_id}", timeout=30, force=force)
+
+def _batched(items: list, size: int = BULK_BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
 
-@transaction.atomic
-def sync_vocabulary(vocab_id: str, reset: bool = False) -> dict:
+def sync_vocabulary(vocab_id: str, reset: bool = False, force: bool = False) -> dict:
     """
     Upsert schemes and concepts for a given vocabulary ('plants' or 'pathogens').
     Creates ConceptHistory rows only for created/updated items.
     Returns simple counts.
-    """
-    data = fetch_vocabulary(vocab_id)
-
-    # Ensure Vocabulary row exists
-    vocab, _ = Vocabulary.objects.get_or_create(id=vocab_id)
-    if vocab.status != 1 or vocab.deleted_at is not None:
-        vocab.status = 1
-        vocab.deleted_at = None
-        vocab.save(update_fields=["status", "deleted_at"])
-
-    if reset:
-        # delete concepts and their history for this vocab
-        ConceptHistory.objects.filter(concept__vocabulary_id=vocab_id).delete()
-        Concept.objects.filter(vocabulary_id=vocab_id).delete()
-        Scheme.objects.filter(vocabulary_id=vocab_id).delete()
-
-    # 1) Upsert schemes and pre-build scheme map
-    scheme_map = {}
-    seen_scheme_uris = set()
-    for s in data.get("schemes", []):
-        seen_scheme_uris.add(s["id"])
-        sch, _ = Scheme.objects.update_or_create(
-            uri=s["id"],
-            defaults={
-                "vocabulary": vocab,
-                "title": s.get("title") or {},
-                "description": s.get("description") or {},
-                "status": 1,
-                "deleted_at": None,
-            },
-        )
-        scheme_map[sch.uri] = sch
 
-    created, updated, unchanged = 0, 0, 0
-    seen_concept_uris = set()
+    Existing concepts are loaded once as a uri -> (content_hash, status, ...) index and
+    diffed in memory; inserts, updates and history rows are then written in
+    ``BULK_BATCH_SIZE`` batches, each in its own short transaction, so a full sync no
+    longer holds row locks on the whole vocabulary for the length of the run.
 
-    # 2) Upsert concepts
-    for s in data.get("schemes", []):
-        for c in s.get("concepts", []):
-            uri = c["id"]
-            seen_concept_uris.add(uri)
-            mapped = _flatten_concept_payload(vocab_id, scheme_map, c)
-            fields = mapped["fields"]
-            scheme = mapped["scheme"]
-            ambrosia_supported = mapped["ambrosia_supported"]
-
-            obj, was_created = Concept.objects.select_for_update().get_or_create(
-                uri=uri,
+    An unchanged upstream payload (304 or same body hash) returns early with
+    ``not_modified=True`` and no DB writes; ``force``/``reset`` always reprocess.
+    """
+    fetched = fetch_vocabulary(vocab_id, force=force or reset)
+    if fetched.not_modified:
+        return {
+            "created": 0,
+            "updated": 0,
+            "unchanged": 0,
+            "deleted_concepts": 0,
+            "deleted_schemes": 0,
+            "closure_rows": 0,
+            "not_modified": True,
+        }
+    data = fetched.data
+
+    with transaction.atomic():
+        # Ensure Vocabulary row exists
+        vocab, _ = Vocabulary.objects.get_or_create(id=vocab_id)
+        if vocab.status != 1 or vocab.deleted_at is not None:
+            vocab.status = 1
+            vocab.deleted_at = None
+            vocab.save(update_fields=["status", "deleted_at"])
+
+        if reset:
+            # delete concepts and their history for this vocab
+            ConceptHistory.objects.filter(concept__vocabulary_id=vocab_id).delete()
+            Concept.objects.filter(vocabulary_id=vocab_id).delete()
+            Scheme.objects.filter(vocabulary_id=vocab_id).delete()
+
+        # 1) Upsert schemes and pre-build scheme map
+        scheme_map = {}
+        seen_scheme_uris = set()
+        for s in data.get("schemes", []):
+            seen_scheme_uris.add(s["id"])
+            sch, _ = Scheme.objects.update_or_create(
+                uri=s["id"],
                 defaults={
                     "vocabulary": vocab,
-                    "scheme": scheme,
-                    **fields,
-                    "ambrosia_supported": ambrosia_supported,
+                    "title": s.get("title") or {},
+                    "description": s.get("description") or {},
                     "status": 1,
                     "deleted_at": None,
                 },
             )
-            if not was_created:
-                if (
-                    obj.content_hash != fields["content_hash"]
-                    or obj.ambrosia_supported != ambrosia_supported
-                    or obj.status != 1
-                    or obj.deleted_at is not None
-                ):
-                    # Update only when something changed
-                    for k, v in fields.items():
-                        setattr(obj, k, v)
-                    obj.scheme = scheme
-                    obj.vocabulary = vocab
-                    obj.ambrosia_supported = ambrosia_supported
-                    obj.status = 1
-                    obj.deleted_at = None
-                    obj.save(update_fields=[*fields.keys(), "scheme", "vocabulary", "ambrosia_supported", "status", "deleted_at", "updated_at"])
-                    ConceptHistory.objects.create(
-                        concept=obj,
-                        change_type="updated",
-                        content_hash=obj.content_hash,
-                        snapshot={
-                            "uri": obj.uri,
-                            "vocabulary": obj.vocabulary_id,
-                            "scheme": obj.scheme.uri if obj.scheme else None,
-                            **fields,
-                        },
-                    )
-                    updated += 1
-                else:
-                    unchanged += 1
-            else:
-                ConceptHistory.objects.create(
-                    concept=obj,
-                    change_type="created",
-                    content_hash=obj.content_hash,
-                    snapshot={
-                        "uri": obj.uri,
-                        "vocabulary": obj.vocabulary_id,
-                        "scheme": obj.scheme.uri if obj.scheme else None,
-                        **fields,
-                    },
-                )
-                created += 1
-
-    deleted_concepts = (
-        Concept.objects
-        .filter(vocabulary_id=vocab_id, status=1)
-        .exclude(uri__in=list(seen_concept_uris))
-        .update(status=2, deleted_at=timezone.now())
-    )
-    deleted_schemes = (
-        Scheme.objects
-        .filter(vocabulary_id=vocab_id, status=1)
-        .exclude(uri__in=list(seen_scheme_uris))
-        .update(status=2, deleted_at=timezone.now())
-    )
+            scheme_map[sch.uri] = sch
+
+    # 2) One query for the current state of every concept we might touch
+    existing = {
+        row[0]: row[1:]
+        for row in Concept.objects.values_list(
+            "uri", "pk", "content_hash", "ambrosia_supported", "status", "deleted_at", "scheme_id", "vocabulary_id"
+        )
+    }
+
+    # 3) Diff in memory
+    to_create, to_update = [], []
+    unchanged = 0
+    now = timezone.now()
+
+    # The payload can repeat a concept across schemes; keep the last occurrence per uri.
+    raw_by_uri = {}
+    for s in data.get("schemes", []):
+        for c in s.get("concepts", []):
+            raw_by_uri[c["id"]] = c
+    seen_concept_uris = set(raw_by_uri)
+
+    for uri, c in raw_by_uri.items():
+        mapped = _flatten_concept_payload(vocab_id, scheme_map, c)
+        fields = mapped["fields"]
+        scheme = mapped["scheme"]
+        ambrosia_supported = mapped["ambrosia_supported"]
+
+        obj = Concept(
+            uri=uri,
+            vocabulary=vocab,
+            scheme=scheme,
+            **fields,
+            ambrosia_supported=ambrosia_supported,
+            status=1,
+            deleted_at=None,
+            updated_at=now,
+        )
+
+        current = existing.get(uri)
+        if current is None:
+            to_create.append(obj)
+            continue
+
+        pk, content_hash, current_supported, status, deleted_at, scheme_id, current_vocab_id = current
+        if (
+            content_hash != fields["content_hash"]
+            or current_supported != ambrosia_supported
+            or status != 1
+            or deleted_at is not None
+            or scheme_id != (scheme.pk if scheme else None)
+            or current_vocab_id != vocab_id
+        ):
+            # Update only when something changed
+            obj.pk = pk
+            to_update.append(obj)
+        else:
+            unchanged += 1
+
+    # 4) Bulk writes, one short transaction per batch
+    update_fields = [*CONCEPT_FIELDS, "scheme", "vocabulary", "ambrosia_supported", "status", "deleted_at", "updated_at"]
+
+    for batch in _batched(to_create):
+        with transaction.atomic():
+            Concept.objects.bulk_create(batch)
+            ConceptHistory.objects.bulk_create(
+                build_history_rows([(obj, None, concept_snapshot(obj)) for obj in batch], "created", now)
+            )
+
+    for batch in _batched(to_update):
+        with transaction.atomic():
+            # The stored row is the previous version; deltas are taken against it.
+            previous = {
+                old.pk: concept_snapshot(old)
+                for old in Concept.objects.filter(pk__in=[obj.pk for obj in batch]).select_related("scheme")
+            }
+            Concept.objects.bulk_update(batch, update_fields)
+            ConceptHistory.objects.bulk_create(
+                build_history_rows([(obj, previous.get(obj.pk), concept_snapshot(obj)) for obj in batch], "updated", now)
+            )
+
+    with transaction.atomic():
+        deleted_concepts = (
+            Concept.objects
+            .filter(vocabulary_id=vocab_id, status=1)
+            .exclude(uri__in=list(seen_concept_uris))
+            .update(status=2, deleted_at=timezone.now())
+        )
+        deleted_schemes = (
+            Scheme.objects
+            .filter(vocabulary_id=vocab_id, status=1)
+            .exclude(uri__in=list(seen_scheme_uris))
+            .update(status=2, deleted_at=timezone.now())
+        )
+
+    closure_rows = rebuild_concept_closure(vocab_id)
+
+    remember_fetch(fetched)
 
     return {
-        "created": created,
-        "updated": updated,
+        "created": len(to_create),
+        "updated": len(to_update),
         "unchanged": unchanged,
         "deleted_concepts": deleted_concepts,
         "deleted_schemes": deleted_schemes,
+        "closure_rows": closure_rows,
+        "not_modified": False,
     }
@@ -1,12 +1,22 @@
 # lumenix/tasks.py
 
+from datetime import timedelta
+
 from celery import shared_task
 from django.conf import settings
 from django.core.cache import cache
+from django.utils import timezone
 
 from lumenix.models import PathogenQuerySpec
+from lumenix.services.concept_history import compact_history
+from lumenix.services.models_sync import sync_models
+from lumenix.services.nuts_sync import sync_nuts
+from lumenix.services.nuts_zonal_stats import compute_zonal_stats
 from lumenix.services.pathogen_query import sync_pathogen_query_spec
+from lumenix.services.simulations import poll_simulation_runs
 from lumenix.services.vocabulary_sync import sync_vocabulary
+from utils.fetch_era5_data import Era5Downloader, month_partitions
+from utils.process_nc_data import process_netCDF
 
 
 @shared_task(bind=True, max_retries=3)
@@ -18,6 +28,99 @@ def sync_vocabulary_task(self, vocab_id: str):
     return res
 
 
+@shared_task(bind=True, max_retries=3)
+def sync_nuts_task(self, level: int):
+    """
+    Celery wrapper so Beat can poll a NUTS level; unchanged payloads return early.
+    """
+    return sync_nuts(level)
+
+
+@shared_task(bind=True, max_retries=3)
+def sync_models_task(self, lock_key: str | None = None):
+    """
+    Celery wrapper so Beat (or the admin sync button) can run the model registry
+    sync off the request thread; unchanged payloads return early.
+    """
+    try:
+        return sync_models()
+    finally:
+        if lock_key:
+            cache.delete(lock_key)
+
+
+@shared_task(bind=True)
+def compact_concept_history_task(self, retention_days: int | None = None):
+    """
+    Drop ConceptHistory versions past the retention window and re-encode the rest
+    as full snapshots every N versions with deltas in between.
+    """
+    lock_key = "concept-history-compact:lock"
+    if not cache.add(lock_key, "running", timeout=6 * 60 * 60):
+        return {"skipped": "already running"}
+    try:
+        return compact_history(retention_days=retention_days)
+    finally:
+        cache.delete(lock_key)
+
+
+@shared_task(bind=True)
+def refresh_climate_data_task(self, months_back: int = 1):
+    """
+    Beat-driven ERA5 refresh: downloads the current month (and any recent month that
+    was fetched before it ended) and ingests it in ``skip`` mode, so only days that
+    are not loaded yet are written.
+    """
+    lock_key = "climate-refresh:lock"
+    if not cache.add(lock_key, "running", timeout=6 * 60 * 60):
+        return {"skipped": "already running"}
+    try:
+        today = timezone.now().date()
+        partitions = month_partitions(today.year - 1, today.year, today=today)[-(max(0, int(months_back)) + 1):]
+
+        def ingest(partition, path):
+            if process_netCDF(path, mode="skip") is None:
+                raise RuntimeError(f"Ingesting {path} failed.")
+
+        return Era5Downloader().run(partitions, on_ready=ingest)
+    finally:
+        cache.delete(lock_key)
+
+
+@shared_task(bind=True)
+def compute_nuts_climate_stats_task(self, days_back: int = 40):
+    """
+    Recompute NutsClimateDaily for the last ``days_back`` days (ERA5 lags a few days
+    and recent days may still be corrected). Skipped until cell weights and grid
+    data exist, so a fresh deploy does not fail every tick.
+    """
+    lock_key = "nuts-climate-stats:lock"
+    if not cache.add(lock_key, "running", timeout=6 * 60 * 60):
+        return {"skipped": "already running"}
+    try:
+        end = timezone.now().date()
+        return compute_zonal_stats(end - timedelta(days=max(0, int(days_back))), end)
+    except LookupError as exc:
+        return {"skipped": str(exc)}
+    finally:
+        cache.delete(lock_key)
+
+
+@shared_task(bind=True)
+def poll_simulation_runs_task(self, limit: int = 50):
+    """
+    Beat-driven poll of in-flight simulation runs. Runs are skipped until their own
+    backoff elapses, so a tick with nothing due makes no upstream calls.
+    """
+    lock_key = "simulation-poll:lock"
+    if not cache.add(lock_key, "running", timeout=10 * 60):
+        return {"skipped": "already running"}
+    try:
+        return poll_simulation_runs(limit=limit)
+    finally:
+        cache.delete(lock_key)
+
+
 @shared_task(bind=True, max_retries=3)
 def sync_pathogen_query_spec_task(self, spec_id: int, lock_key: str | None = None):
     try:
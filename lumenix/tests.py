@@ -1,3 +1,343 @@
-from django.test import TestCase
+import math
+import shutil
+import struct
+import tempfile
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+
+from django.test import RequestFactory, SimpleTestCase, TestCase
+
+from lumenix.models import (
+    ClimateBaseline,
+    PathogenConcentrationRecord,
+    SimulationKey,
+    SimulationRun,
+    SimulationSeries,
+)
+from lumenix.services import climate_series
+from lumenix.services.climate_frames import HEADER_FORMAT, HEADER_SIZE, FramePayload, encode_frames, encode_prefix
+from lumenix.services.climate_store import ClimateGridStore
+from lumenix.services.climatology import _moments, _smooth, cell_climatology_dir, day_slots, point_climatology
+from lumenix.services.concept_history import apply_patch, make_patch
+from lumenix.services.simulations import (
+    POLL_BASE_SECONDS,
+    POLL_MAX_SECONDS,
+    align_on_x,
+    completed_run,
+    parse_simulation_request,
+    poll_delay,
+    replace_results,
+    run_arrays,
+)
+from lumenix.views.chart_ai import _answer_cache_key
+from lumenix.views.climateDataV import parse_time_range
+from lumenix.views.climate_api import _byte_range
+from lumenix.views.models_api import _parse_number
+from lumenix.views.pathogen_api import _derived_pathogen_rows, _parse_rolling
+
+VARIABLE = "temperature_2m"
+LAT = np.array([50.0, 50.25, 50.5])
+LON = np.array([10.0, 10.25])
+
+
+def _utc(*args) -> datetime:
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+class TempStoreMixin:
+    def setUp(self):
+        super().setUp()
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.store = ClimateGridStore(self.root)
+
+    def frames(self, *fill):
+        return np.stack([np.full((LAT.size, LON.size), value, dtype="f4") for value in fill])
+
+
+class ClimateGridStoreTests(TempStoreMixin, SimpleTestCase):
+    def test_append_and_overwrite(self):
+        self.store.write_frames(VARIABLE, [_utc(2024, 1, 1), _utc(2024, 1, 2)], self.frames(1, 2), LAT, LON)
+        self.store.write_frames(VARIABLE, [_utc(2024, 1, 2), _utc(2024, 1, 3)], self.frames(20, 3), LAT, LON)
+
+        selection = self.store.read_bbox(VARIABLE, (LON.min(), LAT.min(), LON.max(), LAT.max()))
+        self.assertEqual(selection.values.shape, (3, LAT.size, LON.size))
+        self.assertEqual(selection.values[:, 0, 0].tolist(), [1, 20, 3])
+
+    def test_append_drops_bytes_past_the_time_index(self):
+        self.store.write_frames(VARIABLE, [_utc(2024, 1, 1)], self.frames(1), LAT, LON)
+        data_path, _ = self.store._paths(VARIABLE, 2024)
+        # Simulate an append whose time index was never written.
+        with open(data_path, "ab") as fh:
+            fh.write(self.frames(99).tobytes())
+
+        self.store.write_frames(VARIABLE, [_utc(2024, 1, 2)], self.frames(2), LAT, LON)
+
+        frame_bytes = LAT.size * LON.size * 4
+        self.assertEqual(data_path.stat().st_size, 2 * frame_bytes)
+        series = self.store.point_series(VARIABLE, LAT[0], LON[0])
+        self.assertEqual(series.values.ravel().tolist(), [1, 2])
+
+    def test_append_refuses_a_short_data_file(self):
+        self.store.write_frames(VARIABLE, [_utc(2024, 1, 1)], self.frames(1), LAT, LON)
+        data_path, _ = self.store._paths(VARIABLE, 2024)
+        data_path.write_bytes(b"")
+
+        with self.assertRaises(ValueError):
+            self.store.write_frames(VARIABLE, [_utc(2024, 1, 2)], self.frames(2), LAT, LON)
+
+
+class ClimatologyTests(TempStoreMixin, SimpleTestCase):
+    def test_day_slots_align_leap_and_common_years(self):
+        slots = day_slots([date(2023, 2, 28), date(2024, 2, 29), date(2023, 3, 1), date(2024, 3, 1), date(2024, 12, 31)])
+        self.assertEqual(slots.tolist(), [58, 59, 60, 60, 365])
+
+    def test_smooth_is_a_circular_moving_sum(self):
+        values = np.arange(366, dtype="f8")
+        smoothed = _smooth(values, 3)
+        self.assertEqual(smoothed[0], values[365] + values[0] + values[1])
+        self.assertEqual(smoothed[100], values[99:102].sum())
+        self.assertEqual(smoothed[365], values[364] + values[365] + values[0])
+        self.assertIs(_smooth(values, 1), values)
+
+    def test_moments(self):
+        counts = np.zeros(366)
+        sums = np.zeros(366)
+        squares = np.zeros(366)
+        counts[10], sums[10], squares[10] = 2, 4.0, 10.0  # values 1 and 3
+        counts[20], sums[20] = 1, 5.0
+
+        mean, std = _moments(sums, squares, counts, window=1)
+        self.assertEqual(mean[10], 2.0)
+        self.assertEqual(std[10], 1.0)
+        self.assertEqual(mean[20], 5.0)
+        self.assertTrue(np.isnan(std[20]))
+        self.assertTrue(np.isnan(mean[0]))
+
+    def test_point_climatology_reads_one_cell(self):
+        baseline = ClimateBaseline(name="test", version=1, has_cells=True,
+                                   start_date=date(1991, 1, 1), end_date=date(2020, 12, 31))
+        means = np.arange(366 * LAT.size * LON.size, dtype="f4").reshape(366, LAT.size, LON.size)
+        target = cell_climatology_dir(baseline, self.store)
+        target.mkdir(parents=True)
+        np.save(target / f"{VARIABLE}.mean.npy", means)
+
+        dates = ["2024-01-01T00:00:00+00:00", "2024-02-29T00:00:00+00:00"]
+        values = point_climatology(VARIABLE, dates, 2, 1, baseline=baseline, store=self.store)
+        self.assertEqual(values.tolist(), [means[0, 2, 1], means[59, 2, 1]])
+
+
+class RegionSeriesTests(SimpleTestCase):
+    daily = [(date(2024, 1, 1), 1.234, 0.5, 2.0, 4), (date(2024, 1, 2), None, None, None, 0)]
+    live = [(_utc(2024, 1, 1), 1.234, 0.5, 2.0, 4), (_utc(2024, 1, 2), float("nan"), None, None, 0)]
+    start, end = _utc(2024, 1, 1), _utc(2024, 1, 2, 23, 59, 59)
+
+    def region_series(self, covered):
+        with mock.patch.object(climate_series, "_precomputed_region_rows", return_value=self.daily), \
+                mock.patch.object(climate_series, "_covers_raw_data", return_value=covered) as covers, \
+                mock.patch.object(climate_series, "connection") as connection:
+            cursor = connection.cursor.return_value.__enter__.return_value
+            cursor.fetchone.return_value = (1,)
+            cursor.fetchall.return_value = self.live
+            series = climate_series.region_series("DE1", self.start, self.end, VARIABLE)
+        return series, covers
+
+    def test_precomputed_and_live_paths_have_the_same_shape(self):
+        precomputed, covers = self.region_series(covered=True)
+        live, _ = self.region_series(covered=False)
+
+        self.assertEqual(precomputed.pop("source"), "nuts_climate_daily")
+        self.assertEqual(live.pop("source"), "climate_data")
+        self.assertEqual(precomputed, live)
+        self.assertEqual(precomputed["timestamps"][0], "2024-01-01T00:00:00+00:00")
+        self.assertEqual(precomputed["values"], [1.23, None])
+        self.assertEqual(covers.call_args.args[0], [date(2024, 1, 1), date(2024, 1, 2)])
+
+
+class ConceptPatchTests(SimpleTestCase):
+    def test_round_trip(self):
+        old = {"label": {"en": "Wheat"}, "a/b": 1, "gone": True, "same": [1]}
+        new = {"label": {"en": "Soft wheat"}, "a/b": 2, "same": [1], "x~y": "new"}
+
+        ops = make_patch(old, new)
+        self.assertEqual(apply_patch(old, ops), new)
+        self.assertEqual({op["path"] for op in ops}, {"/label", "/a~1b", "/gone", "/x~0y"})
+        self.assertEqual(make_patch(new, new), [])
+
+    def test_unknown_op(self):
+        with self.assertRaises(ValueError):
+            apply_patch({}, [{"op": "move", "path": "/a"}])
+
+
+class TimeRangeTests(SimpleTestCase):
+    def test_dates_cover_whole_days(self):
+        start, end = parse_time_range({"start": "2024-01-01", "end": "2024-01-02"})
+        self.assertEqual(start.date(), date(2024, 1, 1))
+        self.assertEqual((start.hour, start.minute), (0, 0))
+        self.assertEqual(end.date(), date(2024, 1, 2))
+        self.assertEqual((end.hour, end.minute, end.second), (23, 59, 59))
+
+    def test_timestamp_selects_one_instant(self):
+        start, end = parse_time_range({"timestamp": "2024-01-01T12:00:00Z"})
+        self.assertEqual(start, end)
+
+    def test_invalid_ranges(self):
+        self.assertIsNone(parse_time_range({}))
+        for params in ({"start": "2024-01-01"}, {"start": "2024-01-02", "end": "2024-01-01"},
+                       {"start": "2024-01-01", "end": "nope"}):
+            with self.subTest(params=params), self.assertRaises(ValueError):
+                parse_time_range(params)
+        with self.assertRaises(ValueError):
+            parse_time_range({"start": "2024-01-01", "end": "2024-03-01"}, max_days=31)
+
+
+class FramesRangeTests(SimpleTestCase):
+    def test_byte_range(self):
+        self.assertEqual(_byte_range("bytes=0-9", 100), (0, 9))
+        self.assertEqual(_byte_range("bytes=90-", 100), (90, 99))
+        self.assertEqual(_byte_range("bytes=50-500", 100), (50, 99))
+        self.assertEqual(_byte_range("bytes=-10", 100), (90, 99))
+        self.assertEqual(_byte_range("bytes=-500", 100), (0, 99))
+        self.assertIsNone(_byte_range("", 100))
+        self.assertIsNone(_byte_range("bytes=0-1,5-6", 100))
+        self.assertIs(_byte_range("bytes=100-", 100), False)
+        self.assertIs(_byte_range("bytes=9-3", 100), False)
+
+    def test_payload_ranges_match_the_full_encoding(self):
+        times = np.array([0, 3600, 7200])
+        values = np.arange(times.size * LAT.size * LON.size, dtype="f4").reshape(times.size, LAT.size, LON.size)
+        encoded = encode_frames(times, LAT[::-1], LON, values)
+        frame_bytes = LAT.size * LON.size * 4
+        reads = []
+
+        def read_frames(first, last):
+            reads.append((first, last))
+            return values[first:last + 1].tobytes()
+
+        payload = FramePayload(encode_prefix(times, LAT[::-1], LON), times.size, frame_bytes, '"x"', read_frames)
+        self.assertEqual(payload.size, len(encoded))
+        self.assertEqual(payload.read(), encoded)
+        for first, last in ((0, HEADER_SIZE - 1), (10, HEADER_SIZE + 30), (len(encoded) - 5, len(encoded) - 1)):
+            self.assertEqual(payload.read(first, last), encoded[first:last + 1])
+
+        reads.clear()
+        frames_offset = HEADER_SIZE + times.size * 8
+        payload.read(frames_offset + frame_bytes, frames_offset + 2 * frame_bytes - 1)
+        self.assertEqual(reads, [(1, 1)])
+        self.assertEqual(struct.unpack_from(HEADER_FORMAT, encoded)[5], times.size)
+
+
+class ParseNumberTests(SimpleTestCase):
+    def test_non_finite_numbers_are_rejected(self):
+        factory = RequestFactory()
+        self.assertEqual(_parse_number(factory.get("/", {"ram_gb": "1.5"}), "ram_gb"), 1.5)
+        self.assertIsNone(_parse_number(factory.get("/"), "ram_gb"))
+        for raw in ("nan", "inf", "-Infinity", "abc"):
+            with self.subTest(raw=raw), self.assertRaises(ValueError):
+                _parse_number(factory.get("/", {"ram_gb": raw}), "ram_gb")
+
+
+class ChartAnswerCacheKeyTests(SimpleTestCase):
+    def test_key_covers_question_context_and_points(self):
+        points = [{"x": 1, "y": 2}]
+        context = {"chart_kind": "line", "dashboard_view_code": "farmer"}
+        key = _answer_cache_key("chart", context, "What is the peak?", points)
+
+        self.assertEqual(key, _answer_cache_key("chart", dict(context), "  what is the PEAK ", points))
+        self.assertNotEqual(key, _answer_cache_key("chart", {**context, "chart_kind": "bar"}, "What is the peak?", points))
+        self.assertNotEqual(key, _answer_cache_key("chart", context, "What is the peak?", [{"x": 1, "y": 3}]))
+
+
+class PathogenRollingTests(TestCase):
+    def record(self, day, value):
+        return PathogenConcentrationRecord.objects.create(
+            plant="wheat", pathogen="fusarium", nuts_code="DE1", observed_on=day, pathogen_model_value=value,
+        )
+
+    def test_parse_rolling(self):
+        self.assertIsNone(_parse_rolling(None))
+        self.assertEqual(_parse_rolling("7"), 7)
+        self.assertIs(_parse_rolling(5), False)
+        self.assertIs(_parse_rolling("week"), False)
+
+    def test_window_covers_calendar_days_not_rows(self):
+        start = date(2024, 1, 10)
+        self.record(start - timedelta(days=3), 5.0)  # seeds the first window
+        for offset, value in ((0, 1.0), (1, 2.0), (2, 3.0), (9, 10.0)):
+            self.record(start + timedelta(days=offset), value)
+
+        rows = _derived_pathogen_rows("wheat", "fusarium", "DE1", start, start + timedelta(days=9), rolling=7)
+
+        by_day = {row["date"]: row for row in rows}
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(by_day["2024-01-10"]["pathogen_model_value_rolling"], 3.0)
+        self.assertEqual(by_day["2024-01-12"]["pathogen_model_value_rolling"], 2.75)
+        # Days 13..19 hold only the record of the 19th; a 7-row window would reach back to the 7th.
+        self.assertEqual(by_day["2024-01-19"]["pathogen_model_value_rolling"], 10.0)
+        self.assertEqual(by_day["2024-01-19"]["pathogen_model_value"], 10.0)
+
+
+class SimulationHelperTests(SimpleTestCase):
+    payload = {
+        "crop": " wheat ",
+        "nuts_id": "de1",
+        "climate_model": "RCP4.5",
+        "time_period": ["2030-01-01", "2030-12-31"],
+        "time_scale": "Yearly",
+    }
+
+    def test_parse_simulation_request(self):
+        fields = parse_simulation_request(self.payload)
+        self.assertEqual(fields["crop"], "wheat")
+        self.assertEqual(fields["nuts_id"], "DE1")
+        self.assertEqual(fields["time_scale"], "yearly")
+        self.assertEqual((fields["time_period_start"], fields["time_period_end"]), (date(2030, 1, 1), date(2030, 12, 31)))
+
+    def test_parse_simulation_request_rejects_bad_input(self):
+        for change in ({"crop": ""}, {"time_period": "2030"}, {"time_period": ["2031-01-01", "2030-01-01"]},
+                       {"time_period": ["01/01/2030"]}, {"climate_model": "rcp45"}, {"time_scale": "daily"}):
+            with self.subTest(change=change), self.assertRaises(ValueError):
+                parse_simulation_request({**self.payload, **change})
+
+    def test_align_on_x(self):
+        axis, aligned = align_on_x({
+            "a": (np.array([1.0, 2.0, np.nan]), np.array([10.0, 20.0, 99.0])),
+            "b": (np.array([2.0, 3.0]), np.array([200.0, 300.0])),
+        })
+        self.assertEqual(axis.tolist(), [1.0, 2.0, 3.0])
+        np.testing.assert_array_equal(aligned["a"], [10.0, 20.0, np.nan])
+        np.testing.assert_array_equal(aligned["b"], [np.nan, 200.0, 300.0])
+
+        axis, aligned = align_on_x({})
+        self.assertEqual((axis.size, aligned), (0, {}))
+
+    def test_poll_delay_backs_off_with_jitter_up_to_the_cap(self):
+        for attempts in (0, 3, 100):
+            expected = min(POLL_MAX_SECONDS, POLL_BASE_SECONDS * 2 ** attempts)
+            with self.subTest(attempts=attempts):
+                self.assertTrue(0.8 * expected <= poll_delay(attempts).total_seconds() <= 1.2 * expected)
+
+
+class SimulationResultsTests(TestCase):
+    def setUp(self):
+        key = SimulationKey.objects.create(**parse_simulation_request(SimulationHelperTests.payload))
+        self.run = SimulationRun.objects.create(job_id="job-1", sim_key=key, status="completed")
+
+    def test_empty_results_are_not_cached(self):
+        self.assertEqual(replace_results(self.run, [[1, 0.5], [2, None]]), 2)
+        self.assertEqual(completed_run(self.run.sim_key), self.run)
+
+        self.assertEqual(replace_results(self.run, []), 0)
+        self.assertFalse(SimulationSeries.objects.filter(job=self.run).exists())
+        self.assertIsNone(run_arrays(self.run))
+        self.assertIsNone(completed_run(self.run.sim_key))
+
+    def test_series_points(self):
+        series = SimulationSeries.from_rows(self.run, [[1, 0.5], [2]])
+        self.assertEqual(series.points, 2)
+        self.assertTrue(SimulationSeries.from_rows(self.run, []))
+        x, y = series.as_arrays()
+        self.assertTrue(math.isnan(y[1]))
@@ -3,11 +3,17 @@
 from django.urls import path
 from .views import DashboardView, ClimateDataGeoJSONView, RiskChartsView
 from .views.chart_ai import chart_qa_stream
+from .views.climate_api import climate_grid_frames, climate_series
+from .views.models_api import model_search
+from .views.nuts_api import nuts_vector_tile
 from .views.pathogen_api import pathogen_concentration_meta, pathogen_concentration_query
+from .views.simulation_api import simulation_compare, simulation_request, simulation_status
 
 urlpatterns = [
     path('', DashboardView.as_view(), name='dashboard'),
     path("api/climate-data/", ClimateDataGeoJSONView.as_view(), name="climate_data_geojson"),
+    path("api/climate/series/", climate_series, name="climate-series"),
+    path("api/climate/frames/", climate_grid_frames, name="climate-frames"),
 
     path("dashboard/", DashboardView.as_view(), name="dashboard"),
     path("risk-charts/", RiskChartsView.as_view(), name="risk-charts-all"),
@@ -17,5 +23,10 @@ urlpatterns = [
     path("api/risk-charts/<slug:chart_identifier>/qa-stream/", chart_qa_stream, name="risk-chart-qa-stream"),
     path("api/risk-charts/pathogen-concentration/meta/", pathogen_concentration_meta, name="risk-chart-pathogen-meta"),
     path("api/risk-charts/pathogen-concentration/query/", pathogen_concentration_query, name="risk-chart-pathogen-query"),
+    path("api/models/search/", model_search, name="model-search"),
+    path("api/nuts/tiles/<int:z>/<int:x>/<int:y>.mvt", nuts_vector_tile, name="nuts-vector-tile"),
+    path("api/simulations/", simulation_request, name="simulation-request"),
+    path("api/simulations/compare/", simulation_compare, name="simulation-compare"),
+    path("api/simulations/<str:request_hash>/", simulation_status, name="simulation-status"),
 
 ]
@@ -1,14 +1,21 @@
+import hashlib
 import json
+import re
 
 import requests
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.core.cache import caches
 from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_POST
 
 from lumenix.models import DashboardChart
 
 
+# Cached answers are replayed in chunks of this many characters.
+ANSWER_REPLAY_CHUNK = 64
+
+
 def _friendly_upstream_error_message(status_code: int) -> str:
     if status_code >= 500:
         return (
@@ -77,6 +84,35 @@ def _build_numeric_stats(points):
     return summary
 
 
+def _normalize_question(question: str) -> str:
+    text = re.sub(r"\s+", " ", question.strip().lower())
+    return text.rstrip(" ?!.")
+
+
+def _json_hash(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, ensure_ascii=True, default=str).encode()).hexdigest()
+
+
+def _answer_cache_key(chart_identifier, context_summary, question, chart_points) -> str:
+    """
+    Chart, normalized question and hashes of everything else the prompt is built from:
+    the sanitized context (view, chart kind, ...) and points, plus the model.
+    """
+    parts = [
+        settings.LLM_MODEL,
+        chart_identifier,
+        _json_hash(context_summary),
+        _normalize_question(question),
+        _json_hash(chart_points),
+    ]
+    return "chart-qa:" + hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+def _replay(answer: str):
+    for start in range(0, len(answer), ANSWER_REPLAY_CHUNK):
+        yield answer[start:start + ANSWER_REPLAY_CHUNK]
+
+
 def _llm_url() -> str:
     base = (settings.LLM_URL or "").rstrip("/")
     endpoint = (settings.LLM_CHAT_ENDPOINT or "/v1/chat/completions").strip()
@@ -185,6 +221,14 @@ def chart_qa_stream(request, chart_identifier: str):
     selected_view_label = context_summary.get("dashboard_view_label", "")
     role_guidance = _role_guidance(selected_view_code, selected_view_label)
 
+    answer_cache = caches["chart_qa"]
+    cache_key = _answer_cache_key(chart.identifier, context_summary, question, chart_points)
+    cached_answer = answer_cache.get(cache_key)
+    if cached_answer:
+        response = StreamingHttpResponse(_replay(cached_answer), content_type="text/plain; charset=utf-8")
+        response["X-Answer-Cache"] = "hit"
+        return response
+
     system_prompt = (
         "You are a strict chart assistant for Ambrosia Dashboard.\n"
         f"You are currently assisting on chart '{chart.label}' (identifier: {chart.identifier}).\n"
@@ -227,6 +271,9 @@ def chart_qa_stream(request, chart_identifier: str):
     }
 
     def token_stream():
+        # Only answers that streamed to [DONE] are cached; a cut connection ends without it.
+        parts = []
+        done = False
         try:
             with requests.post(
                 _llm_url(),
@@ -249,6 +296,7 @@ def chart_qa_stream(request, chart_identifier: str):
 
                     data = line[len("data:"):].strip()
                     if data == "[DONE]":
+                        done = True
                         break
 
                     try:
@@ -262,11 +310,18 @@ def chart_qa_stream(request, chart_identifier: str):
                         .get("content")
                     )
                     if delta:
+                        parts.append(delta)
                         yield delta
         except Exception:
             yield (
                 "Ambra seems to be down at the moment. "
                 "Please try again after some time."
             )
+            return
+
+        if done and parts:
+            answer_cache.set(cache_key, "".join(parts))
 
-    return StreamingHttpResponse(token_stream(), content_type="text/plain; charset=utf-8")
+    response = StreamingHttpResponse(token_stream(), content_type="text/plain; charset=utf-8")
+    response["X-Answer-Cache"] = "miss"
+    return response
@@ -1,55 +1,124 @@
 # lumenix/views/climateDataV.py
 
+from datetime import datetime, time, timedelta
+
 from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.views import View
-from lumenix.models import ClimateData
-from django.db.models import Q
 
-import math  # Needed for NaN checks
+from lumenix.services.climate_grid import (
+    CLIMATE_VARIABLES,
+    DEFAULT_VARIABLE,
+    EUROPE_BBOX,
+    MAX_ZOOM,
+    MIN_ZOOM,
+    aggregate_climate_grid,
+    latest_timestamp,
+)
+
+# Longest time range averaged in one request; keeps the scan bounded by the timestamp index.
+MAX_RANGE_DAYS = 366
+
+
+def parse_bbox(value):
+    """``minLon,minLat,maxLon,maxLat`` in EPSG:4326; defaults to Europe."""
+    if not value:
+        return EUROPE_BBOX
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in value.split(","))
+    except ValueError:
+        raise ValueError("bbox must be minLon,minLat,maxLon,maxLat.")
+    if not (-180 <= min_lon < max_lon <= 180 and -90 <= min_lat < max_lat <= 90):
+        raise ValueError("bbox is out of range or empty.")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def parse_instant(value, end_of_day=False):
+    """ISO datetime or date; bare dates cover the whole day."""
+    # parse_datetime() also accepts a bare date (as midnight), so dates are tried first.
+    day = parse_date(value)
+    parsed = datetime.combine(day, time.max if end_of_day else time.min) if day else parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"Invalid date or timestamp: {value}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_time_range(params, max_days: int | None = MAX_RANGE_DAYS):
+    """``timestamp`` selects one time step; ``start``/``end`` an inclusive range."""
+    if params.get("timestamp"):
+        instant = parse_instant(params["timestamp"])
+        return instant, instant
+    if params.get("start") or params.get("end"):
+        if not (params.get("start") and params.get("end")):
+            raise ValueError("start and end must be given together.")
+        start = parse_instant(params["start"])
+        end = parse_instant(params["end"], end_of_day=True)
+        if end < start:
+            raise ValueError("end must not be before start.")
+        if max_days is not None and end - start > timedelta(days=max_days):
+            raise ValueError(f"Time range must not exceed {max_days} days.")
+        return start, end
+    return None
+
+
+def _as_geojson(grid, start):
+    features = [
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [lon, lat]},
+            "properties": {"value": value, "count": count, "timestamp": start.isoformat()},
+        }
+        for lon, lat, value, count in zip(grid["lon"], grid["lat"], grid["value"], grid["count"])
+    ]
+    return {"type": "FeatureCollection", "features": features}
+
 
 class ClimateDataGeoJSONView(View):
-    """Returns climate data in GeoJSON format filtered for Europe, ensuring valid coordinates."""
+    """
+    Climate values inside a bbox, averaged over a time range on a zoom-dependent grid.
+
+    Query parameters: ``bbox`` (minLon,minLat,maxLon,maxLat; Europe by default),
+    ``timestamp`` or ``start``/``end`` (latest time step by default), ``zoom``,
+    ``variable`` and ``format`` (``columns`` by default, or ``geojson``).
+    """
 
     def get(self, request, *args, **kwargs):
-        # Define the bounding box for Europe (approx.)
-        min_lat, max_lat = 35, 71   # From southern Spain to northern Scandinavia
-        min_lon, max_lon = -25, 45  # From Portugal to Western Russia
-
-        # Fetch valid climate data, filtering out invalid values
-        climate_data = ClimateData.objects.filter(
-            latitude__gte=min_lat, latitude__lte=max_lat,
-            longitude__gte=min_lon, longitude__lte=max_lon,
-        ).exclude(
-            Q(latitude__isnull=True) | Q(longitude__isnull=True) |
-            Q(latitude=float("inf")) | Q(longitude=float("inf")) |
-            Q(latitude=float("-inf")) | Q(longitude=float("-inf"))
-        ).order_by("-timestamp")[:5000]  # Limit results for performance
-
-        # Convert to GeoJSON format
-        features = []
-        for data in climate_data:
-            if data.longitude is None or data.latitude is None:
-                continue  # Skip invalid points
-
-            # Ensure coordinates are finite numbers
-            if math.isnan(data.longitude) or math.isnan(data.latitude):
-                continue
-
-            features.append({
-                "type": "Feature",
-                "geometry": {
-                    "type": "Point",
-                    "coordinates": [float(data.longitude), float(data.latitude)],
-                },
-                "properties": {
-                    "timestamp": data.timestamp.isoformat(),
-                    "temperature": data.temperature,
-                }
-            })
-
-        geojson_data = {
-            "type": "FeatureCollection",
-            "features": features
-        }
+        params = request.GET
+        try:
+            bbox = parse_bbox((params.get("bbox") or "").strip())
+            time_range = parse_time_range(params)
+            zoom = int(params.get("zoom") or 4)
+        except ValueError as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
+
+        if not MIN_ZOOM <= zoom <= MAX_ZOOM:
+            return JsonResponse({"error": f"zoom must be between {MIN_ZOOM} and {MAX_ZOOM}."}, status=400)
+
+        variable = (params.get("variable") or DEFAULT_VARIABLE).strip()
+        if variable not in CLIMATE_VARIABLES:
+            return JsonResponse({"error": f"variable must be one of: {', '.join(CLIMATE_VARIABLES)}."}, status=400)
+
+        output = (params.get("format") or "columns").strip().lower()
+        if output not in {"columns", "geojson"}:
+            return JsonResponse({"error": "format must be columns or geojson."}, status=400)
+
+        if time_range is None:
+            latest = latest_timestamp()
+            if latest is None:
+                empty = {"lon": [], "lat": [], "value": [], "count": []}
+                return JsonResponse(_as_geojson(empty, None) if output == "geojson" else empty)
+            time_range = (latest, latest)
+        start, end = time_range
 
-        return JsonResponse(geojson_data, safe=False)
+        grid = aggregate_climate_grid(bbox, start, end, zoom, variable=variable)
+        if output == "geojson":
+            return JsonResponse(_as_geojson(grid, start))
+        return JsonResponse({
+            **grid,
+            "bbox": list(bbox),
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+        })
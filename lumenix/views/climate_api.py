@@ -0,0 +1,149 @@
+import re
+from datetime import datetime, timezone
+
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET
+
+from lumenix.services.climate_frames import FRAME_CACHE_SECONDS, climate_frames
+from lumenix.services.climate_grid import CLIMATE_VARIABLES, DEFAULT_VARIABLE
+from lumenix.services.climate_series import point_series, region_series
+from lumenix.services.climate_store import ClimateGridStore
+from lumenix.services.climatology import anomalies, point_climatology, region_climatology
+from lumenix.views.climateDataV import parse_bbox, parse_time_range
+
+# Open-ended series requests cover the whole ERA5 archive.
+SERIES_START = datetime(1940, 1, 1, tzinfo=timezone.utc)
+SERIES_END = datetime(2100, 12, 31, 23, 59, 59, tzinfo=timezone.utc)
+# Longest span one frames request may cover (the frame count is capped separately).
+FRAMES_MAX_DAYS = 31
+BYTE_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _parse_point(params):
+    try:
+        lon = float(params["lon"])
+        lat = float(params["lat"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("lon and lat must be numbers.")
+    if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+        raise ValueError("lon/lat out of range.")
+    return lon, lat
+
+
+def _point_climatology(series, variable):
+    store = ClimateGridStore()
+    if store.grid() is None:
+        return None
+    i, j = store.nearest_cell(series["cell"]["lat"], series["cell"]["lon"])
+    values = point_climatology(variable, series["timestamps"], i, j, store=store)
+    if values is None:
+        return None
+    return [None if v != v else round(float(v), 2) for v in values]
+
+
+@login_required
+@require_GET
+def climate_series(request):
+    """
+    ERA5 time series for a point (``lon``/``lat``, nearest grid cell) or a NUTS
+    region (``nuts``, mean over the cells inside it), as columnar arrays.
+    Optional: ``start``/``end``, ``variable`` and ``anomaly=1``, which adds the
+    current baseline's day-of-year ``climatology`` and the ``anomaly`` against it.
+    """
+    params = request.GET
+    nuts_id = (params.get("nuts") or "").strip().upper()
+    variable = (params.get("variable") or DEFAULT_VARIABLE).strip()
+    if variable not in CLIMATE_VARIABLES:
+        return JsonResponse({"error": f"variable must be one of: {', '.join(CLIMATE_VARIABLES)}."}, status=400)
+
+    try:
+        start, end = parse_time_range(params, max_days=None) or (SERIES_START, SERIES_END)
+        point = None if nuts_id else _parse_point(params)
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    if nuts_id:
+        series = region_series(nuts_id, start, end, variable)
+        if series is None:
+            return JsonResponse({"error": f"Unknown NUTS region or no geometry loaded: {nuts_id}"}, status=404)
+    else:
+        series = point_series(point[0], point[1], start, end, variable)
+        if series is None:
+            return JsonResponse({"error": "No climate data available."}, status=404)
+
+    if params.get("anomaly") in {"1", "true"}:
+        if nuts_id:
+            climatology = region_climatology(nuts_id, variable, series["timestamps"])
+        else:
+            climatology = _point_climatology(series, variable)
+        if climatology is None:
+            return JsonResponse({"error": "No climatology baseline covers this series."}, status=404)
+        series["climatology"] = climatology
+        series["anomaly"] = anomalies(series["values"], climatology)
+
+    return JsonResponse(series)
+
+
+def _byte_range(header: str, size: int):
+    """``(first, last)`` for a single-range ``Range`` header, ``None`` to send it all, ``False`` if unsatisfiable."""
+    match = BYTE_RANGE_RE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        first, last = max(0, size - int(last)), size - 1
+    else:
+        first, last = int(first), min(int(last), size - 1) if last else size - 1
+    if first >= size or first > last:
+        return False
+    return first, last
+
+
+@login_required
+@require_GET
+def climate_grid_frames(request):
+    """
+    Gridded ``variable`` values in ``bbox`` as raw little-endian Float32 frames for
+    canvas rendering (layout in :mod:`lumenix.services.climate_frames`): ``timestamp``
+    for one frame, ``start``/``end`` for an animation sequence. Responses carry an
+    ETag and honour single byte ``Range`` requests, so clients can fetch the header
+    and time table first and then individual frames by offset.
+    """
+    params = request.GET
+    variable = (params.get("variable") or DEFAULT_VARIABLE).strip()
+    if variable not in CLIMATE_VARIABLES:
+        return JsonResponse({"error": f"variable must be one of: {', '.join(CLIMATE_VARIABLES)}."}, status=400)
+    try:
+        bbox = parse_bbox(params.get("bbox"))
+        time_range = parse_time_range(params, max_days=FRAMES_MAX_DAYS)
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    if time_range is None:
+        return JsonResponse({"error": "timestamp or start/end is required."}, status=400)
+
+    payload = climate_frames(variable, bbox, *time_range)
+    if payload is None:
+        return JsonResponse({"error": "No climate data for this selection."}, status=404)
+
+    # The ETag comes with the payload description, so revalidation never reads frames.
+    etag = payload.etag
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponse(status=304)
+    else:
+        byte_range = _byte_range(request.headers.get("Range", ""), payload.size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{payload.size}"
+            return response
+        if byte_range and request.headers.get("If-Range", etag) == etag:
+            first, last = byte_range
+            response = HttpResponse(payload.read(first, last), content_type="application/octet-stream", status=206)
+            response["Content-Range"] = f"bytes {first}-{last}/{payload.size}"
+        else:
+            response = HttpResponse(payload.read(), content_type="application/octet-stream")
+    response["ETag"] = etag
+    response["Accept-Ranges"] = "bytes"
+    patch_cache_control(response, private=True, max_age=FRAME_CACHE_SECONDS)
+    return response
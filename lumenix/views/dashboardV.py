@@ -5,6 +5,7 @@ from django.utils.translation import get_language
 from django.views.generic import TemplateView
 
 from lumenix.models import PlantConcept, PathogenConcept, DashboardViewMode, DashboardViewChart
+from lumenix.services.concept_hierarchy import descendants_of, parent_concepts
 from lumenix.views.mixins import DashboardModeMixin
 
 
@@ -27,6 +28,13 @@ class DashboardView(DashboardModeMixin, LoginRequiredMixin, TemplateView):
             .only("id", "pref_label")
             .order_by("id")
         )
+        # Optional ?crop_group=<concept id> narrows the crop list to one subtree (e.g. cereals).
+        try:
+            crop_group = int((self.request.GET.get("crop_group") or "").strip())
+        except ValueError:
+            crop_group = None
+        if crop_group is not None:
+            crops_qs = crops_qs.filter(pk__in=descendants_of(crop_group).values("pk"))
         paths_qs = (
             PathogenConcept.objects
             .filter(ambrosia_supported=True)
@@ -36,6 +44,11 @@ class DashboardView(DashboardModeMixin, LoginRequiredMixin, TemplateView):
 
         context["crops"] = [{"id": c.id, "label": pick_label(c.pref_label)} for c in crops_qs]
         context["pathogens"] = [{"id": p.id, "label": pick_label(p.pref_label)} for p in paths_qs]
+        context["crop_groups"] = [
+            {"id": g.id, "label": pick_label(g.pref_label)}
+            for g in parent_concepts("plants").only("id", "pref_label").order_by("id")
+        ]
+        context["selected_crop_group"] = crop_group
 
         mode = self.get_active_mode()
         context["current_mode"] = mode
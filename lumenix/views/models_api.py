@@ -0,0 +1,39 @@
+import math
+
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from lumenix.services.model_search import paginate_models, search_models
+
+
+def _parse_number(request, key, cast=float):
+    raw = (request.GET.get(key) or "").strip()
+    if not raw:
+        return None
+    value = cast(raw)
+    if not math.isfinite(value):
+        raise ValueError(f"{key} must be finite.")
+    return value
+
+
+@login_required
+@require_GET
+def model_search(request):
+    try:
+        qs = search_models(
+            q=request.GET.get("q", ""),
+            cpu_cores=_parse_number(request, "cpu_cores"),
+            ram_gb=_parse_number(request, "ram_gb"),
+            gpu_count=_parse_number(request, "gpu_count", int),
+            gpu_memory_gb=_parse_number(request, "gpu_memory_gb"),
+            cuda_version=(request.GET.get("cuda_version") or "").strip() or None,
+        )
+        page_size = _parse_number(request, "page_size", int) or 25
+    except ValueError:
+        return JsonResponse(
+            {"error": "cpu_cores, ram_gb, gpu_memory_gb must be numbers; gpu_count and page_size integers."},
+            status=400,
+        )
+
+    return JsonResponse(paginate_models(qs, page=request.GET.get("page") or 1, page_size=page_size))
@@ -0,0 +1,21 @@
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_GET
+
+from lumenix.services.nuts_tiles import MAX_ZOOM, render_nuts_tile
+
+
+@require_GET
+@cache_control(public=True, max_age=24 * 60 * 60)
+def nuts_vector_tile(request, z: int, x: int, y: int):
+    if z > MAX_ZOOM or x >= 2 ** z or y >= 2 ** z:
+        return JsonResponse({"error": "Tile coordinates out of range."}, status=400)
+
+    raw_level = (request.GET.get("level") or "").strip()
+    if raw_level and raw_level not in {"0", "1", "2", "3"}:
+        return JsonResponse({"error": "level must be 0, 1, 2 or 3."}, status=400)
+
+    tile = render_nuts_tile(z, x, y, level=int(raw_level) if raw_level else None)
+    if not tile:
+        return HttpResponse(status=204)
+    return HttpResponse(tile, content_type="application/vnd.mapbox-vector-tile")
@@ -1,13 +1,17 @@
 import json
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
-from django.db.models import Max, Min
+from django.db.models import Avg, F, Func, IntegerField, Max, Min, Value, Window
+from django.db.models.expressions import ValueRange
 from django.http import JsonResponse
 from django.views.decorators.http import require_GET
 from django.views.decorators.http import require_POST
 
 from lumenix.models import PathogenConcentrationRecord
 
+# Window sizes (in calendar days) the chart may ask the database to smooth over.
+ROLLING_WINDOWS = (7, 30, 90)
+
 
 def _parse_request_date(value: str):
     raw = (value or "").strip()
@@ -49,6 +53,121 @@ def _resolve_pathogen_queryset(plant, pathogen, nuts_code, start_date=None, end_
     return base_qs.none(), resolved_nuts_code
 
 
+def _parse_rolling(value):
+    if value in (None, ""):
+        return None
+    try:
+        window = int(value)
+    except (TypeError, ValueError):
+        return False
+    return window if window in ROLLING_WINDOWS else False
+
+
+def _parse_compare_year(value):
+    if value in (None, ""):
+        return None
+    try:
+        year = int(value)
+    except (TypeError, ValueError):
+        return False
+    return year if 1900 <= year <= 2100 else False
+
+
+def _day_number(field: str) -> Func:
+    """``field - DATE '1970-01-01'``: an integer day count Postgres can range a window frame over."""
+    return Func(
+        F(field),
+        Value(date(1970, 1, 1)),
+        template="(%(expressions)s)",
+        arg_joiner=" - ",
+        output_field=IntegerField(),
+    )
+
+
+def _series_values(qs, rolling=None):
+    """
+    Return ``[(observed_on, value), ...]`` for ``qs`` ordered by day.
+
+    With ``rolling`` set, the value is the mean over the trailing ``rolling`` calendar
+    days (the day itself included), computed by Postgres as
+    ``AVG(...) OVER (ORDER BY day RANGE BETWEEN n PRECEDING AND CURRENT ROW)``;
+    days without a record are skipped rather than counted.
+    """
+    if not rolling:
+        return list(qs.order_by("observed_on").values_list("observed_on", "pathogen_model_value"))
+
+    return list(
+        qs.annotate(
+            rolling_value=Window(
+                expression=Avg("pathogen_model_value"),
+                order_by=_day_number("observed_on").asc(),
+                frame=ValueRange(start=-(rolling - 1), end=0),
+            )
+        )
+        .order_by("observed_on")
+        .values_list("observed_on", "rolling_value")
+    )
+
+
+def _derived_pathogen_rows(plant, pathogen, nuts_code, start_date, end_date, rolling=None, compare_year=None):
+    """
+    Build the derived (rolling and/or year-over-year) series for one resolved NUTS code.
+
+    The rolling window is seeded with up to ``rolling - 1`` days before ``start_date``
+    so the first returned point is already a full-window mean. Comparison values are
+    taken from ``compare_year`` on the same month/day (smoothed the same way).
+    """
+    scope_qs = PathogenConcentrationRecord.active_objects.filter(
+        plant=plant,
+        pathogen=pathogen,
+        nuts_code=nuts_code,
+    )
+    lead_days = (rolling - 1) if rolling else 0
+
+    primary = _series_values(
+        scope_qs.filter(observed_on__gte=start_date - timedelta(days=lead_days), observed_on__lte=end_date),
+        rolling=rolling,
+    )
+
+    compare_by_day = {}
+    if compare_year is not None:
+        compare_start = date(compare_year, 1, 1) - timedelta(days=lead_days)
+        compare = _series_values(
+            scope_qs.filter(observed_on__gte=compare_start, observed_on__lte=date(compare_year, 12, 31)),
+            rolling=rolling,
+        )
+        compare_by_day = {
+            (day.month, day.day): (day, value) for day, value in compare if day.year == compare_year
+        }
+
+    rows = []
+    for day, value in primary:
+        if day < start_date:
+            continue
+        # The value compare/delta refer to: the rolling mean when smoothing, else the daily value.
+        row = {"date": day.isoformat(), "nuts_code": nuts_code, "pathogen_model_value": value}
+        if rolling:
+            row["pathogen_model_value_rolling"] = value
+        if compare_year is not None:
+            compare_day, compare_value = compare_by_day.get((day.month, day.day), (None, None))
+            row["compare_date"] = compare_day.isoformat() if compare_day else None
+            row["pathogen_model_value_compare"] = compare_value
+            row["pathogen_model_value_delta"] = (
+                value - compare_value if value is not None and compare_value is not None else None
+            )
+        rows.append(row)
+    return rows
+
+
+def _provenance(record):
+    return {
+        "model_id": record.provenance_model_id,
+        "model_title": record.provenance_model_title,
+        "variable_name": record.provenance_variable_name,
+        "fetched_at": record.provenance_fetched_at_ms,
+    }
+
+
 @require_GET
 def pathogen_concentration_meta(request):
     plant = (request.GET.get("plant") or "").strip()
@@ -96,6 +215,16 @@ def pathogen_concentration_query(request):
     if not start_date or not end_date:
         return JsonResponse({"error": "Invalid startDate or endDate. Use YYYY-MM-DD or DD/MM/YYYY."}, status=400)
 
+    rolling = _parse_rolling(payload.get("rolling"))
+    if rolling is False:
+        return JsonResponse(
+            {"error": f"Invalid rolling. Use one of: {', '.join(str(w) for w in ROLLING_WINDOWS)}."},
+            status=400,
+        )
+    compare_year = _parse_compare_year(payload.get("compareYear"))
+    if compare_year is False:
+        return JsonResponse({"error": "Invalid compareYear. Use a four-digit year."}, status=400)
+
     qs, resolved_nuts_code = _resolve_pathogen_queryset(
         payload["plant"],
         payload["pathogen"],
@@ -103,6 +232,30 @@ def pathogen_concentration_query(request):
         start_date=start_date,
         end_date=end_date,
     )
+
+    if rolling or compare_year is not None:
+        first = qs.first()
+        if not first:
+            return JsonResponse({"error": "No synced pathogen data found for this query."}, status=404)
+        return JsonResponse(
+            {
+                "request": payload,
+                "resolved_nuts_code": resolved_nuts_code,
+                "provenance": _provenance(first),
+                # Only the derived series is returned; raw daily points stay in the database.
+                "derived": {"rolling": rolling, "compareYear": compare_year},
+                "rows": _derived_pathogen_rows(
+                    first.plant,
+                    first.pathogen,
+                    resolved_nuts_code,
+                    start_date,
+                    end_date,
+                    rolling=rolling,
+                    compare_year=compare_year,
+                ),
+            }
+        )
+
     rows = list(qs)
 
     if not rows:
@@ -113,12 +266,7 @@ def pathogen_concentration_query(request):
         {
             "request": payload,
             "resolved_nuts_code": resolved_nuts_code,
-            "provenance": {
-                "model_id": first.provenance_model_id,
-                "model_title": first.provenance_model_title,
-                "variable_name": first.provenance_variable_name,
-                "fetched_at": first.provenance_fetched_at_ms,
-            },
+            "provenance": _provenance(first),
             "rows": [
                 {
                     "date": r.observed_on.isoformat(),
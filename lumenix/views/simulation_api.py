@@ -0,0 +1,98 @@
+import json
+
+import requests
+
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET, require_POST
+
+from lumenix.models import ClimateModelChoices, SimulationKey
+from lumenix.services.simulations import (
+    compare_scenarios,
+    latest_run,
+    parse_simulation_request,
+    request_simulation,
+    simulation_summary,
+)
+
+# Scenarios compared when the request does not name any.
+DEFAULT_COMPARE_MODELS = (ClimateModelChoices.RCP26, ClimateModelChoices.RCP45, ClimateModelChoices.RCP85)
+
+
+@login_required
+@require_POST
+def simulation_request(request):
+    """
+    Resolve a simulation request through the request-hash cache: 200 with results
+    when an identical request has completed, otherwise 202 with the (shared) job to
+    poll at ``simulation_status``. ``"refresh": true`` bypasses the results cache.
+    """
+    try:
+        payload = json.loads(request.body.decode("utf-8") or "{}")
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({"error": "Invalid JSON payload."}, status=400)
+
+    try:
+        fields = parse_simulation_request(payload)
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    try:
+        run, source = request_simulation(fields, force=bool(payload.get("refresh")))
+    except (requests.RequestException, ValueError) as exc:
+        return JsonResponse({"error": f"Simulation API request failed: {exc}"}, status=502)
+
+    summary = simulation_summary(run, source)
+    return JsonResponse(summary, status=200 if "results" in summary else 202)
+
+
+@login_required
+@require_GET
+def simulation_status(request, request_hash: str):
+    """
+    Current run and, once completed, results for a previously requested simulation.
+    Reads the database only; pending runs are refreshed by ``poll_simulation_runs_task``.
+    """
+    key = SimulationKey.objects.filter(request_hash=request_hash).first()
+    if key is None:
+        return JsonResponse({"error": "Unknown simulation request."}, status=404)
+    run = latest_run(key)
+    if run is None:
+        return JsonResponse({"error": "No simulation run for this request."}, status=404)
+
+    summary = simulation_summary(run)
+    return JsonResponse(summary, status=200 if "results" in summary else 202)
+
+
+@login_required
+@require_POST
+def simulation_compare(request):
+    """
+    One crop/NUTS/time window under several climate scenarios (``climate_models``,
+    default RCP2.6, RCP4.5 and RCP8.5), aligned on x in one columnar response.
+    Scenarios already computed come from the cache; only missing ones are submitted.
+    Returns 200 once every scenario has results, otherwise 202 with what is ready.
+    """
+    try:
+        payload = json.loads(request.body.decode("utf-8") or "{}")
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({"error": "Invalid JSON payload."}, status=400)
+
+    climate_models = payload.get("climate_models") or [str(model) for model in DEFAULT_COMPARE_MODELS]
+    if not isinstance(climate_models, list):
+        return JsonResponse({"error": "climate_models must be a list."}, status=400)
+    climate_models = list(dict.fromkeys(str(model).strip() for model in climate_models))
+    unknown = [model for model in climate_models if model not in ClimateModelChoices.values]
+    if unknown:
+        return JsonResponse(
+            {"error": f"climate_models must be among: {', '.join(ClimateModelChoices.values)}."},
+            status=400,
+        )
+
+    try:
+        fields = parse_simulation_request({**payload, "climate_model": climate_models[0]})
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    comparison = compare_scenarios(fields, climate_models, force=bool(payload.get("refresh")))
+    return JsonResponse(comparison, status=200 if comparison["complete"] else 202)
@@ -0,0 +1,93 @@
+// Client for /api/climate/frames/: raw Float32 climate grids painted straight onto a canvas.
+// Layout (little-endian): 64-byte header, int64 epoch seconds per frame, float32 frames (NaN = nodata).
+var ClimateFrames = (function () {
+    var HEADER_SIZE = 64;
+
+    function parseHeader(buffer) {
+        var view = new DataView(buffer);
+        var magic = String.fromCharCode(view.getUint8(0), view.getUint8(1), view.getUint8(2), view.getUint8(3));
+        if (magic !== "LXGF") {
+            throw new Error("Not a climate frame payload");
+        }
+        var header = {
+            headerSize: view.getUint16(6, true),
+            width: view.getUint32(8, true),
+            height: view.getUint32(12, true),
+            count: view.getUint32(16, true),
+            originLon: view.getFloat64(24, true),
+            originLat: view.getFloat64(32, true),
+            resLon: view.getFloat64(40, true),
+            resLat: view.getFloat64(48, true),
+            nodata: view.getFloat32(56, true)
+        };
+        header.timesOffset = header.headerSize;
+        header.framesOffset = header.headerSize + header.count * 8;
+        header.frameBytes = header.width * header.height * 4;
+        return header;
+    }
+
+    function fetchRange(url, first, last) {
+        return fetch(url, { credentials: "same-origin", headers: { Range: "bytes=" + first + "-" + last } })
+            .then(function (response) {
+                if (!response.ok) {
+                    throw new Error("Climate frames request failed: " + response.status);
+                }
+                // 206 is the requested slice; a 200 (Range ignored by a proxy or cache) is the whole payload.
+                return response.arrayBuffer().then(function (buffer) {
+                    return response.status === 206 ? buffer : buffer.slice(first, last + 1);
+                });
+            });
+    }
+
+    // Header and time table first; frames are then fetched one range at a time.
+    function open(url) {
+        return fetchRange(url, 0, HEADER_SIZE - 1).then(function (buffer) {
+            var header = parseHeader(buffer);
+            return fetchRange(url, header.timesOffset, header.framesOffset - 1).then(function (times) {
+                var view = new DataView(times);
+                header.times = [];
+                for (var i = 0; i < header.count; i++) {
+                    header.times.push(new Date(Number(view.getBigInt64(i * 8, true)) * 1000));
+                }
+                header.url = url;
+                return header;
+            });
+        });
+    }
+
+    function frame(header, index) {
+        var first = header.framesOffset + index * header.frameBytes;
+        return fetchRange(header.url, first, first + header.frameBytes - 1).then(function (buffer) {
+            return new Float32Array(buffer);
+        });
+    }
+
+    // One pixel per cell, north-up; scale the canvas with CSS for display.
+    function paint(canvas, header, values, colorFor) {
+        canvas.width = header.width;
+        canvas.height = header.height;
+        var context = canvas.getContext("2d");
+        var image = context.createImageData(header.width, header.height);
+        for (var i = 0; i < values.length; i++) {
+            if (isNaN(values[i])) {
+                continue;
+            }
+            var rgb = colorFor(values[i]);
+            image.data[i * 4] = rgb[0];
+            image.data[i * 4 + 1] = rgb[1];
+            image.data[i * 4 + 2] = rgb[2];
+            image.data[i * 4 + 3] = 255;
+        }
+        context.putImageData(image, 0, 0);
+    }
+
+    // [south-west, north-east] corners of the cell edges, for L.imageOverlay bounds.
+    function bounds(header) {
+        var halfLon = header.resLon / 2, halfLat = Math.abs(header.resLat) / 2;
+        var south = header.originLat + header.resLat * (header.height - 1);
+        var east = header.originLon + header.resLon * (header.width - 1);
+        return [[south - halfLat, header.originLon - halfLon], [header.originLat + halfLat, east + halfLon]];
+    }
+
+    return { parseHeader: parseHeader, open: open, frame: frame, paint: paint, bounds: bounds };
+})();
@@ -61,7 +61,7 @@ $(document).ready(function () {
     addSafeBaseLayer(map);
 
     // Fetch climate data from Django API
-    $.getJSON("/api/climate-data/", function (geojsonData) {
+    $.getJSON("/api/climate-data/?format=geojson&zoom=3", function (geojsonData) {
         console.log("✅ Climate Data Loaded:", geojsonData);
 
         // Function to determine marker color based on temperature
@@ -122,13 +122,13 @@ $(document).ready(function () {
             pointToLayer: function (feature, latlng) {
                 return L.circleMarker(latlng, {
                     radius: 5,
-                    fillColor: getColor(feature.properties.temperature),
+                    fillColor: getColor(feature.properties.value),
                     color: "#000",
                     weight: 1,
                     opacity: 1,
                     fillOpacity: 0.8
                 }).bindPopup(
-                    `<b>Temperature:</b> ${feature.properties.temperature}°C<br>
+                    `<b>Temperature:</b> ${feature.properties.value}°C<br>
                      <b>Timestamp:</b> ${feature.properties.timestamp}`
                 );
             }
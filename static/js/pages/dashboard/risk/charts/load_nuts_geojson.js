@@ -12,6 +12,9 @@
 //   intensity, or dynamically scaling the map's heat layer.
 
 (function () {
+    // Pre-built NUTS-2 bundle (manage.py build_nuts_bundles); falls back to the full
+    // all-level file when the bundles haven't been built.
+    const bundleSrc = "/static/data/nuts/build/nuts_L2_medium.geojson";
     const src = "/static/data/nuts/NUTS_RG_03M_2021_4326.geojson";
 
     // simple seasonal dummy used for now (peak late summer/autumn)
@@ -26,7 +29,8 @@
 
     async function ensureRawGeo() {
         if (RAW_GEOJSON) return RAW_GEOJSON;
-        const res = await fetch(src);
+        let res = await fetch(bundleSrc);
+        if (!res.ok) res = await fetch(src);
         if (!res.ok) throw new Error(`HTTP ${res.status} fetching ${src}`);
         RAW_GEOJSON = await res.json();
         return RAW_GEOJSON;
@@ -1,50 +1,268 @@
-import cdsapi
+import hashlib
+import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
 
-def download_era5_data():
-    """Downloads ERA5 temperature data for the last 10 years (2015-2024) at 12:00 PM daily."""
-    c = cdsapi.Client()
-
-    years = [str(y) for y in range(2015, 2025)]  # Last 10 years
-    months = [f"{m:02d}" for m in range(1, 13)]  # 01 to 12
-    days = [f"{d:02d}" for d in range(1, 32)]  # 01 to 31
-
-    print(f"Fetching ERA5 temperature data for {years} at 12:00 PM...")
-
-    save_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../data/era5_temp_2015_2024.nc"))
-    os.makedirs(os.path.dirname(save_path), exist_ok=True)
-
-    result = c.retrieve(
-        "reanalysis-era5-single-levels",
-        {
-            "variable": [
-                "2m_temperature",
-                "sea_surface_temperature",
-                "maximum_2m_temperature_since_previous_post_processing",
-                "minimum_2m_temperature_since_previous_post_processing",
-                "skin_temperature"
-            ],
+from django.conf import settings
+
+ERA5_DATASET = "reanalysis-era5-single-levels"
+ERA5_VARIABLES = [
+    "2m_temperature",
+    "sea_surface_temperature",
+    "maximum_2m_temperature_since_previous_post_processing",
+    "minimum_2m_temperature_since_previous_post_processing",
+    "skin_temperature",
+]
+ERA5_AREA = [72, -25, 30, 45]  # Europe (N, W, S, E)
+
+DEFAULT_DOWNLOAD_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../data/era5"))
+DOWNLOAD_WORKERS = max(1, int(getattr(settings, "ERA5_DOWNLOAD_WORKERS", 4)))
+DOWNLOAD_RETRIES = max(0, int(getattr(settings, "ERA5_DOWNLOAD_RETRIES", 2)))
+RETRY_DELAY_SECONDS = 30
+
+# NetCDF3 ("CDF") and NetCDF4/HDF5 signatures; anything else is an error page or a truncated file.
+NETCDF_SIGNATURES = (b"CDF", b"\x89HDF")
+
+
+@dataclass(frozen=True)
+class Era5Partition:
+    """One month of ERA5 data, downloaded as its own CDS request and file."""
+    year: int
+    month: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.year}-{self.month:02d}"
+
+    @property
+    def filename(self) -> str:
+        return f"era5_temp_{self.year}_{self.month:02d}.nc"
+
+    def request(self) -> dict:
+        return {
+            "variable": ERA5_VARIABLES,
             "product_type": "reanalysis",
-            "year": years,
-            "month": months,
-            "day": days,
+            "year": [str(self.year)],
+            "month": [f"{self.month:02d}"],
+            "day": [f"{d:02d}" for d in range(1, 32)],  # CDS skips days a month doesn't have
             "time": ["12:00"],  # Only one time per day to reduce data size
             "format": "netcdf",
-            "area": [72, -25, 30, 45]  # Europe
-        },
-        save_path
-    )
+            "area": ERA5_AREA,
+        }
+
+    def is_open(self, today: date | None = None) -> bool:
+        """The current month keeps gaining days, so its file is never final."""
+        today = today or date.today()
+        return (self.year, self.month) >= (today.year, today.month)
+
+
+def month_partitions(start_year: int, end_year: int, today: date | None = None) -> list[Era5Partition]:
+    """Monthly partitions from ``start_year`` to ``end_year`` inclusive, excluding future months."""
+    today = today or date.today()
+    return [
+        Era5Partition(year, month)
+        for year in range(start_year, end_year + 1)
+        for month in range(1, 13)
+        if (year, month) <= (today.year, today.month)
+    ]
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _looks_like_netcdf(path: str) -> bool:
+    with open(path, "rb") as fh:
+        head = fh.read(4)
+    return any(head.startswith(signature) for signature in NETCDF_SIGNATURES)
+
+
+class Era5Manifest:
+    """
+    ``manifest.json`` in the download directory: per partition key the file name,
+    size, SHA256 and when it was downloaded / ingested. Writes are serialised and
+    atomic, so worker threads can record results concurrently.
+    """
+
+    def __init__(self, directory: str):
+        self.path = os.path.join(directory, "manifest.json")
+        self._lock = threading.Lock()
+        self._entries = {}
+        if os.path.exists(self.path):
+            with open(self.path) as fh:
+                self._entries = json.load(fh).get("partitions", {})
+
+    def get(self, partition: Era5Partition) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(partition.key)
+            return dict(entry) if entry else None
+
+    def update(self, partition: Era5Partition, **fields) -> None:
+        with self._lock:
+            self._entries.setdefault(partition.key, {}).update(fields)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w") as fh:
+                json.dump({"partitions": self._entries}, fh, indent=2, sort_keys=True)
+            os.replace(tmp, self.path)
 
-    if result is not None:
-        print("✅ Data request successful.")
-    else:
-        print("❌ ERROR: Failed to retrieve data from Copernicus API.")
-        return
 
-    if os.path.exists(save_path):
-        print(f"✅ Download complete: {save_path}")
-    else:
-        print("❌ ERROR: Downloaded file not found!")
+def cds_client():
+    """Default client factory; cdsapi is imported lazily so fakes work without it."""
+    import cdsapi
+
+    return cdsapi.Client()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class Era5Downloader:
+    """
+    Download ERA5 month partitions with bounded parallelism.
+
+    Each partition is fetched into a ``.part`` file and renamed once it is complete
+    and looks like NetCDF, then recorded in the manifest with its SHA256. Re-runs
+    skip partitions whose file still matches the manifest, so an interrupted run
+    resumes where it stopped. ``client_factory`` builds one CDS client per worker
+    thread; pass a fake (anything with ``retrieve(dataset, request, target)``) in tests.
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_DOWNLOAD_DIR,
+        client_factory=None,
+        workers: int = DOWNLOAD_WORKERS,
+        retries: int = DOWNLOAD_RETRIES,
+        retry_delay: float = RETRY_DELAY_SECONDS,
+    ):
+        self.directory = directory
+        self.client_factory = client_factory or cds_client
+        self.workers = max(1, int(workers))
+        self.retries = max(0, int(retries))
+        self.retry_delay = retry_delay
+        self.manifest = Era5Manifest(directory)
+        self._local = threading.local()
+
+    def path_for(self, partition: Era5Partition) -> str:
+        return os.path.join(self.directory, partition.filename)
+
+    def _client(self):
+        if not hasattr(self._local, "client"):
+            self._local.client = self.client_factory()
+        return self._local.client
+
+    def is_verified(self, partition: Era5Partition) -> bool:
+        """The file exists and matches the size and SHA256 recorded in the manifest."""
+        entry = self.manifest.get(partition)
+        path = self.path_for(partition)
+        if not entry or not entry.get("sha256") or not os.path.exists(path):
+            return False
+        return os.path.getsize(path) == entry.get("size") and _sha256(path) == entry["sha256"]
+
+    def download(self, partition: Era5Partition) -> str:
+        """Fetch one partition (with retries) and record it; returns the final path."""
+        path = self.path_for(partition)
+        part_path = f"{path}.part"
+        last_error = None
+        for attempt in range(self.retries + 1):
+            try:
+                self._client().retrieve(ERA5_DATASET, partition.request(), part_path)
+                if not os.path.exists(part_path) or not _looks_like_netcdf(part_path):
+                    raise ValueError(f"{partition.key}: downloaded file is missing or not NetCDF")
+                os.replace(part_path, path)
+                self.manifest.update(
+                    partition,
+                    file=partition.filename,
+                    size=os.path.getsize(path),
+                    sha256=_sha256(path),
+                    downloaded_at=_now(),
+                    complete=not partition.is_open(),
+                    ingested_at=None,
+                )
+                return path
+            except Exception as exc:
+                last_error = exc
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+                if attempt < self.retries:
+                    time.sleep(self.retry_delay * (attempt + 1))
+        raise RuntimeError(f"ERA5 partition {partition.key} failed after {self.retries + 1} attempts") from last_error
+
+    def run(self, partitions, on_ready=None, refresh_open: bool = True) -> dict:
+        """
+        Make every partition available locally and hand each one to ``on_ready(partition, path)``
+        as soon as it is ready, on the calling thread, while the remaining downloads continue.
+
+        Verified partitions that were already ingested are skipped; verified ones that
+        weren't are handed over without downloading. With ``refresh_open`` the current
+        month, and any month fetched before it was over, are downloaded again.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        summary = {"downloaded": [], "reused": [], "skipped": [], "failed": {}}
+
+        pending = []
+        for partition in partitions:
+            entry = self.manifest.get(partition) or {}
+            # A month downloaded while it was still open is missing its last days.
+            if refresh_open and (partition.is_open() or entry.get("complete") is False):
+                pending.append(partition)
+            elif self.is_verified(partition):
+                if entry.get("ingested_at"):
+                    summary["skipped"].append(partition.key)
+                else:
+                    summary["reused"].append(partition.key)
+                    self._hand_over(partition, on_ready, summary)
+            else:
+                pending.append(partition)
+
+        with ThreadPoolExecutor(self.workers) as executor:
+            futures = {executor.submit(self.download, partition): partition for partition in pending}
+            for future in as_completed(futures):
+                partition = futures[future]
+                try:
+                    future.result()
+                except Exception as exc:
+                    summary["failed"][partition.key] = str(exc)
+                    print(f"❌ ERROR: {exc}")
+                    continue
+                summary["downloaded"].append(partition.key)
+                print(f"✅ Downloaded {partition.key}")
+                self._hand_over(partition, on_ready, summary)
+        return summary
+
+    def _hand_over(self, partition: Era5Partition, on_ready, summary: dict) -> None:
+        """Run ``on_ready``; only a successful hand-over marks the partition ingested."""
+        if on_ready is None:
+            return
+        try:
+            on_ready(partition, self.path_for(partition))
+        except Exception as exc:
+            summary["failed"][partition.key] = f"ingest: {exc}"
+            print(f"❌ ERROR: ingesting {partition.key} failed. {exc}")
+            return
+        self.manifest.update(partition, ingested_at=_now())
+
+
+def download_era5_data(start_year: int = 2015, end_year: int = 2024, on_ready=None, client_factory=None) -> dict:
+    """Downloads ERA5 temperature data (12:00 daily) month by month for ``start_year``..``end_year``."""
+    print(f"Fetching ERA5 temperature data for {start_year}-{end_year} at 12:00 PM...")
+    downloader = Era5Downloader(client_factory=client_factory)
+    summary = downloader.run(month_partitions(start_year, end_year), on_ready=on_ready)
+    print(
+        f"✅ ERA5 partitions: {len(summary['downloaded'])} downloaded, {len(summary['reused'])} reused, "
+        f"{len(summary['skipped'])} already ingested, {len(summary['failed'])} failed."
+    )
+    return summary
+
 
 if __name__ == "__main__":
     download_era5_data()
@@ -1,28 +1,313 @@
+import io
 import os
-import xarray as xr
+import struct
+import time as time_module
+
+import numpy as np
 import pandas as pd
+import xarray as xr
 
-from django.contrib.gis.geos import Point
-from django.db import transaction
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
 
-from concurrent.futures import ThreadPoolExecutor
+from lumenix.services.climate_store import ClimateGridStore
 
-from lumenix.models import ClimateData
+try:
+    import dask  # noqa: F401
+except ImportError:  # pragma: no cover - dask is optional, netCDF4 reads slices lazily anyway
+    dask = None
 
+DEFAULT_NC_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), "../data/era5_temp_latest.nc"))
 
-def insert_records(records):
-    """Insert records into the database using Django's ORM in a thread-safe way."""
-    if records:
-        with transaction.atomic():  # Ensures data integrity
-            ClimateData.objects.bulk_create(records, ignore_conflicts=True)
-        print(f"✅ Inserted {len(records)} records...")
+# Time steps read, converted and copied per block; peak memory is roughly
+# block x lat x lon x variables x 8 bytes plus the CSV text of one time step.
+TIME_BLOCK_SIZE = max(1, int(getattr(settings, "CLIMATE_INGEST_TIME_BLOCK", 24)))
 
+STORAGE_BACKENDS = ("rows", "grid", "both")
+DEFAULT_BACKEND = getattr(settings, "CLIMATE_STORAGE_BACKEND", "rows")
+
+# "skip" only ingests time steps that are not stored yet; "upsert" rewrites every
+# time step of the file, updating the values of cells that already exist.
+INGEST_MODES = ("skip", "upsert")
+
+KELVIN_OFFSET = 273.15
+
+# ClimateData column -> NetCDF variable names, first match wins (CDS short names first,
+# then the names older local files used).
+VARIABLE_SOURCES = {
+    "temperature_2m": ("t2m",),
+    "sea_surface_temperature": ("sst",),
+    "max_temperature_2m": ("mx2t", "t2m_max"),
+    "min_temperature_2m": ("mn2t", "t2m_min"),
+    "skin_temperature": ("skt", "skin_temp"),
+}
+
+COPY_COLUMNS = (
+    "timestamp",
+    "location",
+    *VARIABLE_SOURCES,
+    "status",
+    "created_at",
+    "updated_at",
+)
+COPY_SQL = (
+    f"COPY climate_data ({', '.join(COPY_COLUMNS)}) "
+    "FROM STDIN WITH (FORMAT csv, NULL '')"
+)
+
+# Upserts copy each block into a per-transaction stage table and merge it on the natural key.
+STAGE_SQL = (
+    "CREATE TEMP TABLE climate_data_stage ON COMMIT DROP AS "
+    f"SELECT {', '.join(COPY_COLUMNS)} FROM climate_data WITH NO DATA"
+)
+STAGE_COPY_SQL = (
+    f"COPY climate_data_stage ({', '.join(COPY_COLUMNS)}) "
+    "FROM STDIN WITH (FORMAT csv, NULL '')"
+)
+
+# Little-endian EWKB header for a 2D point with SRID 4326.
+EWKB_POINT_HEADER = struct.pack("<BII", 1, 0x20000001, 4326)
+
+
+class _ChunkStream(io.TextIOBase):
+    """Read-only file object over an iterator of text chunks, as ``copy_expert`` expects."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = ""
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            data, self._buffer = self._buffer, ""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def _time_variable(ds):
+    for name in ("valid_time", "time"):
+        if name in ds.variables:
+            return name
+    raise KeyError("No valid time variable found. Expected 'valid_time' or 'time'.")
+
+
+def _source_variables(ds) -> dict:
+    """ClimateData column -> dataset variable name for the variables present in ``ds``."""
+    found = {}
+    for column, candidates in VARIABLE_SOURCES.items():
+        for name in candidates:
+            if name in ds.data_vars:
+                found[column] = name
+                break
+    if "temperature_2m" not in found:
+        raise KeyError("t2m")
+    return found
+
+
+def point_ewkb_hex(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """
+    Hex EWKB of every (lat, lon) grid cell, flattened in C order (lat-major), which
+    PostGIS accepts directly as geography input in COPY.
+    """
+    lon_grid, lat_grid = np.meshgrid(lon.astype("<f8"), lat.astype("<f8"))
+    coords = np.column_stack([lon_grid.ravel(), lat_grid.ravel()])
+    header = np.frombuffer(EWKB_POINT_HEADER, dtype=np.uint8)
+    rows = np.hstack([np.broadcast_to(header, (len(coords), header.size)), coords.view(np.uint8)])
+    width = rows.shape[1] * 2
+    encoded = rows.tobytes().hex().upper()
+    return np.array([encoded[i:i + width] for i in range(0, len(encoded), width)], dtype=object)
+
+
+def _celsius(values: np.ndarray) -> np.ndarray:
+    return np.round(values.astype("f8") - KELVIN_OFFSET, 2)
+
+
+def climate_csv_frames(ds, variables: dict, locations: np.ndarray, now: str, counter: dict | None = None):
+    """
+    Yield one CSV block per time step. Each block is built from whole NumPy arrays:
+    unit conversion, rounding and the NaN mask are vectorized and pandas writes the text.
+    Cells without a 2m temperature (the NOT NULL column) are skipped.
+    """
+    time_var = _time_variable(ds)
+    timestamps = pd.to_datetime(ds[time_var].values, utc=True)
+
+    for i, stamp in enumerate(timestamps):
+        columns = {
+            column: _celsius(ds[name].isel({time_var: i}).values).ravel()
+            for column, name in variables.items()
+        }
+        mask = ~np.isnan(columns["temperature_2m"])
+        if not mask.any():
+            continue
+        if counter is not None:
+            counter["rows"] = counter.get("rows", 0) + int(mask.sum())
+
+        frame = pd.DataFrame({"location": locations[mask]})
+        frame.insert(0, "timestamp", stamp.isoformat())
+        for column in VARIABLE_SOURCES:
+            frame[column] = columns[column][mask] if column in columns else np.nan
+        frame["status"] = 1
+        frame["created_at"] = now
+        frame["updated_at"] = now
+        yield frame.to_csv(header=False, index=False, float_format="%.2f", na_rep="")
 
-def process_netCDF():
-    """Reads NetCDF and saves climate data into the Django database efficiently."""
 
-    # File path for NetCDF data
-    nc_file = os.path.abspath(os.path.join(os.path.dirname(__file__), "../data/era5_temp_latest.nc"))
+def open_climate_dataset(nc_file: str, time_block: int = TIME_BLOCK_SIZE):
+    """
+    Open ``nc_file`` lazily. ``cache=False`` keeps xarray from holding on to slices
+    that were already read; with dask installed the time axis is also chunked by
+    ``time_block``.
+    """
+    if dask is None:
+        return xr.open_dataset(nc_file, cache=False)
+    with xr.open_dataset(nc_file, cache=False) as probe:
+        time_var = _time_variable(probe)
+    return xr.open_dataset(nc_file, cache=False, chunks={time_var: time_block})
+
+
+def iter_time_blocks(ds, variables: dict, time_block: int = TIME_BLOCK_SIZE, positions=None):
+    """
+    Yield ``(first, last, block)`` with the needed variables of each block loaded in
+    memory. ``positions`` restricts the read to those time indices (default: all).
+    """
+    time_var = _time_variable(ds)
+    if positions is None:
+        positions = np.arange(ds.sizes[time_var])
+    positions = np.asarray(positions, dtype=int)
+    subset = ds[list(variables.values())]
+    for offset in range(0, positions.size, time_block):
+        chunk = positions[offset:offset + time_block]
+        yield int(chunk[0]), int(chunk[-1]), subset.isel({time_var: chunk}).load()
+
+
+def _file_timestamps(ds) -> pd.DatetimeIndex:
+    return pd.DatetimeIndex(pd.to_datetime(ds[_time_variable(ds)].values, utc=True))
+
+
+def loaded_timestamps(start, end) -> set:
+    """Timestamps in ``[start, end]`` that already have climate_data rows."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT DISTINCT timestamp FROM climate_data WHERE timestamp BETWEEN %s AND %s",
+            [start, end],
+        )
+        return {pd.Timestamp(row[0]).tz_convert("UTC") for row in cursor.fetchall()}
+
+
+def _pending_positions(timestamps: pd.DatetimeIndex, loaded: set) -> np.ndarray:
+    return np.array([i for i, stamp in enumerate(timestamps) if stamp not in loaded], dtype=int)
+
+
+def _upsert_sql() -> str:
+    columns = ", ".join(COPY_COLUMNS)
+    updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in VARIABLE_SOURCES)
+    return (
+        f"INSERT INTO climate_data ({columns}) SELECT {columns} FROM climate_data_stage "
+        f"ON CONFLICT (timestamp, location) DO UPDATE SET {updates}, "
+        "status = 1, deleted_at = NULL, updated_at = EXCLUDED.updated_at"
+    )
+
+
+def copy_climate_dataset(ds, time_block: int = TIME_BLOCK_SIZE, progress=None, mode: str = "skip") -> int:
+    """
+    Stream the cells of ``ds`` into ``climate_data``, one ``COPY FROM STDIN`` (and
+    transaction) per block of ``time_block`` time steps. A block is fully written
+    before the next one is read, so memory stays bounded regardless of file size.
+
+    In ``skip`` mode time steps that already have rows are not read at all; in
+    ``upsert`` mode each block is copied into a temporary stage table and merged on
+    the ``(timestamp, location)`` natural key.
+    """
+    if mode not in INGEST_MODES:
+        raise ValueError(f"Unknown ingest mode: {mode}")
+    variables = _source_variables(ds)
+    reference = ds[variables["temperature_2m"]]
+    locations = point_ewkb_hex(ds["latitude"].values, ds["longitude"].values)
+    if reference.isel({_time_variable(ds): 0}).size != len(locations):
+        raise ValueError("Unexpected dimensions; expected (time, latitude, longitude) variables.")
+
+    positions = None
+    if mode == "skip":
+        timestamps = _file_timestamps(ds)
+        positions = _pending_positions(timestamps, loaded_timestamps(timestamps.min(), timestamps.max()))
+
+    now = timezone.now().isoformat()
+    total = 0
+    blocks = iter_time_blocks(ds, variables, time_block=max(1, int(time_block)), positions=positions)
+    for first, last, block in blocks:
+        counter = {"rows": 0}
+        frames = _ChunkStream(climate_csv_frames(block, variables, locations, now, counter=counter))
+        with transaction.atomic(), connection.cursor() as cursor:
+            if mode == "upsert":
+                cursor.execute(STAGE_SQL)
+                cursor.copy_expert(STAGE_COPY_SQL, frames)
+                cursor.execute(_upsert_sql())
+            else:
+                cursor.copy_expert(COPY_SQL, frames)
+        block.close()
+        total += counter["rows"]
+        if progress:
+            progress(first, last, counter["rows"])
+    return total
+
+
+def store_climate_dataset(
+    ds, store=None, time_block: int = TIME_BLOCK_SIZE, progress=None, mode: str = "skip"
+) -> int:
+    """
+    Write the time steps of ``ds`` as float32 frames into the climate grid store,
+    block by block like :func:`copy_climate_dataset`. ``skip`` leaves time steps the
+    store already has untouched; ``upsert`` overwrites them. Returns the number of frames.
+    """
+    if mode not in INGEST_MODES:
+        raise ValueError(f"Unknown ingest mode: {mode}")
+    store = store or ClimateGridStore()
+    variables = _source_variables(ds)
+    time_var = _time_variable(ds)
+    lat, lon = ds["latitude"].values, ds["longitude"].values
+
+    positions = None
+    if mode == "skip":
+        timestamps = _file_timestamps(ds)
+        stored = store.timestamps("temperature_2m", timestamps.min(), timestamps.max())
+        positions = _pending_positions(timestamps, set(pd.to_datetime(stored, utc=True)))
+
+    total = 0
+    blocks = iter_time_blocks(ds, variables, time_block=max(1, int(time_block)), positions=positions)
+    for first, last, block in blocks:
+        times = block[time_var].values
+        for column, name in variables.items():
+            store.write_frames(column, times, _celsius(block[name].values), lat, lon)
+        block.close()
+        total += times.size
+        if progress:
+            progress(first, last, times.size * lat.size * lon.size)
+    return total
+
+
+def process_netCDF(
+    nc_file: str | None = None,
+    time_block: int = TIME_BLOCK_SIZE,
+    backend: str = DEFAULT_BACKEND,
+    mode: str = "skip",
+):
+    """Reads NetCDF and saves climate data into the Django database efficiently."""
+    nc_file = nc_file or DEFAULT_NC_FILE
+    if mode not in INGEST_MODES:
+        print(f"❌ ERROR: Unknown ingest mode {mode!r}; expected one of {', '.join(INGEST_MODES)}.")
+        return
+    if backend not in STORAGE_BACKENDS:
+        print(f"❌ ERROR: Unknown storage backend {backend!r}; expected one of {', '.join(STORAGE_BACKENDS)}.")
+        return
 
     # Check file existence
     if not os.path.exists(nc_file):
@@ -32,77 +317,29 @@ def process_netCDF():
     print(f"Processing NetCDF file: {nc_file}")
 
     try:
-        ds = xr.open_dataset(nc_file)
+        ds = open_climate_dataset(nc_file, time_block=time_block)
     except Exception as e:
         print(f"❌ ERROR: Failed to open NetCDF file. {e}")
         return
 
-    # Extract variables
-    try:
+    with ds:
         print("Available variables in dataset:", list(ds.keys()))
+        started = time_module.monotonic()
+        progress = lambda first, last, rows: print(f"  time steps {first}-{last}: {rows} records")
+        try:
+            count = 0
+            if backend in ("rows", "both"):
+                count = copy_climate_dataset(ds, time_block=time_block, progress=progress, mode=mode)
+            if backend in ("grid", "both"):
+                frames = store_climate_dataset(ds, time_block=time_block, progress=progress, mode=mode)
+                print(f"✅ Stored {frames} time steps in the climate grid store.")
+        except KeyError as e:
+            print(f"❌ ERROR: Missing expected variable in NetCDF file: {e}")
+            return
 
-        if "valid_time" in ds:
-            time_var = "valid_time"
-        elif "time" in ds:
-            time_var = "time"
-        else:
-            raise KeyError("No valid time variable found. Expected 'valid_time' or 'time'.")
-
-        time = ds[time_var].values  # Read correct time variable
-        lat = ds["latitude"].values
-        lon = ds["longitude"].values
-
-        # Extract temperature variables (Convert Kelvin to Celsius)
-        temp_2m = ds["t2m"].values - 273.15
-        sst = ds["sst"].values - 273.15 if "sst" in ds else None
-        temp_2m_max = ds["t2m_max"].values - 273.15 if "t2m_max" in ds else None
-        temp_2m_min = ds["t2m_min"].values - 273.15 if "t2m_min" in ds else None
-        skin_temp = ds["skin_temp"].values - 273.15 if "skin_temp" in ds else None
-    except KeyError as e:
-        print(f"❌ ERROR: Missing expected variable in NetCDF file: {e}")
-        return
-
-    records = []
-    batch_size = 5000
-    count = 0
-    max_threads = 4
-
-    with ThreadPoolExecutor(max_threads) as executor:
-        futures = []
-
-        for i, t in enumerate(time):
-            for j, latitude in enumerate(lat):
-                for k, longitude in enumerate(lon):
-                    count += 1
-
-                    # Create ClimateData instance with multiple temperature fields
-                    record = ClimateData(
-                        timestamp=pd.to_datetime(t),
-                        location=Point(float(longitude), float(latitude)),  # (x=lon, y=lat)
-                        temperature_2m=round(float(temp_2m[i][j][k]), 2),
-                        sea_surface_temperature=round(float(sst[i][j][k]), 2) if sst is not None else None,
-                        max_temperature_2m=round(float(temp_2m_max[i][j][k]), 2) if temp_2m_max is not None else None,
-                        min_temperature_2m=round(float(temp_2m_min[i][j][k]), 2) if temp_2m_min is not None else None,
-                        skin_temperature=round(float(skin_temp[i][j][k]), 2) if skin_temp is not None else None,
-                    )
-                    records.append(record)
-
-                    # Process batch
-                    if len(records) >= batch_size:
-                        future = executor.submit(insert_records, records[:])
-                        futures.append(future)
-                        records = []
-
-        # Final batch insert
-        if records:
-            future = executor.submit(insert_records, records[:])
-            futures.append(future)
-
-        # Wait for all threads to complete
-        for future in futures:
-            future.result()
-
-    print(f"✅ Climate data processing completed. Total records processed: {count}")
+    elapsed = time_module.monotonic() - started
+    print(f"✅ Climate data processing completed. Total records processed: {count} in {elapsed:.1f}s")
+    return count
 
 
 if __name__ == "__main__":